@@ -0,0 +1,23 @@
+"""add indexes for contacts.owner_id
+
+Revision ID: 1dff306e115c
+Revises: 29cef8de7d69
+Create Date: 2026-10-19 08:16:53.665738
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '1dff306e115c'
+down_revision = '29cef8de7d69'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_contacts_owner_id'), 'contacts', ['owner_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_contacts_owner_id'), table_name='contacts')
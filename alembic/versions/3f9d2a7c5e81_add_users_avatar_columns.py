@@ -0,0 +1,31 @@
+"""add users.avatar_hash and users.avatar_variants
+
+Revision ID: 3f9d2a7c5e81
+Revises: e6a1c3f8b259
+Create Date: 2026-10-19 14:02:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9d2a7c5e81'
+down_revision = 'e6a1c3f8b259'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Колонки аватара з'явилися в моделі без міграції; у БД, створених через
+    # upgrade до цієї ревізії, вони вже є, а в старих (create_all) - ні
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')}
+    if 'avatar_hash' not in existing:
+        op.add_column('users', sa.Column('avatar_hash', sa.String(length=64), nullable=True))
+    if 'avatar_variants' not in existing:
+        op.add_column('users', sa.Column('avatar_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'avatar_variants')
+    op.drop_column('users', 'avatar_hash')
@@ -0,0 +1,61 @@
+"""add contact_stats
+
+Revision ID: 5b7e2c1d9a40
+Revises: 1dff306e115c
+Create Date: 2026-10-19 09:02:11.418530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2c1d9a40'
+down_revision = '1dff306e115c'
+branch_labels = None
+depends_on = None
+
+
+BACKFILL = {
+    "sqlite": {
+        "month": "CAST(CAST(strftime('%m', birthday) AS INTEGER) AS TEXT)",
+        "domain": "substr(lower(substr(email, instr(email, '@') + 1)), 1, 100)",
+    },
+    "postgresql": {
+        "month": "CAST(EXTRACT(MONTH FROM birthday) AS INTEGER)::text",
+        "domain": "left(lower(split_part(email, '@', 2)), 100)",
+    },
+}
+
+
+def upgrade() -> None:
+    op.create_table('contact_stats',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('owner_id', 'dimension', 'key')
+    )
+    expressions = BACKFILL.get(op.get_bind().dialect.name)
+    if expressions is None:
+        # Інші СУБД: python scripts/rebuild_contact_stats.py
+        return
+    op.execute(f"""
+        INSERT INTO contact_stats (owner_id, dimension, key, count)
+        SELECT owner_id, 'total', '', COUNT(*) FROM contacts GROUP BY owner_id
+        UNION ALL
+        SELECT owner_id, 'birth_month', {expressions['month']}, COUNT(*) FROM contacts
+        WHERE birthday IS NOT NULL GROUP BY owner_id, {expressions['month']}
+        UNION ALL
+        SELECT owner_id, 'email_domain', {expressions['domain']}, COUNT(*) FROM contacts
+        WHERE email <> '' GROUP BY owner_id, {expressions['domain']}
+        UNION ALL
+        SELECT owner_id, 'additional_info',
+               CASE WHEN additional_info IS NOT NULL AND additional_info <> '' THEN 'with' ELSE 'without' END,
+               COUNT(*) FROM contacts
+        GROUP BY owner_id, CASE WHEN additional_info IS NOT NULL AND additional_info <> '' THEN 'with' ELSE 'without' END
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('contact_stats')
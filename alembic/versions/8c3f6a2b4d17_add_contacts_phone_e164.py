@@ -0,0 +1,74 @@
+"""add contacts.phone_e164
+
+Revision ID: 8c3f6a2b4d17
+Revises: 5b7e2c1d9a40
+Create Date: 2026-10-19 09:41:27.105362
+
+"""
+import os
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c3f6a2b4d17'
+down_revision = '5b7e2c1d9a40'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10_000
+
+# Знімок app.phones.to_e164 на момент цієї ревізії: міграція має давати той
+# самий результат, навіть якщо нормалізатор у додатку згодом зміниться
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv("PHONE_DEFAULT_COUNTRY_CODE", "380")
+PHONE_TRUNK_PREFIX = os.getenv("PHONE_TRUNK_PREFIX", "0")
+E164_MIN_DIGITS = 8
+E164_MAX_DIGITS = 15
+_FORMATTING = re.compile(r"[\s\-(). /]")
+
+
+def to_e164(phone, country_code=PHONE_DEFAULT_COUNTRY_CODE, trunk_prefix=PHONE_TRUNK_PREFIX):
+    if not phone:
+        return None
+    compact = _FORMATTING.sub("", phone)
+    if compact.startswith("+"):
+        digits = compact[1:]
+    elif compact.startswith("00"):
+        digits = compact[2:]
+    elif compact.startswith(country_code) and len(compact) > E164_MIN_DIGITS + 1:
+        digits = compact
+    elif trunk_prefix and compact.startswith(trunk_prefix):
+        digits = country_code + compact[len(trunk_prefix):]
+    else:
+        digits = country_code + compact
+    if not digits.isdigit() or not E164_MIN_DIGITS <= len(digits) <= E164_MAX_DIGITS:
+        return None
+    return f"+{digits}"
+
+
+def upgrade() -> None:
+    op.add_column('contacts', sa.Column('phone_e164', sa.String(length=16), nullable=True))
+    # Заповнюємо колонку до створення індексу, щоб не оновлювати його на кожному рядку
+    bind = op.get_bind()
+    contacts = sa.table('contacts', sa.column('id', sa.Integer), sa.column('phone', sa.String), sa.column('phone_e164', sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(contacts.c.id, contacts.c.phone).where(contacts.c.id > last_id).order_by(contacts.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = [{"contact_id": contact_id, "phone_e164": to_e164(phone)} for contact_id, phone in rows]
+        bind.execute(
+            contacts.update().where(contacts.c.id == sa.bindparam("contact_id")).values(phone_e164=sa.bindparam("phone_e164")),
+            updates,
+        )
+        last_id = rows[-1][0]
+    op.create_index('ix_contacts_owner_id_phone_e164', 'contacts', ['owner_id', 'phone_e164'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_owner_id_phone_e164', table_name='contacts')
+    op.drop_column('contacts', 'phone_e164')
@@ -0,0 +1,62 @@
+"""add lowercase prefix columns to contacts
+
+Revision ID: b41d9e7c2f65
+Revises: 8c3f6a2b4d17
+Create Date: 2026-10-19 10:12:48.230771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41d9e7c2f65'
+down_revision = '8c3f6a2b4d17'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10_000
+COLUMNS = (('first_name', 50), ('last_name', 50), ('email', 100))
+
+
+def _prefix_type(length: int) -> sa.String:
+    return sa.String(length=length).with_variant(sa.String(length=length, collation='C'), 'postgresql')
+
+
+def upgrade() -> None:
+    for name, length in COLUMNS:
+        op.add_column('contacts', sa.Column(f'{name}_lower', _prefix_type(length), nullable=True))
+    # lower() у SQLite змінює лише ASCII, тому значення рахуються в Python, як і при записі через ORM
+    bind = op.get_bind()
+    contacts = sa.table(
+        'contacts', sa.column('id', sa.Integer),
+        *(sa.column(name, sa.String) for name, _ in COLUMNS),
+        *(sa.column(f'{name}_lower', sa.String) for name, _ in COLUMNS),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(contacts.c.id, *(contacts.c[name] for name, _ in COLUMNS))
+            .where(contacts.c.id > last_id).order_by(contacts.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = [
+            {"contact_id": row[0], **{f"{name}_value": value.lower() for (name, _), value in zip(COLUMNS, row[1:])}}
+            for row in rows
+        ]
+        bind.execute(
+            contacts.update().where(contacts.c.id == sa.bindparam("contact_id")).values(
+                {f"{name}_lower": sa.bindparam(f"{name}_value") for name, _ in COLUMNS}
+            ),
+            updates,
+        )
+        last_id = rows[-1][0]
+    for name, _ in COLUMNS:
+        op.create_index(f'ix_contacts_owner_id_{name}_lower', 'contacts', ['owner_id', f'{name}_lower'], unique=False)
+
+
+def downgrade() -> None:
+    for name, _ in reversed(COLUMNS):
+        op.drop_index(f'ix_contacts_owner_id_{name}_lower', table_name='contacts')
+        op.drop_column('contacts', f'{name}_lower')
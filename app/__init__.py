@@ -1 +1,9 @@
-# Пустий файл для того, щоб Python розпізнав директорію як пакет
+"""
+Пакет додатку Contacts API.
+
+Змінні з `.env` завантажуються один раз тут, до імпорту будь-якого модуля,
+що читає налаштування з оточення.
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
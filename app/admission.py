@@ -0,0 +1,186 @@
+"""
+Adaptive admission control: обмеження одночасних запитів на клас маршрутів.
+
+Кожен клас (auth, читання контактів, запис контактів) має власний ліміт
+одночасності, який підлаштовується за спостережуваною затримкою (AIMD):
+поки запити вкладаються в цільову затримку, ліміт повільно зростає, а коли
+база даних сповільнюється - різко зменшується. Запити понад ліміт чекають у
+черзі до дедлайну; якщо черга переповнена або очікування явно не вкладеться
+в дедлайн, запит одразу відхиляється з 503 та Retry-After.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Optional
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2.0"))
+MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+EVENTS_PATH = "/api/v1/contacts/events"
+
+
+class Overloaded(Exception):
+    """Запит відхилено через перевантаження"""
+
+
+class AIMDLimit:
+    """Ліміт одночасності з additive increase / multiplicative decrease"""
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, target_latency: float, backoff: float = 0.9):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self._last_decrease = 0.0
+
+    def on_sample(self, latency: float, now: Optional[float] = None) -> None:
+        """Оновити ліміт за затримкою завершеного запиту"""
+        now = time.monotonic() if now is None else now
+        if latency > self.target_latency:
+            # Не частіше одного зменшення за цільову затримку, щоб одна хвиля
+            # повільних запитів не обвалила ліміт до мінімуму
+            if now - self._last_decrease >= self.target_latency:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+    @property
+    def value(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+
+class RouteClass:
+    """Клас маршрутів з адаптивним лімітом та чергою з дедлайном"""
+
+    def __init__(
+        self,
+        name: str,
+        limit: AIMDLimit,
+        max_queue: int = MAX_QUEUE,
+        queue_timeout: float = QUEUE_TIMEOUT,
+    ):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.avg_latency = limit.target_latency
+        self.shed = 0
+
+    def _estimated_wait(self) -> float:
+        return (len(self.waiters) + 1) * self.avg_latency / self.limit.value
+
+    async def acquire(self) -> None:
+        """Зайняти слот або дочекатися його в черзі"""
+        if self.in_flight < self.limit.value and not self.waiters:
+            self.in_flight += 1
+            return
+        if len(self.waiters) >= self.max_queue or self._estimated_wait() > self.queue_timeout:
+            self.shed += 1
+            raise Overloaded(self.name)
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            raise Overloaded(self.name)
+        except asyncio.CancelledError:
+            # Клієнт відключився вже після того, як слот було передано
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+    def release(self, latency: float) -> None:
+        """Звільнити слот, оновити ліміт та передати слот наступному в черзі"""
+        self.in_flight -= 1
+        self.avg_latency = 0.8 * self.avg_latency + 0.2 * latency
+        self.limit.on_sample(latency)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self.waiters and self.in_flight < self.limit.value:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit.value,
+            "in_flight": self.in_flight,
+            "queued": len(self.waiters),
+            "shed": self.shed,
+        }
+
+
+def default_route_classes() -> Dict[str, RouteClass]:
+    """Класи маршрутів за замовчуванням (цільова затримка враховує bcrypt в auth)"""
+    return {
+        "auth": RouteClass("auth", AIMDLimit(initial=16, min_limit=2, max_limit=64, target_latency=1.0)),
+        "contacts_read": RouteClass("contacts_read", AIMDLimit(initial=32, min_limit=4, max_limit=256, target_latency=0.25)),
+        "contacts_write": RouteClass("contacts_write", AIMDLimit(initial=16, min_limit=2, max_limit=128, target_latency=0.5)),
+    }
+
+
+def classify_request(scope: Scope) -> Optional[str]:
+    """Визначити клас маршруту за шляхом та методом (None - без обмежень)"""
+    path = scope["path"]
+    if path == EVENTS_PATH:
+        # Потік SSE відкритий хвилинами: він займав би слот і псував оцінку затримки
+        return None
+    if path.startswith("/api/v1/auth"):
+        return "auth"
+    if path.startswith("/api/v1/contacts"):
+        return "contacts_read" if scope["method"] in ("GET", "HEAD") else "contacts_write"
+    return None
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware адаптивного обмеження навантаження"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        route_classes: Optional[Dict[str, RouteClass]] = None,
+        classifier: Callable[[Scope], Optional[str]] = classify_request,
+        bypass_paths: Iterable[str] = ("/health",),
+    ):
+        self.app = app
+        self.route_classes = route_classes if route_classes is not None else default_route_classes()
+        self.classifier = classifier
+        self.bypass_paths = frozenset(bypass_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.bypass_paths:
+            await self.app(scope, receive, send)
+            return
+        route_class = self.route_classes.get(self.classifier(scope))
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await route_class.acquire()
+        except Overloaded:
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Сервер перевантажений, спробуйте пізніше"},
+                headers={"Retry-After": str(max(1, math.ceil(route_class.queue_timeout)))},
+            )
+            await response(scope, receive, send)
+            return
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.release(time.monotonic() - started)
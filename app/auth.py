@@ -3,45 +3,63 @@
 """
 import os
 import secrets
+import uuid
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from . import models, schemas
+from .batch import current_batch
 from .database import get_db
+from .revocation import revocation_list
+from .timing import phase
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Вартість bcrypt (2^rounds ітерацій); кожен +1 подвоює час хешування
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    """Контекст passlib; створюється при першому використанні, а не під час імпорту"""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Перевірка пароля"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Хешування пароля"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Створення JWT токена"""
+    from jose import jwt
+
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    issued_at = datetime.utcnow()
+    expire = issued_at + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    # jti дозволяє відкликати окремий токен (POST /auth/logout)
+    to_encode.update({"exp": expire, "iat": issued_at, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 def verify_token(token: str) -> schemas.TokenData:
     """Верифікація JWT токена"""
+    from jose import JWTError, jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -52,19 +70,45 @@ def verify_token(token: str) -> schemas.TokenData:
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = schemas.TokenData(email=email)
+        token_data = schemas.TokenData(
+            email=email,
+            jti=payload.get("jti"),
+            token_version=payload.get("ver", 0),
+            expires_at=datetime.utcfromtimestamp(payload["exp"]) if "exp" in payload else None,
+        )
     except JWTError:
         raise credentials_exception
     return token_data
 
 
+def get_current_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> schemas.TokenData:
+    """Дані JWT поточного запиту; FastAPI кешує залежність, тож токен декодується один раз"""
+    batch = current_batch()
+    if batch is not None:
+        return batch.token
+    with phase("auth"):
+        return verify_token(credentials.credentials)
+
+
 def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token_data: schemas.TokenData = Depends(get_current_token),
     db: Session = Depends(get_db)
 ) -> models.User:
     """Отримання поточного користувача з токена"""
-    token_data = verify_token(credentials.credentials)
-    user = db.query(models.User).filter(models.User.email == token_data.email).first()
+    batch = current_batch()
+    if batch is not None:
+        # Підзапит пакета: користувача вже автентифіковано один раз для всього пакета
+        return batch.user
+    with phase("auth"):
+        # Невідкликаний токен (звичайний випадок) перевіряється Bloom-фільтром без запиту до БД
+        revoked = token_data.jti is not None and revocation_list.is_revoked(db, token_data.jti)
+        user = None if revoked else db.query(models.User).filter(models.User.email == token_data.email).first()
+    if revoked or (user is not None and token_data.token_version != (user.token_version or 0)):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
@@ -0,0 +1,128 @@
+"""
+Виконання кількох запитів API в межах одного HTTP-запиту.
+
+POST /api/v1/batch передає кожен підзапит безпосередньо роутеру додатку (без
+зовнішніх middleware), а контекст пакета робить так, що `get_db` повертає
+одну спільну сесію, а `get_current_user` та `get_current_token` - вже
+автентифікованого користувача та дані його токена без повторного
+декодування JWT та запиту до БД. В атомарному режимі `commit()` у
+endpoint'ах лише виконує flush, а весь пакет фіксується однією
+транзакцією наприкінці або відкочується при першій помилці.
+"""
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message, Scope
+
+BATCH_PATH = "/api/v1/batch"
+# Endpoint'и з потоковою або не-JSON взаємодією: SSE-потік не завершується в
+# межах пакета (і закриває спільну сесію), а завантаження аватара чекає multipart
+UNBATCHABLE_PATHS = ("/api/v1/contacts/events", "/api/v1/auth/me/avatar")
+# Заголовки батьківського запиту, які отримує кожен підзапит
+FORWARDED_HEADERS = (b"authorization", b"user-agent", b"x-forwarded-for")
+
+
+class BatchSession(Session):
+    """Сесія пакета: в атомарному режимі commit() відкладається до кінця пакета"""
+
+    defer_commit = False
+
+    def commit(self) -> None:
+        if self.defer_commit:
+            self.flush()
+        else:
+            super().commit()
+
+    def commit_batch(self) -> None:
+        super().commit()
+
+
+@dataclass
+class BatchContext:
+    db: BatchSession
+    user: Any
+    token: Any = None
+
+
+_current_batch: ContextVar[Optional[BatchContext]] = ContextVar("current_batch", default=None)
+
+
+def current_batch() -> Optional[BatchContext]:
+    """Контекст пакета, якщо поточний запит є підзапитом POST /api/v1/batch"""
+    return _current_batch.get()
+
+
+def validate_url(url: str) -> Optional[str]:
+    """Помилка для недопустимого URL підзапиту або None"""
+    path = urlsplit(url).path
+    if not path.startswith("/api/v1/"):
+        return "URL підзапиту має починатися з /api/v1/"
+    if path.rstrip("/") == BATCH_PATH:
+        return "Вкладені пакети не підтримуються"
+    if path.rstrip("/") in UNBATCHABLE_PATHS:
+        return "Потокові та multipart endpoint'и не підтримуються в пакеті"
+    return None
+
+
+def _sub_scope(parent: Scope, method: str, url: str, body: bytes) -> Scope:
+    parts = urlsplit(url)
+    headers = [(name, value) for name, value in parent["headers"] if name in FORWARDED_HEADERS]
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {
+        key: value for key, value in parent.items()
+        if key not in ("route", "endpoint", "path_params")
+    }
+    scope.update(
+        state=dict(parent.get("state") or {}),
+        method=method,
+        path=parts.path,
+        raw_path=parts.path.encode(),
+        query_string=parts.query.encode(),
+        headers=headers,
+    )
+    return scope
+
+
+async def dispatch(app: ASGIApp, parent: Scope, method: str, url: str, body: Any) -> Dict[str, Any]:
+    """Виконати підзапит через ASGI-додаток і повернути статус та JSON-тіло"""
+    payload = json.dumps(body).encode() if body is not None else b""
+    response: Dict[str, Any] = {"status": 500, "body": b""}
+    sent = False
+
+    async def receive() -> Message:
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    chunks: List[bytes] = []
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(_sub_scope(parent, method, url, payload), receive, send)
+    content = b"".join(chunks)
+    try:
+        response["body"] = json.loads(content) if content else None
+    except ValueError:
+        response["body"] = content.decode("utf-8", "replace")
+    return response
+
+
+@contextmanager
+def batch_context(context: BatchContext) -> Iterator[BatchContext]:
+    """Зробити сесію та користувача пакета видимими для залежностей підзапитів"""
+    token = _current_batch.set(context)
+    try:
+        yield context
+    finally:
+        _current_batch.reset(token)
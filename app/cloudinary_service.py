@@ -1,43 +1,110 @@
 """
-Сервіс для роботи з Cloudinary
+Сервіс для роботи з аватарами: локальна обробка зображень та завантаження у сховище
 """
+import asyncio
+import hashlib
+import io
 import os
-import cloudinary
-import cloudinary.uploader
-from fastapi import UploadFile, HTTPException
-
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET")
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import HTTPException, Request
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from . import crud
+from .storage import get_storage
+from .uploads import read_image_upload
+
+AVATAR_SIZE = 300
+# Мініатюри для списків генеруються у фоновій задачі після відповіді
+AVATAR_VARIANT_SIZES = (64, 128)
+MAX_AVATAR_BYTES = 5 * 1024 * 1024
+MAX_AVATAR_PIXELS = 40_000_000
+JPEG_QUALITY = 85
+
+# Декодування та ресайз виконуються поза event loop. Pillow відпускає GIL
+# під час декодування та ресемплінгу, тому пул потоків дає реальний паралелізм.
+_image_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("AVATAR_WORKERS", "2")),
+    thread_name_prefix="avatar",
 )
 
 
-async def upload_avatar(file: UploadFile, user_id: int) -> str:
-    """Завантаження аватара користувача"""
-    if not file.content_type.startswith('image/'):
-        raise HTTPException(status_code=400, detail="Файл повинен бути зображенням")
-    if file.size and file.size > 5 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="Файл занадто великий (макс. 5MB)")
+def prepare_avatar(data: bytes, size: int = AVATAR_SIZE) -> bytes:
+    """Декодувати зображення, обрізати до квадрата `size`x`size` та стиснути в JPEG"""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as img:
+        if img.width * img.height > MAX_AVATAR_PIXELS:
+            raise ValueError("Зображення занадто велике")
+        # Для JPEG декодер одразу зменшує зображення (DCT scaling) до розміру >= size
+        img.draft("RGB", (size, size))
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        img = ImageOps.fit(img, (size, size), Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def avatar_key(user_id: int, avatar_hash: str, size: int) -> str:
+    """Ключ зображення у сховищі, адресований вмістом"""
+    return f"user_{user_id}/{avatar_hash[:16]}_{size}"
+
+
+async def read_avatar_upload(request: Request) -> bytes:
+    """Потоково прочитати файл аватара з поля `file`, перевіряючи розмір та сигнатуру"""
+    data, _ = await read_image_upload(request, "file", MAX_AVATAR_BYTES, "5MB")
+    return data
+
+
+async def avatar_digest(data: bytes) -> str:
+    """SHA-256 вмісту завантаженого файлу"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_image_executor, lambda: hashlib.sha256(data).hexdigest())
+
+
+async def upload_avatar(data: bytes, user_id: int, avatar_hash: str) -> str:
+    """Обробка та завантаження основного варіанта аватара"""
+    from PIL import Image
+
+    loop = asyncio.get_running_loop()
+    try:
+        avatar = await loop.run_in_executor(_image_executor, prepare_avatar, data)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        raise HTTPException(status_code=400, detail="Не вдалося обробити зображення")
     try:
-        result = cloudinary.uploader.upload(
-            file.file,
-            folder="contacts_api/avatars",
-            public_id=f"user_{user_id}",
-            overwrite=True,
-            format="jpg",
-            width=300,
-            height=300,
-            crop="fill"
-        )
-        return result.get('secure_url')
+        return await run_in_threadpool(get_storage().save, avatar_key(user_id, avatar_hash, AVATAR_SIZE), avatar)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка завантаження: {str(e)}")
 
 
+def generate_avatar_variants(bind: Engine, user_id: int, data: bytes, avatar_hash: str, previous_hash: Optional[str]):
+    """Фонова задача: згенерувати мініатюри, зберегти їх URL та прибрати старі варіанти"""
+    storage = get_storage()
+    variants = {}
+    for size in AVATAR_VARIANT_SIZES:
+        key = avatar_key(user_id, avatar_hash, size)
+        variants[str(size)] = storage.save(key, prepare_avatar(data, size))
+    with Session(bind=bind) as db:
+        is_current = crud.add_avatar_variants(db, user_id, avatar_hash, variants)
+    if not is_current:
+        # Поки генерувалися мініатюри, користувач завантажив інший аватар
+        delete_avatar_variants(user_id, avatar_hash)
+    elif previous_hash is None:
+        delete_avatar(f"user_{user_id}")
+    elif previous_hash != avatar_hash:
+        delete_avatar_variants(user_id, previous_hash)
+
+
 def delete_avatar(public_id: str):
     """Видалення аватара"""
     try:
-        cloudinary.uploader.destroy(public_id)
+        get_storage().delete(public_id)
     except Exception:
         pass
+
+
+def delete_avatar_variants(user_id: int, avatar_hash: str):
+    """Видалення всіх варіантів розмірів аватара"""
+    for size in (AVATAR_SIZE, *AVATAR_VARIANT_SIZES):
+        delete_avatar(avatar_key(user_id, avatar_hash, size))
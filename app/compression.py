@@ -0,0 +1,281 @@
+"""
+Стиснення відповідей з узгодженням Content-Encoding.
+
+Кодування обирається за заголовком Accept-Encoding (з урахуванням q) серед
+доступних: zstd (пакет zstandard), br (brotli) та gzip (стандартна
+бібліотека); за рівних q перевага в такому ж порядку. Звичайні відповіді
+стискаються, якщо тіло не менше COMPRESSION_MIN_SIZE байт; великі - у
+threadpool, щоб не блокувати event loop. StreamingResponse стискається
+частинами з flush після кожної, тож клієнт отримує дані без затримки;
+text/event-stream не стискається взагалі.
+
+Стиснені копії тіл зберігаються в LRU-кеші (COMPRESSION_CACHE_BYTES) за
+хешем тіла, тому повторні однакові відповіді (та сама сторінка контактів)
+не стискаються знову - хеш значно дешевший за стиснення.
+"""
+import gzip
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .metrics import REGISTRY
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", str(32 * 1024 * 1024)))
+# Тіла, більші за цей розмір, стискаються в threadpool
+COMPRESSION_THREAD_SIZE = 64 * 1024
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+NOT_COMPRESSIBLE_TYPES = ("text/event-stream",)
+
+compressed_responses_total = REGISTRY.counter(
+    "http_compressed_responses_total",
+    "Стиснені відповіді за кодуванням та результатом кешу",
+    ("encoding", "cache"),
+)
+
+
+class StreamCompressor:
+    """Потокове стиснення: кожна частина одразу flush'иться клієнту"""
+
+    def __init__(self, compress: Callable[[bytes], bytes], flush: Callable[[], bytes], finish: Callable[[], bytes]):
+        self._compress = compress
+        self._flush = flush
+        self._finish = finish
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compress(chunk) + self._flush()
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class Codec(NamedTuple):
+    name: str
+    compress: Callable[[bytes], bytes]
+    stream: Callable[[], StreamCompressor]
+
+
+def _gzip_codec(level: int) -> Codec:
+    def stream() -> StreamCompressor:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return StreamCompressor(compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush)
+
+    return Codec("gzip", lambda data: gzip.compress(data, compresslevel=level, mtime=0), stream)
+
+
+def _brotli_codec() -> Optional[Codec]:
+    try:
+        import brotli
+    except ImportError:
+        return None
+
+    def stream() -> StreamCompressor:
+        compressor = brotli.Compressor(quality=4)
+        return StreamCompressor(compressor.process, compressor.flush, compressor.finish)
+
+    return Codec("br", lambda data: brotli.compress(data, quality=4), stream)
+
+
+def _zstd_codec() -> Optional[Codec]:
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    compressor = zstandard.ZstdCompressor(level=3)
+
+    def stream() -> StreamCompressor:
+        streaming = zstandard.ZstdCompressor(level=3).compressobj()
+        return StreamCompressor(
+            streaming.compress, lambda: streaming.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), streaming.flush
+        )
+
+    return Codec("zstd", compressor.compress, stream)
+
+
+def available_codecs(gzip_level: int = COMPRESSION_GZIP_LEVEL) -> List[Codec]:
+    """Доступні кодеки в порядку переваги сервера"""
+    codecs = [_zstd_codec(), _brotli_codec(), _gzip_codec(gzip_level)]
+    return [codec for codec in codecs if codec is not None]
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """Кодування з Accept-Encoding та їхні q (нерозпізнані q вважаються 0)"""
+    weights = {}
+    for part in value.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    return weights
+
+
+def negotiate(accept_encoding: str, codecs: List[Codec]) -> Optional[Codec]:
+    """Кодек з найбільшим q; за рівних - перший у порядку переваги сервера"""
+    weights = parse_accept_encoding(accept_encoding)
+    best, best_q = None, 0.0
+    for codec in codecs:
+        q = weights.get(codec.name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = codec, q
+    return best
+
+
+class CompressedCache:
+    """LRU стиснених тіл за (кодування, хеш тіла), обмежений сумарним розміром"""
+
+    def __init__(self, max_bytes: int = COMPRESSION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple[str, bytes], value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+def is_compressible(headers: Headers, status: int) -> bool:
+    """Чи варто стискати відповідь з такими заголовками та статусом"""
+    if status < 200 or status in (204, 304) or "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    if content_type.startswith(NOT_COMPRESSIBLE_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """ASGI middleware стиснення відповідей з кешем стиснених тіл"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        min_size: int = COMPRESSION_MIN_SIZE,
+        codecs: Optional[List[Codec]] = None,
+        cache: Optional[CompressedCache] = None,
+    ):
+        self.app = app
+        self.min_size = min_size
+        self.codecs = codecs if codecs is not None else available_codecs()
+        self.cache = cache if cache is not None else CompressedCache()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        codec = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.codecs)
+        if codec is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, codec, send)
+        await self.app(scope, receive, responder.send)
+
+    def compress(self, codec: Codec, body: bytes) -> Tuple[bytes, bool]:
+        """Стиснене тіло та чи взято його з кешу"""
+        key = (codec.name, hashlib.blake2b(body, digest_size=16).digest())
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, True
+        compressed = codec.compress(body)
+        self.cache.put(key, compressed)
+        return compressed, False
+
+
+class _CompressionResponder:
+    """Стан однієї відповіді: затримує http.response.start до першої частини тіла"""
+
+    def __init__(self, middleware: CompressionMiddleware, codec: Codec, send: Send):
+        self.middleware = middleware
+        self.codec = codec
+        self._send = send
+        self.start: Optional[Message] = None
+        self.mode: Optional[str] = None
+        self.stream: Optional[StreamCompressor] = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.mode == "identity":
+            await self._send(message)
+            return
+        if self.mode == "stream":
+            await self._send_stream_chunk(message)
+            return
+
+        headers = MutableHeaders(scope=self.start)
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not is_compressible(headers, self.start["status"]):
+            self.mode = "identity"
+        elif not more_body and len(body) < self.middleware.min_size:
+            self.mode = "identity"
+            headers.add_vary_header("Accept-Encoding")
+        if self.mode == "identity":
+            await self._send(self.start)
+            await self._send(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")
+        headers["Content-Encoding"] = self.codec.name
+        if more_body:
+            self.mode = "stream"
+            self.stream = self.codec.stream()
+            del headers["Content-Length"]
+            compressed_responses_total.inc(encoding=self.codec.name, cache="stream")
+            await self._send(self.start)
+            await self._send_stream_chunk(message)
+            return
+
+        if len(body) >= COMPRESSION_THREAD_SIZE:
+            compressed, hit = await run_in_threadpool(self.middleware.compress, self.codec, body)
+        else:
+            compressed, hit = self.middleware.compress(self.codec, body)
+        compressed_responses_total.inc(encoding=self.codec.name, cache="hit" if hit else "miss")
+        headers["Content-Length"] = str(len(compressed))
+        self.mode = "identity"
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+    async def _send_stream_chunk(self, message: Message) -> None:
+        more_body = message.get("more_body", False)
+        body = self.stream.compress(message.get("body", b""))
+        if not more_body:
+            body += self.stream.finish()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
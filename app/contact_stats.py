@@ -0,0 +1,223 @@
+"""
+Статистика контактів користувача, що підтримується інкрементально.
+
+Таблиця contact_stats зберігає лічильники (owner_id, вимір, ключ): загальна
+кількість, місяць народження, домен email та наявність additional_info.
+Слухачі сесії SQLAlchemy перетворюють кожне створення, зміну та видалення
+контакту (зокрема bulk insert/update/delete через `session.execute`) на
+дельти лічильників і записують їх upsert'ом у тій самій транзакції. Запис
+через Core в обхід сесії (наприклад, scripts/seed_data.py) потребує
+`rebuild_contact_stats`.
+"""
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, event, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction
+from .models import Contact, ContactStat
+
+TRACKED_FIELDS = ("owner_id", "birthday", "email", "additional_info")
+StatKey = Tuple[int, str, str]
+Values = Tuple[Optional[int], Optional[date], Optional[str], Optional[str]]
+
+_PENDING = "contact_stats_deltas"
+_ID_CHUNK = 500
+
+
+def email_domain(email: str) -> str:
+    return email.split("@", 1)[-1].lower()[:100]
+
+
+def contact_keys(values: Values) -> List[StatKey]:
+    """Лічильники, до яких належить контакт з такими значеннями полів"""
+    owner_id, birthday, email, additional_info = values
+    if owner_id is None:
+        return []
+    if isinstance(birthday, str):
+        birthday = date.fromisoformat(birthday)
+    keys = [(owner_id, "total", "")]
+    if birthday is not None:
+        keys.append((owner_id, "birth_month", str(birthday.month)))
+    if email:
+        keys.append((owner_id, "email_domain", email_domain(email)))
+    keys.append((owner_id, "additional_info", "with" if additional_info else "without"))
+    return keys
+
+
+def _add(deltas: Counter, values: Values, sign: int) -> None:
+    for key in contact_keys(values):
+        deltas[key] += sign
+
+
+def apply_deltas(connection: Connection, deltas: Dict[StatKey, int]) -> None:
+    """Додати дельти до лічильників одним upsert (SQLite та PostgreSQL)"""
+    rows = [
+        {"owner_id": owner_id, "dimension": dimension, "key": key, "count": count}
+        for (owner_id, dimension, key), count in sorted(deltas.items())
+        if count
+    ]
+    if not rows:
+        return
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    table = ContactStat.__table__
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.owner_id, table.c.dimension, table.c.key],
+        set_={"count": table.c.count + statement.excluded["count"]},
+    )
+    # Рядки відсортовані, тож паралельні транзакції блокують їх в одному порядку
+    connection.execute(statement, rows)
+
+
+def _current_values(contact: Contact) -> Values:
+    return tuple(getattr(contact, field) for field in TRACKED_FIELDS)
+
+
+def _previous_values(contact: Contact) -> Values:
+    state = inspect(contact)
+    values = []
+    for field in TRACKED_FIELDS:
+        history = state.attrs[field].history
+        values.append(history.deleted[0] if history.deleted else getattr(contact, field))
+    return tuple(values)
+
+
+@event.listens_for(Session, "before_flush")
+def _record_deletes(session: Session, flush_context: UOWTransaction, instances) -> None:
+    # Значення видалених контактів читаються до flush, поки рядок ще існує
+    deltas = session.info.setdefault(_PENDING, Counter())
+    recorded = session.info.setdefault(_PENDING + "_deleted", set())
+    for obj in session.deleted:
+        if isinstance(obj, Contact):
+            _add(deltas, _previous_values(obj), -1)
+            recorded.add(id(obj))
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_flush_deltas(session: Session, flush_context: UOWTransaction) -> None:
+    deltas = session.info.pop(_PENDING, Counter())
+    recorded = session.info.pop(_PENDING + "_deleted", set())
+    for obj in session.new:
+        if isinstance(obj, Contact):
+            _add(deltas, _current_values(obj), +1)
+    for obj in session.dirty:
+        if isinstance(obj, Contact) and obj not in session.deleted:
+            previous, current = _previous_values(obj), _current_values(obj)
+            if previous != current:
+                _add(deltas, previous, -1)
+                _add(deltas, current, +1)
+    for obj in session.deleted:
+        # Каскадні видалення потрапляють у session.deleted вже під час flush
+        if isinstance(obj, Contact) and id(obj) not in recorded:
+            _add(deltas, _previous_values(obj), -1)
+    apply_deltas(session.connection(), deltas)
+
+
+def _select_values(session: Session, where) -> List[tuple]:
+    columns = [Contact.id] + [getattr(Contact, field) for field in TRACKED_FIELDS]
+    return session.execute(select(*columns).where(where)).all()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_statements(state: ORMExecuteState):
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return None
+    mapper = state.bind_mapper
+    if mapper is None or mapper.class_ is not Contact:
+        return None
+
+    session = state.session
+    deltas: Counter = Counter()
+    if state.is_insert:
+        parameters = state.parameters
+        rows = parameters if isinstance(parameters, list) else [parameters or {}]
+        rows = rows if rows and rows[0] else [state.statement.compile().params]
+        result = state.invoke_statement()
+        for row in rows:
+            _add(deltas, tuple(row.get(field) for field in TRACKED_FIELDS), +1)
+        apply_deltas(session.connection(), deltas)
+        return result
+
+    where = state.statement.whereclause
+    before = _select_values(session, where if where is not None else Contact.id.isnot(None))
+    result = state.invoke_statement()
+    for row in before:
+        _add(deltas, tuple(row[1:]), -1)
+    if state.is_update:
+        ids = [row[0] for row in before]
+        for start in range(0, len(ids), _ID_CHUNK):
+            for row in _select_values(session, Contact.id.in_(ids[start:start + _ID_CHUNK])):
+                _add(deltas, tuple(row[1:]), +1)
+    apply_deltas(session.connection(), deltas)
+    return result
+
+
+def get_user_stats(db: Session, owner_id: int, top_domains: int = 20) -> dict:
+    """Статистика користувача з таблиці лічильників (без сканування контактів)"""
+    rows = db.execute(
+        select(ContactStat.dimension, ContactStat.key, ContactStat.count)
+        .where(ContactStat.owner_id == owner_id, ContactStat.count > 0)
+    ).all()
+    by_dimension: Dict[str, Dict[str, int]] = {}
+    for dimension, key, count in rows:
+        by_dimension.setdefault(dimension, {})[key] = count
+    domains = sorted(by_dimension.get("email_domain", {}).items(), key=lambda item: (-item[1], item[0]))
+    months = by_dimension.get("birth_month", {})
+    info = by_dimension.get("additional_info", {})
+    return {
+        "total": by_dimension.get("total", {}).get("", 0),
+        "by_birth_month": {month: months.get(str(month), 0) for month in range(1, 13)},
+        "by_email_domain": dict(domains[:top_domains]),
+        "with_additional_info": info.get("with", 0),
+        "without_additional_info": info.get("without", 0),
+    }
+
+
+def compute_stats(connection: Connection, owner_ids: Optional[Iterable[int]] = None) -> Counter:
+    """Порахувати лічильники з нуля потоковим читанням контактів"""
+    columns = [getattr(Contact, field) for field in TRACKED_FIELDS]
+    query = select(*columns)
+    if owner_ids is not None:
+        query = query.where(Contact.owner_id.in_(list(owner_ids)))
+    counts: Counter = Counter()
+    result = connection.execution_options(yield_per=10_000).execute(query)
+    for row in result:
+        _add(counts, tuple(row), +1)
+    return counts
+
+
+def stored_stats(connection: Connection, owner_ids: Optional[Iterable[int]] = None) -> Counter:
+    query = select(ContactStat.owner_id, ContactStat.dimension, ContactStat.key, ContactStat.count).where(
+        ContactStat.count != 0
+    )
+    if owner_ids is not None:
+        query = query.where(ContactStat.owner_id.in_(list(owner_ids)))
+    return Counter({(owner_id, dimension, key): count for owner_id, dimension, key, count in connection.execute(query)})
+
+
+def verify_contact_stats(connection: Connection, owner_ids: Optional[Iterable[int]] = None) -> Dict[StatKey, Tuple[int, int]]:
+    """Розбіжності {ключ: (збережено, фактично)} між таблицею та контактами"""
+    owner_ids = list(owner_ids) if owner_ids is not None else None
+    expected = compute_stats(connection, owner_ids)
+    stored = stored_stats(connection, owner_ids)
+    return {
+        key: (stored.get(key, 0), expected.get(key, 0))
+        for key in set(expected) | set(stored)
+        if stored.get(key, 0) != expected.get(key, 0)
+    }
+
+
+def rebuild_contact_stats(connection: Connection, owner_ids: Optional[Iterable[int]] = None) -> int:
+    """Перерахувати лічильники з нуля; повертає кількість записаних рядків"""
+    owner_ids = list(owner_ids) if owner_ids is not None else None
+    counts = compute_stats(connection, owner_ids)
+    statement = delete(ContactStat)
+    if owner_ids is not None:
+        statement = statement.where(ContactStat.owner_id.in_(owner_ids))
+    connection.execute(statement)
+    apply_deltas(connection, counts)
+    return len(counts)
@@ -2,11 +2,12 @@
 CRUD операції для роботи з контактами та користувачами
 """
 from datetime import date, timedelta, datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, extract
+from sqlalchemy import or_, and_, extract, select
+from sqlalchemy.exc import IntegrityError
 from . import models, schemas
-from .auth import get_password_hash, verify_password, generate_verification_token
+from .auth import verify_password, generate_verification_token
 
 
 # User CRUD операції
@@ -21,9 +22,16 @@ def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.username == username).first()
 
 
-def create_user(db: Session, user: schemas.UserCreate) -> models.User:
-    """Створити нового користувача"""
-    hashed_password = get_password_hash(user.password)
+def register_user(db: Session, user: schemas.UserCreate, hashed_password: str) -> Tuple[models.User, str]:
+    """
+    Створити користувача та токен верифікації однією транзакцією.
+
+    Обидва INSERT виконуються одним flush (id та created_at повертає
+    RETURNING), а користувач від'єднується від сесії до commit, тож його
+    атрибути не застарівають і повторний SELECT не потрібен. Дублікати email
+    та username виявляють унікальні обмеження: IntegrityError передається
+    викликачу.
+    """
     db_user = models.User(
         username=user.username,
         email=user.email,
@@ -31,10 +39,19 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
         last_name=user.last_name,
         hashed_password=hashed_password,
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    token = generate_verification_token()
+    verification = models.EmailVerification(
+        user=db_user, token=token, expires_at=datetime.utcnow() + timedelta(hours=24)
+    )
+    db.add_all([db_user, verification])
+    try:
+        db.flush()
+        db.expunge(db_user)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
+    return db_user, token
 
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[models.User]:
@@ -55,6 +72,26 @@ def update_user(db: Session, user: models.User, user_update: schemas.UserUpdate)
     return user
 
 
+def set_user_avatar(db: Session, user: models.User, avatar_url: str, avatar_hash: str, variants: dict) -> models.User:
+    """Встановити новий аватар користувача (решта варіантів розмірів додається пізніше)"""
+    user.avatar_url = avatar_url
+    user.avatar_hash = avatar_hash
+    user.avatar_variants = variants
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def add_avatar_variants(db: Session, user_id: int, avatar_hash: str, variants: dict) -> bool:
+    """Додати URL варіантів аватара, якщо аватар не змінився за час їх генерації"""
+    user = db.query(models.User).filter(models.User.id == user_id, models.User.avatar_hash == avatar_hash).first()
+    if user is None:
+        return False
+    user.avatar_variants = {**(user.avatar_variants or {}), **variants}
+    db.commit()
+    return True
+
+
 def create_verification_token(db: Session, user_id: int) -> str:
     """Створити токен верифікації"""
     token = generate_verification_token()
@@ -102,6 +139,55 @@ def get_user_contact(db: Session, user_id: int, contact_id: int) -> Optional[mod
     return db.query(models.Contact).filter(models.Contact.id == contact_id, models.Contact.owner_id == user_id).first()
 
 
+def get_user_contacts_by_ids(db: Session, user_id: int, contact_ids: List[int]) -> List[models.Contact]:
+    """Контакти користувача за списком ID одним запитом (порядок не гарантовано)"""
+    if not contact_ids:
+        return []
+    return db.query(models.Contact).filter(
+        models.Contact.owner_id == user_id, models.Contact.id.in_(contact_ids)
+    ).all()
+
+
+def get_user_contacts_by_phone(db: Session, user_id: int, phone_e164: str) -> List[models.Contact]:
+    """Контакти користувача з номером у форматі E.164 (індекс owner_id, phone_e164)"""
+    return db.query(models.Contact).filter(
+        models.Contact.owner_id == user_id, models.Contact.phone_e164 == phone_e164
+    ).all()
+
+
+def autocomplete_user_contacts(db: Session, user_id: int, q: str, limit: int = 10) -> List[Tuple[int, str, str, str]]:
+    """
+    Контакти, ім'я, прізвище або email яких починається з `q` (id, ім'я,
+    прізвище, email). Кожна колонка - окремий діапазон в індексі
+    (owner_id, *_lower), тож час не залежить від розміру книги. Для запиту
+    з двох слів ("олена ков") друге слово - префікс іншої частини імені.
+    """
+    tokens = q.lower().split()
+    if not tokens:
+        return []
+    head, rest = tokens[0], " ".join(tokens[1:])
+    upper = head[:-1] + chr(ord(head[-1]) + 1)
+    contact = models.Contact
+    columns = (
+        (contact.first_name_lower, contact.last_name_lower),
+        (contact.last_name_lower, contact.first_name_lower),
+        (contact.email_lower, None),
+    )
+    found = {}
+    for rank, (column, other) in enumerate(columns):
+        query = select(contact.id, contact.first_name, contact.last_name, contact.email).where(
+            contact.owner_id == user_id, column >= head, column < upper
+        )
+        if rest:
+            if other is None:
+                continue
+            query = query.where(other.startswith(rest, autoescape=True))
+        for row in db.execute(query.order_by(column).limit(limit)):
+            found.setdefault(row.id, (rank, tuple(row)))
+    ranked = sorted(found.values(), key=lambda item: (item[0], f"{item[1][1]} {item[1][2]}".lower()))
+    return [row for _, row in ranked[:limit]]
+
+
 def create_user_contact(db: Session, contact: schemas.ContactCreate, user_id: int) -> models.Contact:
     """Створити контакт для користувача"""
     db_contact = models.Contact(**contact.model_dump(), owner_id=user_id)
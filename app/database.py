@@ -1,13 +1,20 @@
 """
 Налаштування бази даних SQLAlchemy
 """
+import logging
 import os
-from sqlalchemy import create_engine
+import re
+import time
+from fastapi import Depends
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from sqlalchemy.orm import Session, sessionmaker
+from .batch import current_batch
+from .metrics import REGISTRY, current_query_stats
+from .timing import current_timings
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 # URL підключення до бази даних
 # За замовчуванням використовується локальна SQLite база. Для підключення до
@@ -15,8 +22,85 @@ load_dotenv()
 # `DATABASE_URL` у файлі `.env`.
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./contacts.db")
 
+# Запити, повільніші за цей поріг (мс), логуються з нормалізованим SQL
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Скільки разів один запит може виконати однакову форму SQL до попередження N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+db_statements_total = REGISTRY.counter("db_statements_total", "Кількість виконаних SQL-запитів")
+db_statement_duration_seconds = REGISTRY.histogram(
+    "db_statement_duration_seconds", "Тривалість виконання SQL-запитів"
+)
+db_slow_queries_total = REGISTRY.counter("db_slow_queries_total", "Кількість повільних SQL-запитів")
+db_n_plus_one_total = REGISTRY.counter(
+    "db_n_plus_one_total", "Запити, що повторили одну форму SQL понад поріг", ("route",)
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%\(\w+\)s|:\w+|\$\d+|%s")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalize_sql(statement: str) -> str:
+    """Форма запиту: параметри та літерали замінені на ?, списки IN згорнуті"""
+    shape = _LITERALS.sub("?", _WHITESPACE.sub(" ", statement).strip())
+    return _IN_LISTS.sub("(?...)", shape)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = current_timings()
+    if timings is not None:
+        timings.enter("db")
+    conn.info.setdefault("query_stack", []).append((time.perf_counter(), timings))
+
+
+def _finish_statement(conn, statement: str) -> None:
+    stack = conn.info.get("query_stack")
+    if not stack:
+        return
+    started, timings = stack.pop()
+    elapsed = time.perf_counter() - started
+    if timings is not None:
+        timings.exit()
+    db_statements_total.inc()
+    db_statement_duration_seconds.observe(elapsed)
+
+    shape = None
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        shape = normalize_sql(statement)
+        db_slow_queries_total.inc()
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, shape)
+    stats = current_query_stats()
+    if stats is not None:
+        shape = shape or normalize_sql(statement)
+        if stats.record(shape) == N_PLUS_ONE_THRESHOLD + 1:
+            db_n_plus_one_total.inc(route=stats.route)
+            logger.warning(
+                "Possible N+1 on %s %s: statement executed more than %d times: %s",
+                stats.scope["method"], stats.route, N_PLUS_ONE_THRESHOLD, shape,
+            )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish_statement(conn, statement)
+
+
+def _handle_error(exception_context):
+    if exception_context.connection is not None:
+        _finish_statement(exception_context.connection, exception_context.statement or "")
+
+
+def instrument_engine(target: Engine) -> None:
+    """Підключити хуки інструментування SQL до engine"""
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        event.listen(target, "handle_error", _handle_error)
+
+
 # Створення engine для підключення до БД
 engine = create_engine(DATABASE_URL)
+instrument_engine(engine)
 
 # Створення сесії для роботи з БД
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -24,12 +108,36 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Базовий клас для всіх моделей
 Base = declarative_base()
 
-def get_db():
+def get_session():
     """
-    Залежність для отримання сесії бази даних
+    Залежність для отримання нової сесії бази даних (у тестах перевизначається)
     """
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_db(session: Session = Depends(get_session)) -> Session:
+    """
+    Сесія бази даних для endpoint'ів: у підзапитах пакета - спільна сесія пакета
+    """
+    batch = current_batch()
+    return batch.db if batch is not None else session
+
+
+def warm_up_pool(size: int) -> int:
+    """
+    Заздалегідь відкрити `size` з'єднань пулу, щоб перші запити не платили за підключення
+    """
+    connections = []
+    try:
+        for _ in range(size):
+            connection = engine.connect()
+            connection.exec_driver_sql("SELECT 1")
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
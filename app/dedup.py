@@ -0,0 +1,360 @@
+"""
+Пошук майже-дублікатів контактів та їх об'єднання.
+
+Попарне порівняння всіх контактів користувача - O(n²), тому кандидати
+шукаються блокуванням: кожен контакт потрапляє в блоки за нормалізованим
+ім'ям, номером телефону та локальною частиною email, і порівнюються лише
+контакти в межах одного блоку. Блоки, більші за DEDUP_MAX_BLOCK (наприклад,
+"олена коваленко" у великій книзі), пропускаються, тож час роботи лишається
+майже лінійним. Пари з оцінкою подібності не нижче DEDUP_THRESHOLD
+об'єднуються в групи.
+
+Результат кешується на DEDUP_CACHE_TTL секунд у спільному пулі Redis, тож
+його бачать усі воркери (поки circuit breaker Redis розімкнено - у пам'яті
+воркера). Кеш власника скидається після commit будь-якої сесії, що створила,
+змінила або видалила його контакти. Для великих книг (понад DEDUP_SYNC_LIMIT
+контактів) пошук виконується фоновою задачею, а endpoint повертає
+попередній результат або статус "pending".
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from datetime import date
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from .models import Contact
+from .redis_client import RedisManager, redis_manager
+
+logger = logging.getLogger(__name__)
+
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.6"))
+DEDUP_MAX_BLOCK = int(os.getenv("DEDUP_MAX_BLOCK", "50"))
+DEDUP_CACHE_TTL = float(os.getenv("DEDUP_CACHE_TTL", "300"))
+DEDUP_SYNC_LIMIT = int(os.getenv("DEDUP_SYNC_LIMIT", "5000"))
+# Застарілий звіт лишається в Redis, щоб віддавати його, поки рахується новий
+DEDUP_REPORT_KEEP = 24 * 3600
+# Скільки тримається позначка "пошук виконується", якщо воркер впав посеред пошуку
+DEDUP_RUNNING_TTL = 600
+
+_PENDING_OWNERS = "dedup_owners"
+
+# Значущих цифр телефону: +380501234567, 0501234567 та 50 123 45 67 збігаються
+PHONE_DIGITS = 9
+# Обмеження schemas.ContactBase.additional_info
+ADDITIONAL_INFO_MAX = 500
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+class ContactRow(NamedTuple):
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    phone: str
+    birthday: Optional[date]
+
+
+class DuplicateGroup(NamedTuple):
+    contact_ids: List[int]
+    score: float
+    reasons: List[str]
+
+
+def normalize_name(first_name: str, last_name: str) -> str:
+    """Ім'я без регістру, діакритики та розділових знаків; порядок слів не важливий"""
+    text = unicodedata.normalize("NFKD", f"{first_name} {last_name}".casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(sorted(_NON_WORD.sub(" ", text).split()))
+
+
+def normalize_phone(phone: str) -> str:
+    digits = "".join(char for char in phone if char.isdigit())
+    return digits[-PHONE_DIGITS:] if len(digits) >= PHONE_DIGITS else ""
+
+
+def email_local_part(email: str) -> str:
+    """Локальна частина email без регістру та суфікса +tag"""
+    local = email.split("@", 1)[0].casefold()
+    return local.split("+", 1)[0]
+
+
+def blocking_keys(row: ContactRow) -> List[Tuple[str, str]]:
+    keys = []
+    name = normalize_name(row.first_name, row.last_name)
+    if name:
+        keys.append(("name", name))
+    phone = normalize_phone(row.phone)
+    if phone:
+        keys.append(("phone", phone))
+    local = email_local_part(row.email)
+    if local:
+        keys.append(("email", local))
+    return keys
+
+
+def similarity(a: ContactRow, b: ContactRow) -> Tuple[float, List[str]]:
+    """Оцінка подібності 0..1 та причини, за якими контакти схожі"""
+    score, reasons = 0.0, []
+    if a.email.casefold() == b.email.casefold():
+        score += 0.4
+        reasons.append("email")
+    elif email_local_part(a.email) == email_local_part(b.email):
+        score += 0.2
+        reasons.append("email_local_part")
+    if normalize_phone(a.phone) and normalize_phone(a.phone) == normalize_phone(b.phone):
+        score += 0.3
+        reasons.append("phone")
+    name_a = normalize_name(a.first_name, a.last_name)
+    name_b = normalize_name(b.first_name, b.last_name)
+    name_ratio = 1.0 if name_a == name_b else SequenceMatcher(None, name_a, name_b).ratio()
+    if name_ratio >= 0.8:
+        score += 0.3 * name_ratio
+        reasons.append("name")
+    if a.birthday is not None and a.birthday == b.birthday:
+        score += 0.1
+        reasons.append("birthday")
+    return min(score, 1.0), reasons
+
+
+def find_duplicates(
+    rows: Iterable[ContactRow], threshold: float = DEDUP_THRESHOLD, max_block: int = DEDUP_MAX_BLOCK
+) -> List[DuplicateGroup]:
+    """Групи схожих контактів; порівнюються лише контакти зі спільним блоком"""
+    contacts: Dict[int, ContactRow] = {}
+    blocks: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    for row in rows:
+        contacts[row.id] = row
+        for key in blocking_keys(row):
+            blocks[key].append(row.id)
+
+    parent: Dict[int, int] = {}
+
+    def find(contact_id: int) -> int:
+        root = contact_id
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while contact_id != root:
+            parent[contact_id], contact_id = root, parent[contact_id]
+        return root
+
+    compared = set()
+    pair_scores: Dict[Tuple[int, int], Tuple[float, List[str]]] = {}
+    for ids in blocks.values():
+        if len(ids) < 2 or len(ids) > max_block:
+            continue
+        for i, first in enumerate(ids):
+            for second in ids[i + 1:]:
+                pair = (first, second) if first < second else (second, first)
+                if pair in compared:
+                    continue
+                compared.add(pair)
+                score, reasons = similarity(contacts[first], contacts[second])
+                if score >= threshold:
+                    pair_scores[pair] = (score, reasons)
+                    parent[find(pair[1])] = find(pair[0])
+
+    groups: Dict[int, dict] = {}
+    for (first, second), (score, reasons) in pair_scores.items():
+        group = groups.setdefault(find(first), {"ids": set(), "score": 0.0, "reasons": set()})
+        group["ids"].update((first, second))
+        group["score"] = max(group["score"], score)
+        group["reasons"].update(reasons)
+    result = [
+        DuplicateGroup(sorted(group["ids"]), round(group["score"], 3), sorted(group["reasons"]))
+        for group in groups.values()
+    ]
+    result.sort(key=lambda group: (-group.score, group.contact_ids[0]))
+    return result
+
+
+def load_rows(db: Session, owner_id: int) -> Iterable[ContactRow]:
+    """Потокове читання лише потрібних колонок контактів користувача"""
+    query = select(
+        Contact.id, Contact.first_name, Contact.last_name, Contact.email, Contact.phone, Contact.birthday
+    ).where(Contact.owner_id == owner_id)
+    for row in db.execute(query.execution_options(yield_per=10_000)):
+        yield ContactRow(*row)
+
+
+class DuplicateReport(NamedTuple):
+    groups: List[DuplicateGroup]
+    computed_at: float
+
+
+def _dump_report(report: DuplicateReport) -> str:
+    return json.dumps({"groups": report.groups, "computed_at": report.computed_at})
+
+
+def _load_report(raw) -> DuplicateReport:
+    data = json.loads(raw)
+    return DuplicateReport([DuplicateGroup(*group) for group in data["groups"]], data["computed_at"])
+
+
+class DuplicateCache:
+    """Звіти пошуку дублікатів у Redis (спільні для воркерів) або в пам'яті воркера"""
+
+    def __init__(self, redis: Optional[RedisManager] = None, ttl: float = DEDUP_CACHE_TTL, prefix: str = "dedup:"):
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+        self._reports: Dict[int, DuplicateReport] = {}
+        self._running = set()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    def stop(self) -> None:
+        self._loop = None
+
+    def _use_redis(self) -> bool:
+        return self.redis is not None and self.redis.available
+
+    def _report_key(self, owner_id: int) -> str:
+        return f"{self.prefix}report:{owner_id}"
+
+    def _running_key(self, owner_id: int) -> str:
+        return f"{self.prefix}running:{owner_id}"
+
+    async def get(self, owner_id: int) -> Optional[DuplicateReport]:
+        if self._use_redis():
+            try:
+                raw = await self.redis.execute(lambda client: client.get(self._report_key(owner_id)))
+                return _load_report(raw) if raw else None
+            except Exception as e:
+                logger.warning("Duplicate cache unavailable, using local cache: %s", e)
+        return self._reports.get(owner_id)
+
+    def is_fresh(self, report: Optional[DuplicateReport]) -> bool:
+        return report is not None and time.time() - report.computed_at < self.ttl
+
+    async def claim(self, owner_id: int) -> bool:
+        """Позначити, що пошук для користувача запущено; False, якщо вже виконується"""
+        if self._use_redis():
+            try:
+                return bool(await self.redis.execute(
+                    lambda client: client.set(self._running_key(owner_id), "1", nx=True, ex=DEDUP_RUNNING_TTL)
+                ))
+            except Exception as e:
+                logger.warning("Duplicate cache unavailable, using local cache: %s", e)
+        with self._lock:
+            if owner_id in self._running:
+                return False
+            self._running.add(owner_id)
+            return True
+
+    async def store(self, owner_id: int, groups: List[DuplicateGroup]) -> DuplicateReport:
+        report = DuplicateReport(groups, time.time())
+        if self._use_redis():
+            try:
+                await self.redis.execute(
+                    lambda client: client.set(self._report_key(owner_id), _dump_report(report), ex=DEDUP_REPORT_KEEP)
+                )
+            except Exception as e:
+                logger.warning("Failed to store duplicate report: %s", e)
+        with self._lock:
+            self._reports[owner_id] = report
+        await self.release(owner_id)
+        return report
+
+    async def release(self, owner_id: int) -> None:
+        if self._use_redis():
+            try:
+                await self.redis.execute(lambda client: client.delete(self._running_key(owner_id)))
+            except Exception as e:
+                logger.warning("Failed to release duplicate search: %s", e)
+        with self._lock:
+            self._running.discard(owner_id)
+
+    def invalidate(self, owner_ids: Iterable[int]) -> None:
+        """Скинути звіти власників; безпечно викликати з будь-якого потоку"""
+        owner_ids = list(owner_ids)
+        with self._lock:
+            for owner_id in owner_ids:
+                self._reports.pop(owner_id, None)
+        if owner_ids and self._loop is not None and self.redis is not None:
+            asyncio.run_coroutine_threadsafe(self._invalidate_redis(owner_ids), self._loop)
+
+    async def _invalidate_redis(self, owner_ids: List[int]) -> None:
+        if not self._use_redis():
+            return
+        try:
+            await self.redis.execute(lambda client: client.delete(*map(self._report_key, owner_ids)))
+        except Exception as e:
+            logger.warning("Failed to invalidate duplicate reports: %s", e)
+
+    def clear(self) -> None:
+        """Очистити кеш воркера (записи в Redis живуть до закінчення TTL)"""
+        with self._lock:
+            self._reports.clear()
+            self._running.clear()
+
+
+duplicate_cache = DuplicateCache(redis_manager)
+
+
+def find_owner_duplicates(db: Session, owner_id: int) -> List[DuplicateGroup]:
+    return find_duplicates(load_rows(db, owner_id))
+
+
+def _find_in_new_session(bind: Engine, owner_id: int) -> List[DuplicateGroup]:
+    with Session(bind=bind) as db:
+        return find_owner_duplicates(db, owner_id)
+
+
+async def refresh_duplicates(bind: Engine, owner_id: int) -> Optional[DuplicateReport]:
+    """Фонова задача: знайти дублікати користувача та покласти результат у кеш"""
+    try:
+        groups = await run_in_threadpool(_find_in_new_session, bind, owner_id)
+    except Exception:
+        await duplicate_cache.release(owner_id)
+        raise
+    return await duplicate_cache.store(owner_id, groups)
+
+
+def merge_contacts(db: Session, primary: Contact, duplicates: List[Contact]) -> Contact:
+    """
+    Об'єднати дублікати в основний контакт: порожні поля заповнюються з
+    дублікатів, additional_info поєднується, дублікати видаляються
+    """
+    notes = [primary.additional_info] if primary.additional_info else []
+    for duplicate in duplicates:
+        for field in ("first_name", "last_name", "email", "phone", "birthday"):
+            if not getattr(primary, field) and getattr(duplicate, field):
+                setattr(primary, field, getattr(duplicate, field))
+        if duplicate.additional_info and duplicate.additional_info not in notes:
+            notes.append(duplicate.additional_info)
+        db.delete(duplicate)
+    if notes:
+        primary.additional_info = "\n".join(notes)[:ADDITIONAL_INFO_MAX]
+    db.commit()
+    db.refresh(primary)
+    return primary
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_owners(session: Session, flush_context) -> None:
+    owners: Set[int] = session.info.setdefault(_PENDING_OWNERS, set())
+    for objects in (session.new, session.dirty, session.deleted):
+        owners.update(obj.owner_id for obj in objects if isinstance(obj, Contact))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_owners(session: Session) -> None:
+    duplicate_cache.invalidate(session.info.pop(_PENDING_OWNERS, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_owners(session: Session) -> None:
+    session.info.pop(_PENDING_OWNERS, None)
@@ -2,30 +2,35 @@
 Сервіс для відправки email
 """
 import os
-from typing import List
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from jinja2 import Environment, FileSystemLoader
+from functools import lru_cache
 from pathlib import Path
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=os.getenv("MAIL_USERNAME", ""),
-    MAIL_PASSWORD=os.getenv("MAIL_PASSWORD", ""),
-    MAIL_FROM=os.getenv("MAIL_FROM", "noreply@contacts-api.com"),
-    MAIL_PORT=int(os.getenv("MAIL_PORT", "587")),
-    MAIL_SERVER=os.getenv("MAIL_SERVER", "smtp.gmail.com"),
-    MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME", "Contacts API"),
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates'
-)
 
-fastmail = FastMail(conf)
+@lru_cache(maxsize=1)
+def get_fastmail():
+    """Клієнт FastMail; fastapi_mail імпортується лише під час першої відправки"""
+    from fastapi_mail import ConnectionConfig, FastMail
+
+    conf = ConnectionConfig(
+        MAIL_USERNAME=os.getenv("MAIL_USERNAME", ""),
+        MAIL_PASSWORD=os.getenv("MAIL_PASSWORD", ""),
+        MAIL_FROM=os.getenv("MAIL_FROM", "noreply@contacts-api.com"),
+        MAIL_PORT=int(os.getenv("MAIL_PORT", "587")),
+        MAIL_SERVER=os.getenv("MAIL_SERVER", "smtp.gmail.com"),
+        MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME", "Contacts API"),
+        MAIL_STARTTLS=True,
+        MAIL_SSL_TLS=False,
+        USE_CREDENTIALS=True,
+        VALIDATE_CERTS=True,
+        TEMPLATE_FOLDER=Path(__file__).parent / 'templates'
+    )
+    return FastMail(conf)
 
 
 async def send_verification_email(email: str, verification_token: str, base_url: str):
     """Відправка email для верифікації"""
+    from fastapi_mail import MessageSchema, MessageType
+
     verification_url = f"{base_url}/api/v1/auth/verify-email?token={verification_token}"
     html_content = f"""
     <!DOCTYPE html>
@@ -58,4 +63,4 @@ async def send_verification_email(email: str, verification_token: str, base_url:
         subtype=MessageType.html
     )
 
-    await fastmail.send_message(message)
+    await get_fastmail().send_message(message)
@@ -0,0 +1,220 @@
+"""
+Сповіщення про зміни контактів для SSE-потоку GET /contacts/events.
+
+Слухачі сесії SQLAlchemy збирають створені, змінені та видалені контакти під
+час flush і публікують події лише після успішного commit (відкочені зміни
+нікуди не потрапляють), тож події йдуть з усіх шляхів запису через ORM:
+endpoint'ів, /batch та merge. Bulk-оператори (`session.execute(update(...))`)
+подій не генерують.
+
+Брокер розсилає події підписникам поточного процесу. Якщо EVENTS_REDIS
+увімкнено і Redis доступний, події публікуються в канал Redis pub/sub, на
+який підписаний кожен воркер, тож клієнт отримує зміни, зроблені через будь-
+який воркер; інакше доставка лишається локальною. Кожен підписник має чергу
+на EVENTS_QUEUE_SIZE подій: повільний клієнт, що не встигає її вичитувати,
+отримує подію `resync` і від'єднується - після перепідключення він має
+заново завантажити список контактів.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .models import Contact
+from .redis_client import RedisManager, redis_manager
+
+logger = logging.getLogger(__name__)
+
+EVENTS_REDIS = os.getenv("EVENTS_REDIS", "true").lower() == "true"
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "contacts:events")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+
+_PENDING = "contact_events"
+RESYNC = {"type": "resync"}
+_CLOSE = {"type": "close"}
+
+
+class Subscriber:
+    """Черга подій одного клієнта"""
+
+    def __init__(self, owner_id: int, maxsize: int = EVENTS_QUEUE_SIZE):
+        self.owner_id = owner_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def offer(self, item: dict) -> None:
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Клієнт не встигає: замість подій, що не влазять, - одна resync і від'єднання
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class EventBroker:
+    """Розсилка подій підписникам процесу та (опційно) між воркерами через Redis"""
+
+    def __init__(self, redis: Optional[RedisManager] = None, channel: str = EVENTS_CHANNEL):
+        self.redis = redis
+        self.channel = channel
+        self.subscribers: Dict[int, Set[Subscriber]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._subscribed = False
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        if self.redis is not None and self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Від'єднати всіх клієнтів та зупинити підписку на Redis"""
+        self.disconnect_all()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+    def subscribe(self, owner_id: int) -> Subscriber:
+        subscriber = Subscriber(owner_id)
+        self.subscribers.setdefault(owner_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscribers = self.subscribers.get(subscriber.owner_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[subscriber.owner_id]
+
+    def disconnect_all(self) -> None:
+        for subscribers in self.subscribers.values():
+            for subscriber in subscribers:
+                subscriber.dropped = False
+                subscriber.offer(_CLOSE)
+
+    def publish(self, events: List[dict]) -> None:
+        """Опублікувати події; безпечно викликати з будь-якого потоку"""
+        if self._loop is None or not events:
+            return
+        self._loop.call_soon_threadsafe(self._publish_in_loop, events)
+
+    def _publish_in_loop(self, events: List[dict]) -> None:
+        if self.redis is not None and self._subscribed and self.redis.available:
+            asyncio.create_task(self._publish_redis(events))
+        else:
+            self.deliver(events)
+
+    async def _publish_redis(self, events: List[dict]) -> None:
+        payload = json.dumps(events)
+        try:
+            await self.redis.execute(lambda client: client.publish(self.channel, payload))
+        except Exception as e:
+            logger.warning("Publishing contact events to Redis failed, delivering locally: %s", e)
+            self.deliver(events)
+
+    def deliver(self, events: List[dict]) -> None:
+        """Передати події підписникам власників цих контактів у поточному процесі"""
+        for item in events:
+            for subscriber in list(self.subscribers.get(item["owner_id"], ())):
+                subscriber.offer(item)
+
+    async def _listen(self) -> None:
+        while True:
+            if not self.redis.available:
+                await asyncio.sleep(self.redis.recovery_timeout)
+                continue
+            pubsub = self.redis.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                self._subscribed = True
+                while True:
+                    message = await pubsub.get_message(timeout=0.5)
+                    if message is not None:
+                        self.deliver(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.redis.record_failure(e)
+                logger.warning("Contact events subscription lost: %s", e)
+            finally:
+                self._subscribed = False
+                await pubsub.aclose()
+            await asyncio.sleep(1)
+
+
+broker = EventBroker(redis_manager if EVENTS_REDIS else None)
+
+
+def _snapshot(contact: Contact) -> dict:
+    from .schemas import Contact as ContactSchema
+
+    return ContactSchema.model_validate(contact).model_dump(mode="json")
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING, [])
+    now = time.time()
+    for kind, objects in (("created", session.new), ("updated", session.dirty), ("deleted", session.deleted)):
+        for obj in objects:
+            if not isinstance(obj, Contact):
+                continue
+            if kind == "updated" and (obj in session.deleted or not session.is_modified(obj)):
+                continue
+            pending.append({
+                "type": kind,
+                "contact_id": obj.id,
+                "owner_id": obj.owner_id,
+                "contact": None if kind == "deleted" else _snapshot(obj),
+                "ts": now,
+            })
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session: Session) -> None:
+    broker.publish(session.info.pop(_PENDING, []))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_events(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def format_event(item: dict, event_id: int) -> str:
+    """Подія у форматі text/event-stream"""
+    payload = {key: value for key, value in item.items() if key != "type"}
+    return f"id: {event_id}\nevent: {item['type']}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+async def event_stream(subscriber: Subscriber, heartbeat: float = EVENTS_HEARTBEAT):
+    """SSE-потік підписника з коментарями keep-alive; завершується на resync або зупинці"""
+    event_id = 0
+    try:
+        yield "retry: 3000\n: connected\n\n"
+        while True:
+            try:
+                item = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is _CLOSE:
+                return
+            event_id += 1
+            yield format_event(item, event_id)
+            if item is RESYNC:
+                return
+    finally:
+        broker.unsubscribe(subscriber)
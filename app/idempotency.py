@@ -0,0 +1,306 @@
+"""
+Ідемпотентні повтори запитів на запис за заголовком Idempotency-Key.
+
+Для POST, PUT та DELETE з заголовком Idempotency-Key перша відповідь (крім
+5xx) зберігається на IDEMPOTENCY_TTL секунд, а повтор з тим самим ключем
+отримує її без виконання endpoint'а (з заголовком Idempotent-Replayed:
+true). Ключ прив'язаний до користувача (заголовок Authorization або IP),
+методу та шляху; повтор з іншим тілом запиту відхиляється з 422. Якщо
+перший запит ще виконується, дублікати чекають на його відповідь до
+IDEMPOTENCY_WAIT секунд, після чого отримують 409.
+
+Тіла multipart/form-data (завантаження аватара) не буферизуються: вони
+передаються endpoint'у потоком, як і без ключа, тож обмеження розміру
+endpoint'а та раннє відхилення завеликих файлів працюють як завжди. Для
+таких запитів відбиток містить лише рядок запиту і тип вмісту без
+boundary, тому повтор з іншим файлом отримує збережену відповідь.
+
+Ключі зберігаються в Redis, тож повтор може прийти на будь-який воркер;
+поки circuit breaker Redis розімкнено, - у пам'яті воркера.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .redis_client import RedisManager, redis_manager
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_WAIT = float(os.getenv("IDEMPOTENCY_WAIT", "30"))
+IDEMPOTENCY_MAX_BODY = int(os.getenv("IDEMPOTENCY_MAX_BODY", str(1024 * 1024)))
+# Скільки тримається позначка "виконується", якщо воркер впав посеред запиту
+IDEMPOTENCY_LOCK_TTL = 60
+
+IDEMPOTENT_METHODS = ("POST", "PUT", "DELETE")
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+# Заголовки, що не зберігаються разом з відповіддю
+SKIPPED_HEADERS = (b"content-length", b"date", b"server-timing")
+
+PENDING = "pending"
+DONE = "done"
+
+
+class IdempotencyStore:
+    """Записи ключів: {"state", "fingerprint", "response"} у Redis або пам'яті воркера"""
+
+    def __init__(self, redis: Optional[RedisManager] = None, prefix: str = "idempotency:"):
+        self.redis = redis
+        self.prefix = prefix
+        self._local: Dict[str, Tuple[float, dict]] = {}
+        self._events: Dict[str, asyncio.Event] = {}
+
+    def _use_redis(self) -> bool:
+        return self.redis is not None and self.redis.available
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[dict]:
+        """Позначити ключ як "виконується"; None - успішно, інакше наявний запис"""
+        record = {"state": PENDING, "fingerprint": fingerprint}
+        if self._use_redis():
+            try:
+                claimed = await self.redis.execute(
+                    lambda client: client.set(self.prefix + key, json.dumps(record), nx=True, ex=IDEMPOTENCY_LOCK_TTL)
+                )
+                if claimed:
+                    self._events[key] = asyncio.Event()
+                    return None
+                existing = await self.redis.execute(lambda client: client.get(self.prefix + key))
+                return json.loads(existing) if existing else await self.claim(key, fingerprint)
+            except Exception as e:
+                logger.warning("Idempotency key store unavailable, using local store: %s", e)
+        existing = self._get_local(key)
+        if existing is not None:
+            return existing
+        self._set_local(key, record, IDEMPOTENCY_LOCK_TTL)
+        self._events[key] = asyncio.Event()
+        return None
+
+    async def get(self, key: str) -> Optional[dict]:
+        if self._use_redis():
+            try:
+                existing = await self.redis.execute(lambda client: client.get(self.prefix + key))
+                return json.loads(existing) if existing else None
+            except Exception:
+                pass
+        return self._get_local(key)
+
+    async def complete(self, key: str, record: dict) -> None:
+        await self._finish(key, record)
+
+    async def release(self, key: str) -> None:
+        """Зняти позначку без збереження відповіді: наступний повтор виконається знову"""
+        await self._finish(key, None)
+
+    async def _finish(self, key: str, record: Optional[dict]) -> None:
+        if self._use_redis():
+            try:
+                if record is None:
+                    await self.redis.execute(lambda client: client.delete(self.prefix + key))
+                else:
+                    await self.redis.execute(
+                        lambda client: client.set(self.prefix + key, json.dumps(record), ex=IDEMPOTENCY_TTL)
+                    )
+            except Exception as e:
+                logger.warning("Failed to store idempotency key: %s", e)
+        if record is None:
+            self._local.pop(key, None)
+        elif key in self._local:
+            self._set_local(key, record, IDEMPOTENCY_TTL)
+        event = self._events.pop(key, None)
+        if event is not None:
+            event.set()
+
+    async def wait(self, key: str, timeout: float = IDEMPOTENCY_WAIT) -> Optional[dict]:
+        """Дочекатися завершення запиту з цим ключем; None - ключ звільнено або час вийшов"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            event = self._events.get(key)
+            if event is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), deadline - time.monotonic())
+                except asyncio.TimeoutError:
+                    break
+            else:
+                await asyncio.sleep(POLL_INTERVAL)
+            record = await self.get(key)
+            if record is None or record["state"] == DONE:
+                return record
+        return await self.get(key)
+
+    def _get_local(self, key: str) -> Optional[dict]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, record = entry
+        if expires_at <= time.monotonic():
+            del self._local[key]
+            return None
+        return record
+
+    def _set_local(self, key: str, record: dict, ttl: float) -> None:
+        now = time.monotonic()
+        if len(self._local) > 10_000:
+            self._local = {k: v for k, v in self._local.items() if v[0] > now}
+        self._local[key] = (now + ttl, record)
+
+    def clear(self) -> None:
+        self._local.clear()
+        self._events.clear()
+
+
+idempotency_store = IdempotencyStore(redis_manager)
+
+
+def _scope_key(scope: Scope, idempotency_key: str) -> str:
+    headers = Headers(scope=scope)
+    client = scope.get("client")
+    owner = headers.get("authorization") or (client[0] if client else "")
+    owner_hash = hashlib.sha256(owner.encode()).hexdigest()[:32]
+    return f"{owner_hash}:{scope['method']}:{scope['path']}:{idempotency_key}"
+
+
+def _is_streamed(scope: Scope) -> bool:
+    """Чи передається тіло endpoint'у потоком без буферизації (multipart)"""
+    return Headers(scope=scope).get("content-type", "").lower().startswith("multipart/")
+
+
+def _fingerprint(scope: Scope, body: Optional[bytes]) -> str:
+    digest = hashlib.sha256(scope.get("query_string", b""))
+    digest.update(b"\0")
+    if body is None:
+        digest.update(Headers(scope=scope).get("content-type", "").split(";")[0].strip().lower().encode())
+    else:
+        digest.update(body)
+    return digest.hexdigest()
+
+
+def _replay_body(body: bytes) -> Receive:
+    """receive, що повертає вже прочитане тіло запиту"""
+    sent = False
+
+    async def receive() -> Message:
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return receive
+
+
+def _replay(record: dict) -> Response:
+    response = record["response"]
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in response["headers"]]
+    replay = Response(base64.b64decode(response["body"]), status_code=response["status"])
+    replay.raw_headers = [header for header in replay.raw_headers if header[0] == b"content-length"] + headers
+    replay.headers["Idempotent-Replayed"] = "true"
+    return replay
+
+
+def _error(status_code: int, detail: str) -> Response:
+    return JSONResponse(status_code=status_code, content={"detail": detail})
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware: зберігає відповіді запитів з Idempotency-Key та повертає їх на повтори"""
+
+    def __init__(self, app: ASGIApp, store: Optional[IdempotencyStore] = None):
+        self.app = app
+        self.store = store if store is not None else idempotency_store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = Headers(scope=scope).get("idempotency-key")
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _error(400, f"Idempotency-Key має містити від 1 до {MAX_KEY_LENGTH} символів")(scope, receive, send)
+            return
+
+        body = None
+        if not _is_streamed(scope):
+            body = await self._read_body(receive)
+            if body is None:
+                await _error(413, "Тіло запиту завелике для Idempotency-Key")(scope, receive, send)
+                return
+            receive = _replay_body(body)
+        key = _scope_key(scope, idempotency_key)
+        fingerprint = _fingerprint(scope, body)
+
+        existing = await self.store.claim(key, fingerprint)
+        while existing is not None and existing["state"] == PENDING and existing["fingerprint"] == fingerprint:
+            # Дублікат запиту, що ще виконується: чекаємо на його відповідь
+            existing = await self.store.wait(key)
+            if existing is None:
+                # Перший запит завершився без збереженої відповіді - виконуємо самі
+                existing = await self.store.claim(key, fingerprint)
+            elif existing["state"] == PENDING:
+                response = _error(409, "Запит з цим Idempotency-Key ще виконується")
+                response.headers["Retry-After"] = "1"
+                await response(scope, receive, send)
+                return
+        if existing is not None:
+            if existing["fingerprint"] != fingerprint:
+                response = _error(422, "Idempotency-Key вже використано для іншого запиту")
+            else:
+                response = _replay(existing)
+            await response(scope, receive, send)
+            return
+
+        await self._execute(scope, receive, send, key, fingerprint)
+
+    async def _read_body(self, receive: Receive) -> Optional[bytes]:
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > IDEMPOTENCY_MAX_BODY:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def _execute(self, scope: Scope, receive: Receive, send: Send, key: str, fingerprint: str) -> None:
+        response: dict = {"status": 500, "headers": [], "body": b""}
+        storable = True
+
+        async def capture(message: Message) -> None:
+            nonlocal storable
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in SKIPPED_HEADERS
+                ]
+            elif message["type"] == "http.response.body" and storable:
+                response["body"] += message.get("body", b"")
+                storable = len(response["body"]) <= IDEMPOTENCY_MAX_BODY
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            await self.store.release(key)
+            raise
+        if not storable or response["status"] >= 500:
+            await self.store.release(key)
+            return
+        response["body"] = base64.b64encode(response["body"]).decode()
+        await self.store.complete(key, {"state": DONE, "fingerprint": fingerprint, "response": response})
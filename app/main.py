@@ -1,18 +1,58 @@
 """
 Головний файл FastAPI додатку з аутентифікацією
 """
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from dotenv import load_dotenv
-from .database import engine, Base
-from .routers import contacts, auth
-from .rate_limiter import setup_rate_limiting
+from starlette.concurrency import run_in_threadpool
+from .database import warm_up_pool
+from .dedup import duplicate_cache
+from .events import broker
+from .routers import admin, batch, contacts, auth
+from .admission import AdmissionControlMiddleware
+from .compression import CompressionMiddleware
+from .idempotency import IdempotencyMiddleware
+from .rate_limiter import limiter, setup_rate_limiting
+from .redis_client import redis_manager
+from .serve import get_worker_id
+from .storage import MEDIA_ROOT, MEDIA_URL
+from .metrics import REGISTRY, MetricsMiddleware
+from .profiling import PROFILE_SECRET, ProfilingMiddleware
+from .timing import ServerTimingMiddleware, install_serialize_hook
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Кількість з'єднань пулу БД, які відкриваються під час старту (0 - без прогріву)
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "0"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Запуск та зупинка спільних ресурсів додатку.
+
+    Імпорт модуля не має побічних ефектів: схема БД створюється міграціями
+    Alembic, а з'єднання з Redis та БД відкриваються тут або ліниво.
+    """
+    started = time.perf_counter()
+    await redis_manager.start()
+    await limiter.start()
+    await broker.start()
+    await duplicate_cache.start()
+    if DB_POOL_WARMUP:
+        await run_in_threadpool(warm_up_pool, DB_POOL_WARMUP)
+    logger.info("Startup completed in %.1f ms", (time.perf_counter() - started) * 1000)
+    yield
+    duplicate_cache.stop()
+    await broker.stop()
+    await limiter.stop()
+    await redis_manager.stop()
 
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Contacts API with Authentication",
@@ -20,8 +60,19 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
+if os.getenv("ADMISSION_CONTROL", "true").lower() == "true":
+    app.add_middleware(AdmissionControlMiddleware)
+
+# Повтори з Idempotency-Key отримують збережену відповідь без черги admission control
+app.add_middleware(IdempotencyMiddleware)
+
+# Стискає тіла endpoint'ів; Server-Timing та метрики бачать вже стиснену відповідь
+if os.getenv("COMPRESSION", "true").lower() == "true":
+    app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=os.getenv("ALLOWED_ORIGINS", "*").split(","),
@@ -30,10 +81,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Зовнішній шар: час черги admission control теж потрапляє в розбивку
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+install_serialize_hook()
+
+# Без секрету middleware профілювання не додається, тож не коштує нічого
+if PROFILE_SECRET:
+    app.add_middleware(ProfilingMiddleware)
+
 setup_rate_limiting(app)
 
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(contacts.router, prefix="/api/v1")
+app.include_router(batch.router, prefix="/api/v1")
+app.include_router(admin.router)
+
+if os.getenv("AVATAR_STORAGE", "cloudinary").lower() == "local":
+    app.mount(MEDIA_URL, StaticFiles(directory=MEDIA_ROOT, check_dir=False), name="media")
 
 
 @app.get("/")
@@ -55,19 +120,21 @@ def read_root():
 @app.get("/health")
 def health_check():
     """Перевірка стану додатку"""
-    return {"status": "healthy", "version": "2.0.0"}
+    return {
+        "status": "healthy",
+        "version": "2.0.0",
+        "worker_id": get_worker_id(),
+        "redis": redis_manager.health(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Метрики поточного воркера у форматі Prometheus"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
-    import uvicorn
-
-    host = os.getenv("HOST", "0.0.0.0")
-    port = int(os.getenv("PORT", 8000))
-    debug = os.getenv("DEBUG", "True").lower() == "true"
-
-    uvicorn.run(
-        "app.main:app",
-        host=host,
-        port=port,
-        reload=debug,
-    )
+    from .serve import main
+
+    main()
@@ -0,0 +1,240 @@
+"""
+Мінімальний реєстр метрик у форматі Prometheus та middleware запитів.
+
+Метрики зберігаються в пам'яті процесу; кожен воркер віддає власні значення
+з міткою `worker`. Middleware рахує затримку запитів за шаблоном маршруту та
+відкриває для кожного запиту статистику SQL-запитів, яку заповнюють хуки
+engine у `database.py`.
+"""
+import threading
+import time
+from collections import Counter as ShapeCounter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .serve import get_worker_id
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """Базовий клас метрики з мітками"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self, const_labels: Dict[str, str]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            lines.extend(self._samples(const_labels))
+        return lines
+
+    def _samples(self, const_labels: Dict[str, str]) -> List[str]:
+        raise NotImplementedError
+
+    def _labels(self, key: LabelValues, const_labels: Dict[str, str], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        names = self.labelnames + tuple(const_labels) + tuple(name for name, _ in extra)
+        values = key + tuple(const_labels.values()) + tuple(value for _, value in extra)
+        return _format_labels(names, values)
+
+
+class Counter(Metric):
+    """Лічильник, що лише зростає"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self, const_labels: Dict[str, str]) -> List[str]:
+        return [
+            f"{self.name}{self._labels(key, const_labels)} {_format_number(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(Metric):
+    """Гістограма з фіксованими межами кошиків"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def _samples(self, const_labels: Dict[str, str]) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = self._labels(key, const_labels, (("le", _format_number(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = self._labels(key, const_labels)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Набір метрик процесу"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.setdefault(metric.name, metric)
+        return self._metrics[metric.name]
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Текстовий формат експозиції Prometheus"""
+        const_labels = {"worker": get_worker_id()}
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render(const_labels))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests_total = REGISTRY.counter(
+    "http_requests_total", "Кількість HTTP-запитів", ("method", "route", "status")
+)
+http_request_duration_seconds = REGISTRY.histogram(
+    "http_request_duration_seconds", "Затримка HTTP-запитів (до заголовків відповіді)", ("method", "route")
+)
+db_statements_per_request = REGISTRY.histogram(
+    "db_statements_per_request", "Кількість SQL-запитів на один HTTP-запит", ("route",), COUNT_BUCKETS
+)
+
+
+class RequestQueryStats:
+    """SQL-запити поточного HTTP-запиту, згруповані за нормалізованою формою"""
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.statements = 0
+        self.shapes: ShapeCounter = ShapeCounter()
+
+    @property
+    def route(self) -> str:
+        return route_label(self.scope)
+
+    def record(self, shape: str) -> int:
+        """Зарахувати запит; повертає, скільки разів виконано цю форму"""
+        self.statements += 1
+        self.shapes[shape] += 1
+        return self.shapes[shape]
+
+
+_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    return _query_stats.get()
+
+
+def route_label(scope: Scope) -> str:
+    """Шаблон маршруту замість конкретного шляху, щоб не роздувати кількість серій"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware: затримка та кількість SQL-запитів на маршрут"""
+
+    def __init__(self, app: ASGIApp, skip_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope)
+        token = _query_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                http_request_duration_seconds.observe(
+                    time.perf_counter() - started, method=scope["method"], route=route_label(scope)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _query_stats.reset(token)
+            route = route_label(scope)
+            http_requests_total.inc(method=scope["method"], route=route, status=str(status))
+            db_statements_per_request.observe(stats.statements, route=route)
@@ -1,10 +1,11 @@
 """
 SQLAlchemy моделі для бази даних
 """
-from sqlalchemy import Column, Integer, String, Date, Text, Boolean, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, Text, Boolean, ForeignKey, DateTime, JSON, Index
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from .database import Base
+from .phones import to_e164
 
 
 class User(Base):
@@ -18,8 +19,12 @@ class User(Base):
     first_name = Column(String(50), nullable=True)
     last_name = Column(String(50), nullable=True)
     avatar_url = Column(String(255), nullable=True)
+    avatar_hash = Column(String(64), nullable=True)
+    avatar_variants = Column(JSON, nullable=True)
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
+    # Збільшується при виході з усіх сесій: токени зі старою версією недійсні
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -29,6 +34,11 @@ class User(Base):
         return f"<User(id={self.id}, email='{self.email}')>"
 
 
+def _prefix_column(length: int) -> String:
+    # Побайтове порівняння (collation "C") у PostgreSQL, щоб діапазон за префіксом використовував індекс
+    return String(length).with_variant(String(length, collation="C"), "postgresql")
+
+
 class Contact(Base):
     """Модель контакту в базі даних"""
     __tablename__ = "contacts"
@@ -37,17 +47,53 @@ class Contact(Base):
     first_name = Column(String(50), nullable=False, index=True)
     last_name = Column(String(50), nullable=False, index=True)
     email = Column(String(100), nullable=False, index=True)
+    # Значення в нижньому регістрі для автодоповнення за префіксом
+    first_name_lower = Column(_prefix_column(50), nullable=True)
+    last_name_lower = Column(_prefix_column(50), nullable=True)
+    email_lower = Column(_prefix_column(100), nullable=True)
     phone = Column(String(20), nullable=False)
+    # Номер у форматі E.164 для пошуку за номером абонента (app/phones.py)
+    phone_e164 = Column(String(16), nullable=True)
     birthday = Column(Date, nullable=False)
     additional_info = Column(Text, nullable=True)
 
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     owner = relationship("User", back_populates="contacts")
 
+    __table_args__ = (
+        Index("ix_contacts_owner_id_phone_e164", "owner_id", "phone_e164"),
+        Index("ix_contacts_owner_id_first_name_lower", "owner_id", "first_name_lower"),
+        Index("ix_contacts_owner_id_last_name_lower", "owner_id", "last_name_lower"),
+        Index("ix_contacts_owner_id_email_lower", "owner_id", "email_lower"),
+    )
+
+    @validates("first_name", "last_name", "email", "phone")
+    def _update_derived_columns(self, key, value):
+        """Похідні колонки для пошуку оновлюються при кожному записі через ORM"""
+        if key == "phone":
+            self.phone_e164 = to_e164(value)
+        else:
+            setattr(self, f"{key}_lower", value.lower() if value is not None else None)
+        return value
+
     def __repr__(self):
         return f"<Contact(id={self.id}, email='{self.email}')>"
 
 
+class ContactStat(Base):
+    """
+    Лічильник контактів користувача за виміром (total, birth_month,
+    email_domain, additional_info); підтримується інкрементально в
+    app/contact_stats.py в тій самій транзакції, що й зміни контактів
+    """
+    __tablename__ = "contact_stats"
+
+    owner_id = Column(Integer, primary_key=True)
+    dimension = Column(String(20), primary_key=True)
+    key = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
 class EmailVerification(Base):
     """Модель для верифікації email"""
     __tablename__ = "email_verifications"
@@ -58,3 +104,19 @@ class EmailVerification(Base):
     expires_at = Column(DateTime(timezone=True), nullable=False)
     is_used = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    user = relationship("User")
+
+
+class RevokedToken(Base):
+    """Відкликаний JWT (за jti); зберігається до закінчення строку дії токена"""
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(32), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+# Реєструє слухачів сесії для contact_stats, кешу дублікатів та подій змін (імпорт після оголошення моделей)
+from . import contact_stats, dedup, events  # noqa: E402,F401
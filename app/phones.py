@@ -0,0 +1,45 @@
+"""
+Нормалізація телефонних номерів до формату E.164.
+
+Номери контактів вводяться довільно ("050 123-45-67", "+38 (050) 1234567",
+"00380501234567"); для пошуку за номером абонента вони зберігаються ще й у
+канонічному вигляді `+<код країни><номер>` в індексованій колонці
+contacts.phone_e164. Номери без міжнародного префікса вважаються номерами
+країни PHONE_DEFAULT_COUNTRY_CODE; національний префікс (0) відкидається.
+Повна валідація за планами нумерації країн не виконується - лише довжина
+за E.164 (8-15 цифр).
+"""
+import os
+import re
+from typing import Optional
+
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv("PHONE_DEFAULT_COUNTRY_CODE", "380")
+PHONE_TRUNK_PREFIX = os.getenv("PHONE_TRUNK_PREFIX", "0")
+
+E164_MIN_DIGITS = 8
+E164_MAX_DIGITS = 15
+_FORMATTING = re.compile(r"[\s\-(). /]")
+
+
+def to_e164(
+    phone: Optional[str],
+    country_code: str = PHONE_DEFAULT_COUNTRY_CODE,
+    trunk_prefix: str = PHONE_TRUNK_PREFIX,
+) -> Optional[str]:
+    """Номер у форматі E.164 або None, якщо його неможливо розпізнати"""
+    if not phone:
+        return None
+    compact = _FORMATTING.sub("", phone)
+    if compact.startswith("+"):
+        digits = compact[1:]
+    elif compact.startswith("00"):
+        digits = compact[2:]
+    elif compact.startswith(country_code) and len(compact) > E164_MIN_DIGITS + 1:
+        digits = compact
+    elif trunk_prefix and compact.startswith(trunk_prefix):
+        digits = country_code + compact[len(trunk_prefix):]
+    else:
+        digits = country_code + compact
+    if not digits.isdigit() or not E164_MIN_DIGITS <= len(digits) <= E164_MAX_DIGITS:
+        return None
+    return f"+{digits}"
@@ -0,0 +1,226 @@
+"""
+Профілювання окремого запиту за запитом адміністратора.
+
+Якщо задано PROFILE_SECRET, запит із заголовком `X-Profile: <secret>` або
+параметром `?__profile=<secret>` виконується під семплюючим профайлером:
+окремий потік періодично знімає стеки потоку event loop та робочих потоків
+threadpool (де виконуються синхронні endpoint'и та запити до БД). Звіт
+зберігається у форматі speedscope JSON у PROFILE_DIR, а його ім'я
+повертається в заголовку `X-Profile-Id`; список та завантаження звітів -
+/admin/profiles із заголовком `X-Profile-Secret`. Без PROFILE_SECRET
+middleware не підключається зовсім.
+
+Семплер бачить увесь процес, тому одночасні запити в тому ж воркері теж
+можуть потрапити у звіт.
+"""
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+from fastapi import Header, HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROFILE_SECRET = os.getenv("PROFILE_SECRET", "")
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+
+PROFILE_SUFFIX = ".speedscope.json"
+WORKER_THREAD_NAME = "AnyIO worker thread"
+# Потоки, стек яких складається лише з цих модулів, просто чекають на роботу
+_IDLE_MODULES = ("threading.py", "queue.py", f"anyio{os.sep}_backends")
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_-]+")
+
+Frame = Tuple[str, str, int]
+
+
+class SamplingProfiler:
+    """Семплюючий профайлер потоку event loop та робочих потоків threadpool"""
+
+    def __init__(self, loop_thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.samples: Dict[int, List[Tuple[float, Tuple[Frame, ...]]]] = defaultdict(list)
+        self.thread_names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self.started = self.finished = 0.0
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.finished = time.perf_counter()
+
+    def _watched_threads(self) -> Dict[int, str]:
+        watched = {}
+        for thread in threading.enumerate():
+            if thread.ident == self.loop_thread_id:
+                watched[thread.ident] = "event loop"
+            elif thread.name == WORKER_THREAD_NAME:
+                watched[thread.ident] = f"worker {thread.ident}"
+        return watched
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            # Робочі потоки threadpool створюються на вимогу, тому список оновлюється щоразу
+            watched = self._watched_threads()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in watched:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, frame.f_lineno))
+                    frame = frame.f_back
+                if thread_id != self.loop_thread_id and all(_in_idle_module(f[1]) for f in stack):
+                    continue
+                self.thread_names[thread_id] = watched[thread_id]
+                self.samples[thread_id].append((now, tuple(reversed(stack))))
+
+    def to_speedscope(self, name: str) -> dict:
+        """Звіт у форматі https://www.speedscope.app/file-format-schema.json"""
+        frame_index: Dict[Frame, int] = {}
+        frames = []
+        profiles = []
+        for thread_id, thread_samples in self.samples.items():
+            stacks, weights = [], []
+            previous = self.started
+            for timestamp, stack in thread_samples:
+                indexes = []
+                for frame in stack:
+                    if frame not in frame_index:
+                        frame_index[frame] = len(frames)
+                        frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                    indexes.append(frame_index[frame])
+                stacks.append(indexes)
+                weights.append(timestamp - previous)
+                previous = timestamp
+            profiles.append({
+                "type": "sampled",
+                "name": self.thread_names[thread_id],
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.finished - self.started,
+                "samples": stacks,
+                "weights": weights,
+            })
+        profiles.sort(key=lambda profile: profile["name"] != "event loop")
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "contacts-api",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+def _in_idle_module(filename: str) -> bool:
+    return any(module in filename for module in _IDLE_MODULES)
+
+
+def _secret_matches(value: str) -> bool:
+    return bool(PROFILE_SECRET) and hmac.compare_digest(value.encode(), PROFILE_SECRET.encode())
+
+
+def profile_requested(scope: Scope) -> bool:
+    """Чи містить запит заголовок або параметр профілювання з правильним секретом"""
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return _secret_matches(value.decode("latin-1"))
+    query = scope.get("query_string", b"")
+    if b"__profile=" in query:
+        return any(key == "__profile" and _secret_matches(value) for key, value in parse_qsl(query.decode("latin-1")))
+    return False
+
+
+def profile_name(scope: Scope) -> str:
+    path = _UNSAFE_NAME.sub("_", scope["path"]).strip("_") or "root"
+    return f"{time.strftime('%Y%m%dT%H%M%S')}_{scope['method']}_{path[:60]}_{uuid.uuid4().hex[:8]}"
+
+
+def save_profile(directory: Path, name: str, report: dict, keep: int = PROFILE_KEEP) -> Path:
+    """Записати звіт і залишити лише `keep` найновіших"""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}{PROFILE_SUFFIX}"
+    path.write_text(json.dumps(report))
+    reports = sorted(directory.glob(f"*{PROFILE_SUFFIX}"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in reports[keep:]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def list_profiles(directory: Optional[Path] = None) -> List[dict]:
+    """Збережені звіти, найновіші першими"""
+    directory = directory or PROFILE_DIR
+    if not directory.exists():
+        return []
+    reports = sorted(directory.glob(f"*{PROFILE_SUFFIX}"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return [
+        {"id": path.name[: -len(PROFILE_SUFFIX)], "size": path.stat().st_size, "created_at": path.stat().st_mtime}
+        for path in reports
+    ]
+
+
+def profile_path(profile_id: str, directory: Optional[Path] = None) -> Optional[Path]:
+    """Шлях до звіту за id (без виходу за межі каталогу)"""
+    if _UNSAFE_NAME.sub("", profile_id) != profile_id:
+        return None
+    path = (directory or PROFILE_DIR) / f"{profile_id}{PROFILE_SUFFIX}"
+    return path if path.is_file() else None
+
+
+def require_profile_secret(x_profile_secret: Optional[str] = Header(None)) -> None:
+    """Залежність для адміністративних endpoint'ів профілювання"""
+    if not PROFILE_SECRET:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Профілювання вимкнено")
+    if x_profile_secret is None or not _secret_matches(x_profile_secret):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Невірний секрет профілювання")
+
+
+class ProfilingMiddleware:
+    """ASGI middleware, що профілює лише запити з правильним секретом"""
+
+    def __init__(self, app: ASGIApp, directory: Path = PROFILE_DIR, keep: int = PROFILE_KEEP):
+        self.app = app
+        self.directory = directory
+        self.keep = keep
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        name = profile_name(scope)
+        profiler = SamplingProfiler(threading.get_ident())
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", name)
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            # Зупинка семплера (join потоку), побудова та запис звіту - поза event loop
+            await run_in_threadpool(self._finish, profiler, name)
+
+    def _finish(self, profiler: SamplingProfiler, name: str) -> Path:
+        profiler.stop()
+        return save_profile(self.directory, name, profiler.to_speedscope(name), self.keep)
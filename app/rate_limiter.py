@@ -1,30 +1,263 @@
 """
-Rate limiting для API endpoints
+Rate limiting для API endpoints.
+
+Ліміти перевіряються локально (token bucket у пам'яті процесу) без жодного
+запиту до Redis. Фонова задача раз на `RATE_LIMIT_SYNC_INTERVAL` секунд
+одним pipeline відправляє накопичені лічильники в Redis (Lua-скрипт з
+INCRBY у вікні ліміту) та отримує глобальні значення від усіх воркерів.
+Перевищення глобального ліміту обмежене запитами, які інші воркери
+пропустили за один інтервал синхронізації. Поки circuit breaker Redis
+розімкнено, ліміти діють локально в межах процесу.
 """
+import asyncio
+import functools
+import inspect
+import logging
+import math
 import os
-import redis
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from .redis_client import RedisManager, redis_manager
+
+logger = logging.getLogger(__name__)
+
+SYNC_INTERVAL = float(os.getenv("RATE_LIMIT_SYNC_INTERVAL", "1.0"))
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Додає локальну дельту до лічильника вікна та повертає глобальне значення
+SYNC_SCRIPT = """
+local count = redis.call('INCRBY', KEYS[1], ARGV[1])
+if count == tonumber(ARGV[1]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return count
+"""
+
+
+class RateLimitExceeded(Exception):
+    """Перевищено ліміт запитів"""
+
+    def __init__(self, rate: str, retry_after: float):
+        super().__init__(rate)
+        self.rate = rate
+        self.retry_after = retry_after
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Розібрати ліміт у форматі `10/minute` на (кількість, період у секундах)"""
+    count, _, unit = rate.partition("/")
+    unit = unit.strip().lower().rstrip("s")
+    if unit not in PERIODS:
+        raise ValueError(f"Невідомий період ліміту: {rate}")
+    return int(count), PERIODS[unit]
+
+
+def get_remote_address(request: Request) -> str:
+    """Ключ ліміту за IP клієнта"""
+    return request.client.host if request.client else "127.0.0.1"
+
+
+class _Counter:
+    """Локальний стан одного ліміту для одного ключа"""
+
+    __slots__ = ("limit", "period", "window", "tokens", "updated", "pending", "global_count")
+
+    def __init__(self, limit: int, period: int, now: float):
+        self.limit = limit
+        self.period = period
+        self.window = int(now // period)
+        self.tokens = float(limit)
+        self.updated = now
+        self.pending = 0
+        self.global_count = 0
+
+
+class RedisCounterSync:
+    """Пакетна синхронізація лічильників через Redis Lua-скрипт у pipeline"""
+
+    def __init__(self, manager: RedisManager):
+        self.manager = manager
+        self._script = None
+
+    async def push(self, deltas: List[Tuple[str, int, int]]) -> List[int]:
+        return await self.manager.execute(lambda client: self._push(client, deltas))
+
+    async def _push(self, client, deltas: List[Tuple[str, int, int]]) -> List[int]:
+        if self._script is None:
+            self._script = client.register_script(SYNC_SCRIPT)
+        async with client.pipeline(transaction=False) as pipe:
+            for key, delta, ttl in deltas:
+                await self._script(keys=[key], args=[delta, ttl], client=pipe)
+            return [int(count) for count in await pipe.execute()]
+
+
+class Limiter:
+    """Двоярусний rate limiter: локальний token bucket + асинхронна синхронізація з Redis"""
+
+    def __init__(
+        self,
+        key_func: Callable[[Request], str] = get_remote_address,
+        sync: Optional[RedisCounterSync] = None,
+        sync_interval: float = SYNC_INTERVAL,
+    ):
+        self.key_func = key_func
+        self.sync = sync
+        self.sync_interval = sync_interval
+        self.enabled = True
+        self._counters: Dict[Tuple[str, str], _Counter] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._sync_failing = False
+
+    def hit(self, scope: str, key: str, limit: int, period: int, now: Optional[float] = None) -> float:
+        """Зарахувати запит. Повертає 0, якщо запит дозволено, інакше час до повтору"""
+        now = time.time() if now is None else now
+        with self._lock:
+            counter = self._counters.get((scope, key))
+            if counter is None:
+                counter = self._counters[(scope, key)] = _Counter(limit, period, now)
+            window = int(now // period)
+            if window != counter.window:
+                counter.window = window
+                counter.global_count = 0
+                counter.pending = 0
+            if counter.global_count + counter.pending >= limit:
+                return (window + 1) * period - now
+            rate = limit / period
+            counter.tokens = min(float(limit), counter.tokens + (now - counter.updated) * rate)
+            counter.updated = now
+            if counter.tokens < 1:
+                return (1 - counter.tokens) / rate
+            counter.tokens -= 1
+            counter.pending += 1
+            return 0.0
+
+    def _collect(self, now: float) -> List[Tuple[Tuple[str, str], int, int, int]]:
+        """Забрати накопичені дельти активних лічильників та прибрати застарілі"""
+        batch = []
+        with self._lock:
+            for ident, counter in list(self._counters.items()):
+                if int(now // counter.period) != counter.window:
+                    del self._counters[ident]
+                    continue
+                batch.append((ident, counter.window, counter.pending, counter.period))
+                counter.pending = 0
+        return batch
+
+    def _apply(self, batch: Iterable[Tuple[Tuple[str, str], int, int, int]], counts: Optional[List[int]]) -> None:
+        """Оновити локальні лічильники глобальними значеннями (або повернути дельти при збої)"""
+        with self._lock:
+            for i, (ident, window, delta, _) in enumerate(batch):
+                counter = self._counters.get(ident)
+                if counter is None or counter.window != window:
+                    continue
+                if counts is None:
+                    counter.pending += delta
+                    continue
+                counter.global_count = counts[i]
+                remaining = max(counter.limit - counts[i], 0)
+                counter.tokens = min(counter.tokens, float(remaining))
+
+    async def sync_once(self) -> None:
+        """Один цикл синхронізації з Redis"""
+        if self.sync is None:
+            return
+        batch = self._collect(time.time())
+        if not batch:
+            return
+        deltas = [
+            (f"ratelimit:{scope}:{key}:{window}", delta, period)
+            for (scope, key), window, delta, period in batch
+        ]
+        try:
+            counts = await self.sync.push(deltas)
+        except Exception as e:
+            self._apply(batch, None)
+            if not self._sync_failing:
+                logger.warning("Rate limit: синхронізація з Redis недоступна, працюємо локально: %s", e)
+            self._sync_failing = True
+            return
+        if self._sync_failing:
+            logger.info("Rate limit: синхронізацію з Redis відновлено")
+        self._sync_failing = False
+        self._apply(batch, counts)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.sync_once()
+
+    async def start(self) -> None:
+        """Запустити фонову синхронізацію"""
+        if self.sync is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Зупинити синхронізацію та відправити залишок лічильників"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            await self.sync_once()
+
+    def reset(self) -> None:
+        """Очистити локальні лічильники"""
+        with self._lock:
+            self._counters.clear()
+
+    def limit(self, rate: str, key_func: Optional[Callable[[Request], str]] = None):
+        """Декоратор ліміту для endpoint (endpoint повинен приймати `request: Request`)"""
+        count, period = parse_rate(rate)
+
+        def decorator(func):
+            if "request" not in inspect.signature(func).parameters:
+                raise ValueError(f"Endpoint {func.__name__} повинен приймати параметр 'request'")
+            scope = f"{func.__module__}.{func.__name__}"
+
+            def check(request: Request) -> None:
+                if not self.enabled:
+                    return
+                key = (key_func or self.key_func)(request)
+                retry_after = self.hit(scope, key, count, period)
+                if retry_after:
+                    raise RateLimitExceeded(rate, retry_after)
+
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    check(kwargs["request"])
+                    return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                check(kwargs["request"])
+                return func(*args, **kwargs)
+            return sync_wrapper
+
+        return decorator
+
 
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = os.getenv("REDIS_PORT", "6379")
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
+    """Відповідь 429 з заголовком Retry-After"""
+    return JSONResponse(
+        status_code=429,
+        content={"error": f"Rate limit exceeded: {exc.rate}"},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
 
-try:
-    redis_client = redis.Redis(host=REDIS_HOST, port=int(REDIS_PORT), db=0, decode_responses=True)
-    redis_client.ping()
-    storage_uri = f"redis://{REDIS_HOST}:{REDIS_PORT}"
-except Exception:
-    redis_client = None
-    storage_uri = "memory://"
 
-limiter = Limiter(key_func=get_remote_address, storage_uri=storage_uri)
+limiter = Limiter(sync=RedisCounterSync(redis_manager))
 
 
 def setup_rate_limiting(app: FastAPI):
     """Налаштування rate limiting для додатку"""
     app.state.limiter = limiter
-    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-    app.add_middleware(SlowAPIMiddleware)
+    app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
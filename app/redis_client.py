@@ -0,0 +1,175 @@
+"""
+Спільний асинхронний пул з'єднань Redis з circuit breaker.
+
+Пул створюється у lifespan додатку без жодного мережевого запиту. Після
+`failure_threshold` помилок поспіль breaker розмикається і підсистеми
+(rate limiting, кешування) переходять у локальний режим, не чекаючи на
+таймаути. Фонова перевірка раз на `recovery_timeout` секунд пінгує Redis і
+замикає breaker, щойно він знову доступний.
+"""
+import asyncio
+import logging
+import os
+import time
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, List, Optional, Tuple, Type, TypeVar
+
+if TYPE_CHECKING:
+    import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = os.getenv("REDIS_PORT", "6379")
+REDIS_URL = os.getenv("REDIS_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}/0")
+
+T = TypeVar("T")
+
+
+def _connection_errors() -> Tuple[Type[BaseException], ...]:
+    """Помилки, що рахуються як недоступність Redis (redis імпортується ліниво)"""
+    from redis.exceptions import RedisError
+
+    return (RedisError, OSError, asyncio.TimeoutError)
+
+
+class CircuitState(str, Enum):
+    """Стан circuit breaker"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Redis тимчасово недоступний (breaker розімкнено)"""
+
+
+class RedisManager:
+    """Власник пулу з'єднань Redis та circuit breaker для нього"""
+
+    def __init__(
+        self,
+        url: str = REDIS_URL,
+        failure_threshold: int = int(os.getenv("REDIS_FAILURE_THRESHOLD", "3")),
+        recovery_timeout: float = float(os.getenv("REDIS_RECOVERY_TIMEOUT", "5")),
+        health_interval: float = float(os.getenv("REDIS_HEALTH_INTERVAL", "10")),
+        max_connections: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+        client_factory: Optional[Callable[[], Any]] = None,
+    ):
+        self.url = url
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.health_interval = health_interval
+        self.max_connections = max_connections
+        self.client_factory = client_factory or self._create_client
+        self.client: Optional["aioredis.Redis"] = None
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.listeners: List[Callable[[CircuitState, CircuitState], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def _create_client(self) -> "aioredis.Redis":
+        import redis.asyncio as aioredis
+
+        pool = aioredis.ConnectionPool.from_url(
+            self.url,
+            max_connections=self.max_connections,
+            socket_connect_timeout=1,
+            socket_timeout=1,
+            health_check_interval=30,
+        )
+        return aioredis.Redis(connection_pool=pool)
+
+    @property
+    def available(self) -> bool:
+        """Чи можна зараз звертатися до Redis"""
+        return self.client is not None and self.state == CircuitState.CLOSED
+
+    async def start(self) -> None:
+        """Створити пул (ліниво, без підключення) та запустити фонову перевірку"""
+        if self.client is None:
+            self.client = self.client_factory()
+        if self._task is None:
+            self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self) -> None:
+        """Зупинити перевірку та закрити пул"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def execute(self, operation: Callable[["aioredis.Redis"], Awaitable[T]]) -> T:
+        """Виконати операцію з клієнтом через circuit breaker"""
+        if not self.available:
+            raise CircuitOpenError(self.last_error or "Redis недоступний")
+        try:
+            result = await operation(self.client)
+        except _connection_errors() as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self.state != CircuitState.CLOSED:
+            self._transition(CircuitState.CLOSED)
+
+    def record_failure(self, error: BaseException) -> None:
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != CircuitState.OPEN:
+                self._transition(CircuitState.OPEN)
+
+    def _transition(self, new_state: CircuitState) -> None:
+        old_state, self.state = self.state, new_state
+        if new_state == CircuitState.OPEN:
+            logger.warning("Redis circuit breaker: %s -> %s (%s)", old_state.value, new_state.value, self.last_error)
+        else:
+            logger.info("Redis circuit breaker: %s -> %s", old_state.value, new_state.value)
+        for listener in self.listeners:
+            listener(old_state, new_state)
+
+    async def probe(self) -> bool:
+        """Перевірити з'єднання (PING) та оновити стан breaker"""
+        if self.client is None:
+            return False
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - (self.opened_at or 0) < self.recovery_timeout:
+                return False
+            self._transition(CircuitState.HALF_OPEN)
+        try:
+            await self.client.ping()
+        except _connection_errors() as e:
+            self.record_failure(e)
+            return False
+        self.record_success()
+        return True
+
+    async def _monitor(self) -> None:
+        while True:
+            await self.probe()
+            interval = self.recovery_timeout if self.state != CircuitState.CLOSED else self.health_interval
+            await asyncio.sleep(interval)
+
+    def health(self) -> dict:
+        """Стан підключення для /health"""
+        return {
+            "state": self.state.value,
+            "failures": self.failures,
+            "last_error": self.last_error if self.state != CircuitState.CLOSED else None,
+        }
+
+
+redis_manager = RedisManager()
@@ -0,0 +1,124 @@
+"""
+Відкликання JWT: вихід з поточної сесії та з усіх сесій.
+
+Вихід з сесії записує jti токена в таблицю revoked_tokens. Щоб перевірка не
+додавала запит до БД у кожен запит, кожен воркер тримає Bloom-фільтр
+відкликаних jti: для невідкликаного токена (звичайний випадок) перевірка -
+це один хеш і кілька перевірок бітів. Лише якщо фільтр каже "можливо",
+jti перевіряється в БД, тож хибнопозитивні результати не відхиляють дійсні
+токени.
+
+Раз на TOKEN_REVOCATION_SYNC секунд (під час перевірки токена) фільтр
+перебудовується з усіх чинних записів таблиці. Дочитувати лише записи з
+id, більшим за останній побачений, не можна: у PostgreSQL з кількома
+воркерами id з послідовності комітяться не по порядку, і пропущений запис
+вже ніколи не потрапив би у фільтр. Чинних записів небагато (вони живуть
+лише до закінчення строку дії токена), тож повне перечитування дешеве.
+Токен, відкликаний через інший воркер, перестає діяти в ньому не пізніше
+ніж через цей інтервал; у воркері, що обробив вихід, - одразу. Вихід з
+усіх сесій не залежить від синхронізації: він збільшує users.token_version,
+а користувач і так читається з БД.
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Set
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from .models import RevokedToken, User
+
+TOKEN_REVOCATION_SYNC = float(os.getenv("TOKEN_REVOCATION_SYNC", "30"))
+TOKEN_BLOOM_CAPACITY = int(os.getenv("TOKEN_BLOOM_CAPACITY", "100000"))
+TOKEN_BLOOM_ERROR_RATE = float(os.getenv("TOKEN_BLOOM_ERROR_RATE", "0.001"))
+
+
+class BloomFilter:
+    """Bloom-фільтр рядків: без хибнонегативних результатів"""
+
+    def __init__(self, capacity: int = TOKEN_BLOOM_CAPACITY, error_rate: float = TOKEN_BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Подвійне хешування: k позицій з двох 64-бітних половин одного blake2b
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """Відкликані jti поточного воркера: Bloom-фільтр, що синхронізується з БД"""
+
+    def __init__(self, sync_interval: float = TOKEN_REVOCATION_SYNC, capacity: int = TOKEN_BLOOM_CAPACITY):
+        self.sync_interval = sync_interval
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Порожній фільтр; наступна перевірка перечитає всі відкликані токени"""
+        self.filter = BloomFilter(self.capacity)
+        self.synced_at: Optional[float] = None
+        self._revoked_during_sync: Set[str] = set()
+
+    def sync(self, db: Session) -> None:
+        """Перебудувати фільтр з усіх записів, строк яких ще не минув"""
+        self._revoked_during_sync = set()
+        jtis = db.execute(select(RevokedToken.jti).where(RevokedToken.expires_at > datetime.utcnow())).scalars().all()
+        rebuilt = BloomFilter(max(self.capacity, len(jtis)))
+        for jti in jtis:
+            rebuilt.add(jti)
+        self.filter = rebuilt
+        # Токени, відкликані цим воркером під час перебудови, могли не потрапити у вибірку
+        for jti in self._revoked_during_sync:
+            rebuilt.add(jti)
+        self.synced_at = time.monotonic()
+
+    def maybe_sync(self, db: Session) -> None:
+        if self.synced_at is not None and time.monotonic() - self.synced_at < self.sync_interval:
+            return
+        # Синхронізацію виконує один потік; решта перевіряють за поточним фільтром
+        if self._lock.acquire(blocking=self.synced_at is None):
+            try:
+                self.sync(db)
+            finally:
+                self._lock.release()
+
+    def is_revoked(self, db: Session, jti: str) -> bool:
+        self.maybe_sync(db)
+        if jti not in self.filter:
+            return False
+        return db.execute(select(RevokedToken.id).where(RevokedToken.jti == jti)).first() is not None
+
+    def revoke(self, db: Session, jti: str, user_id: int, expires_at: datetime) -> None:
+        """Відкликати токен; заодно видаляються записи токенів, строк яких минув"""
+        db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+        if db.execute(select(RevokedToken.id).where(RevokedToken.jti == jti)).first() is None:
+            db.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at))
+        db.commit()
+        self.filter.add(jti)
+        self._revoked_during_sync.add(jti)
+
+
+revocation_list = RevocationList()
+
+
+def revoke_all_sessions(db: Session, user: User) -> None:
+    """Зробити недійсними всі видані користувачу токени"""
+    user.token_version = (user.token_version or 0) + 1
+    db.commit()
@@ -0,0 +1,24 @@
+"""
+Адміністративні endpoint'и: звіти профілювання запитів
+"""
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from .. import profiling
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(profiling.require_profile_secret)])
+
+
+@router.get("/profiles")
+def list_profiles() -> List[dict]:
+    """Список збережених профілів запитів (найновіші першими)"""
+    return profiling.list_profiles()
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(profile_id: str):
+    """Завантажити профіль у форматі speedscope JSON"""
+    path = profiling.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Профіль не знайдено")
+    return FileResponse(path, media_type="application/json", filename=path.name)
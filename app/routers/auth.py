@@ -2,19 +2,30 @@
 API роутер для аутентифікації та авторизації
 """
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from .. import crud, models, schemas
 from ..database import get_db
 from ..auth import (
     create_access_token,
+    get_current_token,
     get_current_user,
     get_current_verified_user,
+    get_password_hash,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
 from ..email import send_verification_email
-from ..cloudinary_service import upload_avatar
+from ..cloudinary_service import (
+    AVATAR_SIZE,
+    avatar_digest,
+    generate_avatar_variants,
+    read_avatar_upload,
+    upload_avatar,
+)
 from ..rate_limiter import limiter
+from ..revocation import revocation_list, revoke_all_sessions
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -22,12 +33,17 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 @router.post("/register", response_model=schemas.UserResponse, status_code=201)
 async def register_user(user: schemas.UserCreate, request: Request, db: Session = Depends(get_db)):
     """Реєстрація нового користувача"""
-    if crud.get_user_by_email(db, email=user.email):
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Користувач з таким email вже існує")
-    if crud.get_user_by_username(db, username=user.username):
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Користувач з таким username вже існує")
-    db_user = crud.create_user(db, user)
-    verification_token = crud.create_verification_token(db, db_user.id)
+    # bcrypt навмисно повільний: хешуємо у threadpool, щоб не блокувати event loop
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
+    try:
+        db_user, verification_token = crud.register_user(db, user, hashed_password)
+    except IntegrityError:
+        # Рідкісний шлях: з'ясовуємо, яке поле зайняте (email перевіряється першим)
+        if crud.get_user_by_email(db, email=user.email):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Користувач з таким email вже існує")
+        if crud.get_user_by_username(db, username=user.username):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Користувач з таким username вже існує")
+        raise
     base_url = f"{request.url.scheme}://{request.url.netloc}"
     try:
         await send_verification_email(user.email, verification_token, base_url)
@@ -47,10 +63,32 @@ def login_user(user_credentials: schemas.UserLogin, db: Session = Depends(get_db
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(data={"sub": user.email}, expires_delta=access_token_expires)
+    access_token = create_access_token(
+        data={"sub": user.email, "ver": user.token_version or 0}, expires_delta=access_token_expires
+    )
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.post("/logout")
+def logout_user(
+    token_data: schemas.TokenData = Depends(get_current_token),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Вихід: відкликання поточного токена"""
+    if token_data.jti is None or token_data.expires_at is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Токен не можна відкликати окремо")
+    revocation_list.revoke(db, token_data.jti, current_user.id, token_data.expires_at)
+    return {"message": "Вихід виконано"}
+
+
+@router.post("/logout-all")
+def logout_all_sessions(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Вихід з усіх сесій: відкликання всіх виданих токенів користувача"""
+    revoke_all_sessions(db, current_user)
+    return {"message": "Усі сесії завершено"}
+
+
 @router.get("/verify-email")
 def verify_email(token: str, db: Session = Depends(get_db)):
     """Верифікація email адреси"""
@@ -87,14 +125,37 @@ def update_current_user(user_update: schemas.UserUpdate, current_user: models.Us
     return crud.update_user(db, current_user, user_update)
 
 
-@router.post("/me/avatar", response_model=schemas.UserResponse)
+# Тіло читається потоково в read_avatar_upload, тому схема multipart описана вручну
+AVATAR_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
+
+@router.post("/me/avatar", response_model=schemas.UserResponse, openapi_extra=AVATAR_UPLOAD_OPENAPI)
 async def upload_user_avatar(
-    file: UploadFile = File(...),
+    request: Request,
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(get_current_verified_user),
     db: Session = Depends(get_db)
 ):
     """Завантаження аватара користувача"""
-    avatar_url = await upload_avatar(file, current_user.id)
-    user_update = schemas.UserUpdate(avatar_url=avatar_url)
-    updated_user = crud.update_user(db, current_user, user_update)
+    data = await read_avatar_upload(request)
+    avatar_hash = await avatar_digest(data)
+    if current_user.avatar_url and current_user.avatar_hash == avatar_hash:
+        return current_user
+    previous_hash = current_user.avatar_hash if current_user.avatar_url else None
+    avatar_url = await upload_avatar(data, current_user.id, avatar_hash)
+    updated_user = crud.set_user_avatar(db, current_user, avatar_url, avatar_hash, {str(AVATAR_SIZE): avatar_url})
+    background_tasks.add_task(generate_avatar_variants, db.get_bind(), current_user.id, data, avatar_hash, previous_hash)
     return updated_user
@@ -0,0 +1,69 @@
+"""
+API роутер для пакетного виконання запитів
+"""
+import logging
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.exceptions import ExceptionMiddleware
+from .. import models, schemas
+from ..auth import get_current_token, get_current_verified_user
+from ..batch import BatchContext, BatchSession, batch_context, dispatch, validate_url
+from ..database import get_db
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["batch"])
+
+# Статус підзапитів, які не виконувалися, бо атомарний пакет уже зазнав невдачі
+SKIPPED_STATUS = 424
+
+
+@router.post("/batch", response_model=schemas.BatchResponse)
+async def run_batch(
+    batch: schemas.BatchRequest,
+    request: Request,
+    current_user: models.User = Depends(get_current_verified_user),
+    token_data: schemas.TokenData = Depends(get_current_token),
+    db: Session = Depends(get_db)
+):
+    """Виконати кілька запитів API з однією автентифікацією та сесією БД"""
+    # Сесія автентифікації більше не потрібна; користувач переходить у сесію пакета без запиту
+    await run_in_threadpool(db.close)
+    # Без expire_on_commit: commit підзапиту не скидає користувача пакета, тож
+    # наступні підзапити не перечитують його з БД
+    session = BatchSession(bind=db.get_bind(), expire_on_commit=False)
+    session.defer_commit = batch.atomic
+    user = session.merge(current_user, load=False)
+    # Обробники помилок додатку (HTTPException, 422, rate limit) для підзапитів
+    app = ExceptionMiddleware(request.app.router, handlers=request.app.exception_handlers)
+
+    results = []
+    failed = False
+    try:
+        with batch_context(BatchContext(session, user, token_data)):
+            for item in batch.requests:
+                if failed and batch.atomic:
+                    results.append({"status": SKIPPED_STATUS, "body": {"detail": "Пакет скасовано через попередню помилку"}})
+                    continue
+                error = validate_url(item.url)
+                if error:
+                    result = {"status": 400, "body": {"detail": error}}
+                else:
+                    try:
+                        result = await dispatch(app, request.scope, item.method, item.url, item.body)
+                    except Exception:
+                        logger.exception("Batch sub-request %s %s failed", item.method, item.url)
+                        result = {"status": 500, "body": {"detail": "Internal Server Error"}}
+                results.append(result)
+                if result["status"] >= 400:
+                    failed = True
+                    if not batch.atomic:
+                        # Відкидаємо незафіксовані зміни невдалого підзапиту
+                        await run_in_threadpool(session.rollback)
+        committed = not (failed and batch.atomic)
+        if batch.atomic:
+            await run_in_threadpool(session.commit_batch if committed else session.rollback)
+    finally:
+        await run_in_threadpool(session.close)
+    return {"committed": committed, "results": results}
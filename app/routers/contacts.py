@@ -1,15 +1,25 @@
 """
 API роутер для управління контактами (оновлений з аутентифікацією)
 """
+from datetime import datetime, timezone
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from .. import crud, models, schemas
+from ..contact_stats import get_user_stats
+from ..phones import to_e164
+from ..events import broker, event_stream
+from ..dedup import DEDUP_SYNC_LIMIT, duplicate_cache, find_owner_duplicates, merge_contacts, refresh_duplicates
 from ..database import get_db
 from ..auth import get_current_verified_user
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
+# Довші списки ID - через POST /contacts/batch, щоб не впиратися в довжину URL
+BATCH_GET_MAX_IDS = 100
+
 
 @router.post("/", response_model=schemas.Contact, status_code=201)
 def create_contact(
@@ -43,6 +53,142 @@ def get_upcoming_birthdays(current_user: models.User = Depends(get_current_verif
     return crud.get_user_upcoming_birthdays(db, current_user.id)
 
 
+@router.get("/events", response_class=StreamingResponse)
+async def contact_events(current_user: models.User = Depends(get_current_verified_user), db: Session = Depends(get_db)):
+    """SSE-потік подій created/updated/deleted для контактів користувача"""
+    owner_id = current_user.id
+    # Сесія не потрібна під час потоку; з'єднання повертається в пул одразу
+    await run_in_threadpool(db.close)
+    return StreamingResponse(
+        event_stream(broker.subscribe(owner_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/stats", response_model=schemas.ContactStats)
+def get_contact_stats(
+    top_domains: int = Query(20, ge=1, le=100, description="Скільки найпопулярніших доменів email повернути"),
+    current_user: models.User = Depends(get_current_verified_user),
+    db: Session = Depends(get_db)
+):
+    """Статистика контактів: кількість, місяці народження, домени email, additional_info"""
+    return get_user_stats(db, current_user.id, top_domains)
+
+
+@router.get("/duplicates", response_model=schemas.DuplicateReport)
+async def get_duplicates(
+    response: Response,
+    background_tasks: BackgroundTasks,
+    refresh: bool = Query(False, description="Перерахувати, не чекаючи закінчення TTL кешу"),
+    limit: int = Query(100, ge=1, le=1000, description="Максимальна кількість груп"),
+    current_user: models.User = Depends(get_current_verified_user),
+    db: Session = Depends(get_db)
+):
+    """Знайти групи майже-дублікатів контактів (великі книги обробляються у фоні)"""
+    report = await duplicate_cache.get(current_user.id)
+    fresh = duplicate_cache.is_fresh(report) and not refresh
+    if not fresh and await duplicate_cache.claim(current_user.id):
+        total = await run_in_threadpool(db.get, models.ContactStat, (current_user.id, "total", ""))
+        if total is None or total.count <= DEDUP_SYNC_LIMIT:
+            try:
+                groups = await run_in_threadpool(find_owner_duplicates, db, current_user.id)
+            except Exception:
+                await duplicate_cache.release(current_user.id)
+                raise
+            report, fresh = await duplicate_cache.store(current_user.id, groups), True
+        else:
+            background_tasks.add_task(refresh_duplicates, db.get_bind(), current_user.id)
+
+    if report is None:
+        response.status_code = 202
+        return schemas.DuplicateReport(status="pending")
+    return schemas.DuplicateReport(
+        status="ready" if fresh else "stale",
+        computed_at=datetime.fromtimestamp(report.computed_at, timezone.utc),
+        total_groups=len(report.groups),
+        groups=[group._asdict() for group in report.groups[:limit]],
+    )
+
+
+@router.post("/merge", response_model=schemas.Contact)
+def merge_duplicate_contacts(
+    merge: schemas.ContactMerge,
+    current_user: models.User = Depends(get_current_verified_user),
+    db: Session = Depends(get_db)
+):
+    """Об'єднати дублікати в основний контакт і видалити їх"""
+    if merge.primary_id in merge.duplicate_ids:
+        raise HTTPException(status_code=400, detail="Основний контакт не може бути серед дублікатів")
+    ids = {merge.primary_id, *merge.duplicate_ids}
+    contacts = {
+        contact.id: contact
+        for contact in db.query(models.Contact).filter(models.Contact.owner_id == current_user.id, models.Contact.id.in_(ids))
+    }
+    if len(contacts) != len(ids):
+        raise HTTPException(status_code=404, detail="Контакт не знайдено")
+    duplicates = [contacts[contact_id] for contact_id in dict.fromkeys(merge.duplicate_ids)]
+    return merge_contacts(db, contacts[merge.primary_id], duplicates)
+
+
+def _contact_batch(db: Session, user_id: int, contact_ids: List[int]) -> schemas.ContactBatch:
+    ids = list(dict.fromkeys(contact_ids))
+    found = {contact.id: contact for contact in crud.get_user_contacts_by_ids(db, user_id, ids)}
+    return schemas.ContactBatch(
+        contacts=[found[contact_id] for contact_id in ids if contact_id in found],
+        missing=[contact_id for contact_id in ids if contact_id not in found],
+    )
+
+
+@router.get("/batch", response_model=schemas.ContactBatch)
+def read_contacts_batch(
+    ids: str = Query(..., description="ID контактів через кому (до 100), наприклад 1,2,3"),
+    current_user: models.User = Depends(get_current_verified_user),
+    db: Session = Depends(get_db)
+):
+    """Отримати контакти за списком ID одним запитом; відсутні ID повертаються в missing"""
+    try:
+        contact_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids має бути списком цілих чисел через кому")
+    if not 1 <= len(contact_ids) <= BATCH_GET_MAX_IDS:
+        raise HTTPException(status_code=422, detail=f"Кількість ids має бути від 1 до {BATCH_GET_MAX_IDS}")
+    return _contact_batch(db, current_user.id, contact_ids)
+
+
+@router.post("/batch", response_model=schemas.ContactBatch)
+def read_contacts_batch_post(
+    batch: schemas.ContactBatchRequest,
+    current_user: models.User = Depends(get_current_verified_user),
+    db: Session = Depends(get_db)
+):
+    """Те саме, що GET /contacts/batch, для довгих списків ID у тілі запиту"""
+    return _contact_batch(db, current_user.id, batch.ids)
+
+
+@router.get("/autocomplete", response_model=List[schemas.ContactSuggestion])
+def autocomplete_contacts(
+    q: str = Query(..., min_length=1, max_length=100, description="Початок імені, прізвища або email"),
+    limit: int = Query(10, ge=1, le=50, description="Максимальна кількість підказок"),
+    current_user: models.User = Depends(get_current_verified_user),
+    db: Session = Depends(get_db)
+):
+    """Підказки контактів за префіксом для автодоповнення"""
+    return [
+        {"id": contact_id, "display_name": f"{first_name} {last_name}", "email": email}
+        for contact_id, first_name, last_name, email in crud.autocomplete_user_contacts(db, current_user.id, q, limit)
+    ]
+
+
+@router.get("/by-phone/{number}", response_model=List[schemas.Contact])
+def read_contacts_by_phone(number: str, current_user: models.User = Depends(get_current_verified_user), db: Session = Depends(get_db)):
+    """Знайти контакти за номером телефону в будь-якому форматі (визначення абонента)"""
+    phone_e164 = to_e164(number)
+    if phone_e164 is None:
+        raise HTTPException(status_code=422, detail="Невірний номер телефону")
+    return crud.get_user_contacts_by_phone(db, current_user.id, phone_e164)
+
+
 @router.get("/{contact_id}", response_model=schemas.Contact)
 def read_contact(contact_id: int, current_user: models.User = Depends(get_current_verified_user), db: Session = Depends(get_db)):
     """Отримати контакт за ID"""
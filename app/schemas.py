@@ -2,7 +2,7 @@
 Pydantic схеми для валідації даних
 """
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -31,6 +31,7 @@ class UserResponse(UserBase):
     """Схема відповіді користувача"""
     id: int
     avatar_url: Optional[str] = None
+    avatar_variants: Optional[Dict[str, str]] = None
     is_active: bool
     is_verified: bool
     created_at: datetime
@@ -54,6 +55,9 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     """Дані токена"""
     email: Optional[str] = None
+    jti: Optional[str] = None
+    token_version: int = 0
+    expires_at: Optional[datetime] = None
 
 
 # Contact схеми з owner_id
@@ -86,11 +90,85 @@ class Contact(ContactBase):
     """Схема контакту з ідентифікатором"""
     id: int
     owner_id: int
+    phone_e164: Optional[str] = None
 
     class Config:
         from_attributes = True
 
 
+class ContactBatchRequest(BaseModel):
+    """Запит на отримання контактів за списком ID"""
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class ContactBatch(BaseModel):
+    """Контакти в порядку запиту та ID, яких не знайдено"""
+    contacts: List[Contact]
+    missing: List[int]
+
+
+class ContactSuggestion(BaseModel):
+    """Підказка автодоповнення контакту"""
+    id: int
+    display_name: str
+    email: str
+
+
+class ContactStats(BaseModel):
+    """Статистика контактів користувача"""
+    total: int
+    by_birth_month: Dict[int, int]
+    by_email_domain: Dict[str, int]
+    with_additional_info: int
+    without_additional_info: int
+
+
+class DuplicateGroup(BaseModel):
+    """Група схожих контактів"""
+    contact_ids: List[int]
+    score: float
+    reasons: List[str]
+
+
+class DuplicateReport(BaseModel):
+    """Результат пошуку дублікатів: ready, stale (оновлюється у фоні) або pending"""
+    status: str
+    computed_at: Optional[datetime] = None
+    total_groups: int = 0
+    groups: List[DuplicateGroup] = []
+
+
+class ContactMerge(BaseModel):
+    """Запит на об'єднання дублікатів в основний контакт"""
+    primary_id: int
+    duplicate_ids: List[int] = Field(..., min_length=1, max_length=100)
+
+
+class BatchSubRequest(BaseModel):
+    """Один підзапит пакета"""
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"]
+    url: str = Field(..., max_length=2000)
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    """Пакет підзапитів; atomic - усі зміни фіксуються разом або жодна"""
+    requests: List[BatchSubRequest] = Field(..., min_length=1, max_length=50)
+    atomic: bool = False
+
+
+class BatchSubResponse(BaseModel):
+    """Результат підзапиту пакета"""
+    status: int
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    """Результати підзапитів у порядку запиту"""
+    committed: bool
+    results: List[BatchSubResponse]
+
+
 class EmailVerificationRequest(BaseModel):
     """Запит на верифікацію email"""
     email: EmailStr
@@ -0,0 +1,131 @@
+"""
+Production-запуск API у кількох процесах.
+
+Кількість воркерів визначається за кількістю ядер (або WEB_CONCURRENCY),
+uvloop та httptools використовуються, якщо встановлені. Якщо доступний
+gunicorn, додаток завантажується один раз у майстер-процесі (preload) і
+воркери отримують його через fork; інакше використовується менеджер
+процесів uvicorn. Кожен воркер gunicorn має номер слоту WORKER_ID (0..N-1)
+для /health та метрик: воркер, перезапущений замість померлого, отримує
+його номер, тож серії метрик не множаться з кожним перезапуском.
+
+    poetry run serve
+"""
+import importlib.util
+import os
+from typing import Any, Dict
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+KEEP_ALIVE = int(os.getenv("KEEP_ALIVE", "5"))
+BACKLOG = int(os.getenv("BACKLOG", "2048"))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+APP_PATH = "app.main:app"
+
+
+def get_worker_id() -> str:
+    """Ідентифікатор поточного воркера (номер від serve або PID)"""
+    return os.getenv("WORKER_ID") or f"pid-{os.getpid()}"
+
+
+def worker_count() -> int:
+    """Кількість воркерів: WEB_CONCURRENCY або по одному на доступне ядро"""
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    # Формула 2 * ядра + 1 - для синхронних воркерів, що простоюють на I/O; асинхронний
+    # воркер uvicorn сам обслуговує багато запитів, тож зайві процеси лише ділять ядра
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def uvicorn_options() -> Dict[str, Any]:
+    """Параметри uvicorn: найшвидші доступні event loop та HTTP-парсер"""
+    return {
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+        "timeout_keep_alive": KEEP_ALIVE,
+        "backlog": BACKLOG,
+        "timeout_graceful_shutdown": GRACEFUL_TIMEOUT,
+        "proxy_headers": True,
+        "access_log": os.getenv("ACCESS_LOG", "false").lower() == "true",
+    }
+
+
+def _pre_fork(server, worker) -> None:
+    """У майстрі перед fork: найменший номер слоту, не зайнятий живими воркерами"""
+    used = {getattr(alive, "slot", None) for alive in server.WORKERS.values()}
+    worker.slot = next(slot for slot in range(len(used) + 1) if slot not in used)
+
+
+def _post_fork(server, worker) -> None:
+    """Після fork: номер слоту воркера та власні з'єднання з БД"""
+    from .database import engine
+
+    # worker.age лише зростає з кожним перезапуском, а слот перевикористовується
+    os.environ["WORKER_ID"] = str(worker.slot)
+    # З'єднання, відкриті в майстрі під час preload, не можна ділити між процесами
+    engine.dispose(close=False)
+
+
+def _run_gunicorn(workers: int) -> None:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    options = uvicorn_options()
+
+    class TunedUvicornWorker(UvicornWorker):
+        CONFIG_KWARGS = {
+            "loop": options["loop"],
+            "http": options["http"],
+            "proxy_headers": options["proxy_headers"],
+            "timeout_graceful_shutdown": options["timeout_graceful_shutdown"],
+        }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            settings = {
+                "bind": f"{HOST}:{PORT}",
+                "workers": workers,
+                "worker_class": TunedUvicornWorker,
+                "preload_app": True,
+                "keepalive": KEEP_ALIVE,
+                "backlog": BACKLOG,
+                "graceful_timeout": GRACEFUL_TIMEOUT,
+                "pre_fork": _pre_fork,
+                "post_fork": _post_fork,
+                "accesslog": "-" if options["access_log"] else None,
+            }
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from .main import app
+
+            return app
+
+    Application().run()
+
+
+def _run_uvicorn(workers: int) -> None:
+    import uvicorn
+
+    if workers == 1:
+        os.environ.setdefault("WORKER_ID", "0")
+    uvicorn.run(APP_PATH, host=HOST, port=PORT, workers=workers, **uvicorn_options())
+
+
+def main() -> None:
+    """Точка входу `serve`"""
+    workers = worker_count()
+    if workers > 1 and _available("gunicorn"):
+        _run_gunicorn(workers)
+    else:
+        _run_uvicorn(workers)
+
+
+if __name__ == "__main__":
+    main()
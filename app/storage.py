@@ -0,0 +1,94 @@
+"""
+Сховища для зображень аватарів: Cloudinary або локальна файлова система
+"""
+import os
+from pathlib import Path
+from typing import Optional, Protocol
+
+AVATAR_FOLDER = "contacts_api/avatars"
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+MEDIA_URL = os.getenv("MEDIA_URL", "/media")
+
+
+class AvatarStorage(Protocol):
+    """Інтерфейс сховища аватарів"""
+
+    def save(self, key: str, data: bytes) -> str:
+        """Зберегти JPEG під ключем `key` та повернути публічний URL"""
+
+    def delete(self, key: str) -> None:
+        """Видалити зображення за ключем"""
+
+
+class CloudinaryStorage:
+    """Зберігання аватарів у Cloudinary"""
+
+    def __init__(self, folder: str = AVATAR_FOLDER):
+        import cloudinary
+        import cloudinary.uploader
+
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+        )
+        self._uploader = cloudinary.uploader
+        self.folder = folder
+
+    def save(self, key: str, data: bytes) -> str:
+        result = self._uploader.upload(
+            data,
+            folder=self.folder,
+            public_id=key,
+            overwrite=True,
+            resource_type="image",
+        )
+        return result.get("secure_url")
+
+    def delete(self, key: str) -> None:
+        self._uploader.destroy(f"{self.folder}/{key}")
+
+
+class LocalStorage:
+    """Зберігання аватарів у локальній директорії (для розробки та тестів)"""
+
+    def __init__(self, root: Optional[str] = None, base_url: Optional[str] = None):
+        self.root = Path(root or Path(MEDIA_ROOT) / "avatars")
+        self.base_url = (base_url or f"{MEDIA_URL}/avatars").rstrip("/")
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.jpg"
+
+    def save(self, key: str, data: bytes) -> str:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+        return f"{self.base_url}/{key}.jpg"
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+
+_storage: Optional[AvatarStorage] = None
+
+
+def get_storage() -> AvatarStorage:
+    """Отримати сховище, вибране змінною середовища `AVATAR_STORAGE`"""
+    global _storage
+    if _storage is None:
+        backend = os.getenv("AVATAR_STORAGE", "cloudinary").lower()
+        if backend == "local":
+            _storage = LocalStorage()
+        elif backend == "cloudinary":
+            _storage = CloudinaryStorage()
+        else:
+            raise ValueError(f"Невідоме сховище аватарів: {backend}")
+    return _storage
+
+
+def set_storage(storage: Optional[AvatarStorage]) -> None:
+    """Встановити сховище явно (None - повернутися до налаштувань середовища)"""
+    global _storage
+    _storage = storage
@@ -0,0 +1,128 @@
+"""
+Розбивка часу обробки запиту за фазами та заголовок Server-Timing.
+
+Middleware відкриває для вибраних (sampling) запитів збирач часу в
+contextvar, а легкі хуки додають до нього фази: перевірка токена (auth),
+SQL-запити (db, хуки engine у database.py) та серіалізація відповіді
+(serialize). Решта часу до відправлення заголовків відповіді потрапляє в
+`other`. Час вкладених фаз віднімається від зовнішньої, тож сума фаз
+дорівнює загальному часу. Результат повертається клієнту в заголовку
+Server-Timing і накопичується в гістограмі `http_request_phase_seconds`
+(див. /metrics).
+"""
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .metrics import REGISTRY
+
+# Частка запитів, для яких збирається розбивка (0 - вимкнено)
+SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", "0.1"))
+
+_current: ContextVar[Optional["RequestTimings"]] = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Час фаз одного запиту з урахуванням вкладеності"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self._stack: List[List] = []
+
+    def enter(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self) -> None:
+        name, started, children = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed - children
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def finish(self) -> Dict[str, float]:
+        """Зафіксувати загальний час; все, що не потрапило у фази, - `other`"""
+        total = time.perf_counter() - self.started
+        measured = sum(self.phases.values())
+        result = dict(self.phases)
+        result["other"] = result.get("other", 0.0) + max(0.0, total - measured)
+        result["total"] = total
+        return result
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Виміряти фазу поточного запиту (без накладних витрат, якщо він не у вибірці)"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    timings.enter(name)
+    try:
+        yield
+    finally:
+        timings.exit()
+
+
+phase_seconds = REGISTRY.histogram(
+    "http_request_phase_seconds", "Час фаз обробки запиту (вибірка Server-Timing)", ("phase",)
+)
+
+
+def format_server_timing(durations: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in durations.items())
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware: збирає фази для вибірки запитів і додає Server-Timing"""
+
+    def __init__(self, app: ASGIApp, sample_rate: float = SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                durations = timings.finish()
+                for name, seconds in durations.items():
+                    phase_seconds.observe(seconds, phase=name)
+                MutableHeaders(scope=message).append("Server-Timing", format_server_timing(durations))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+
+
+def install_serialize_hook() -> None:
+    """Підключити хук фази serialize (фаза db вимірюється хуками engine в database.py)"""
+    import fastapi.routing
+
+    original = fastapi.routing.serialize_response
+    if getattr(original, "_timed", False):
+        return
+
+    # FastAPI не має точки розширення для серіалізації, тому обгортаємо
+    # функцію модуля, яку викликає обробник маршруту
+    async def serialize_response(*args, **kwargs):
+        with phase("serialize"):
+            return await original(*args, **kwargs)
+
+    serialize_response._timed = True
+    fastapi.routing.serialize_response = serialize_response
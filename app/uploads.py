@@ -0,0 +1,136 @@
+"""
+Потокове читання multipart-завантажень зображень з раннім відхиленням
+"""
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, Request
+from multipart.multipart import MultipartParser, parse_options_header
+
+# Запас на заголовки частин multipart та межі (boundary) понад розмір файлу
+MULTIPART_OVERHEAD = 16 * 1024
+SNIFF_BYTES = 12
+
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Визначити тип зображення за сигнатурою (magic bytes)"""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _not_an_image() -> HTTPException:
+    return HTTPException(status_code=400, detail="Файл повинен бути зображенням")
+
+
+class _ImagePartCollector:
+    """Збирає вміст файлової частини multipart, перевіряючи обмеження на льоту"""
+
+    def __init__(self, field_name: str, max_bytes: int, max_label: str):
+        self.field_name = field_name
+        self.max_bytes = max_bytes
+        self.max_label = max_label
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.header_field = b""
+        self.header_value = b""
+        self.in_file_part = False
+        self.found = False
+        self.sniffed = False
+        self.content_type: Optional[str] = None
+        self.data = bytearray()
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self.headers = []
+        self.in_file_part = False
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self.header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self.headers.append((self.header_field.lower(), self.header_value))
+        self.header_field = b""
+        self.header_value = b""
+
+    def on_headers_finished(self) -> None:
+        disposition = dict(self.headers).get(b"content-disposition", b"")
+        _, options = parse_options_header(disposition)
+        name = options.get(b"name", b"").decode("latin-1")
+        if name == self.field_name and b"filename" in options and not self.found:
+            self.in_file_part = True
+            self.found = True
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self.in_file_part:
+            return
+        self.data += data[start:end]
+        if len(self.data) > self.max_bytes:
+            raise HTTPException(status_code=400, detail=f"Файл занадто великий (макс. {self.max_label})")
+        if not self.sniffed and len(self.data) >= SNIFF_BYTES:
+            self.sniff()
+
+    def on_part_end(self) -> None:
+        if self.in_file_part and not self.sniffed:
+            self.sniff()
+        self.in_file_part = False
+
+    def sniff(self) -> None:
+        self.sniffed = True
+        self.content_type = sniff_image_type(bytes(self.data[:SNIFF_BYTES]))
+        if self.content_type is None:
+            raise _not_an_image()
+
+
+async def read_image_upload(request: Request, field_name: str, max_bytes: int, max_label: str) -> Tuple[bytes, str]:
+    """
+    Прочитати файл зображення з multipart-тіла запиту.
+
+    Тіло читається потоково: читання припиняється, щойно файл перевищує
+    `max_bytes` або перші байти не відповідають жодному формату зображень,
+    тож відхилений запит не буферизується ні в пам'яті, ні на диску.
+    Повертає вміст файлу та визначений за сигнатурою MIME-тип.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Очікується multipart/form-data")
+    too_large = HTTPException(status_code=400, detail=f"Файл занадто великий (макс. {max_label})")
+    body_limit = max_bytes + MULTIPART_OVERHEAD
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > body_limit:
+        raise too_large
+
+    collector = _ImagePartCollector(field_name, max_bytes, max_label)
+    parser = MultipartParser(boundary, collector.callbacks())
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > body_limit:
+            raise too_large
+        parser.write(chunk)
+    parser.finalize()
+
+    if not collector.found:
+        raise HTTPException(status_code=422, detail=f"Поле '{field_name}' з файлом обов'язкове")
+    return bytes(collector.data), collector.content_type
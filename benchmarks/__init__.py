@@ -0,0 +1,5 @@
+"""
+Бенчмарки endpoint'ів API з порівнянням з базовими результатами.
+
+    python -m benchmarks.run --sizes 1k,100k --transport both
+"""
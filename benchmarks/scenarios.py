@@ -0,0 +1,96 @@
+"""
+Сценарії бенчмарку: який запит відправляти на i-й ітерації.
+"""
+import uuid
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from .seed import BENCH_PASSWORD
+
+RequestSpec = Dict[str, Any]
+
+
+class Scenario(NamedTuple):
+    name: str
+    # Частка від базової кількості запитів (bcrypt робить login/register повільними)
+    weight: float
+    build: Callable[[int, "BenchContext"], RequestSpec]
+
+
+class BenchContext:
+    """Дані, спільні для сценаріїв одного прогону"""
+
+    def __init__(self, token: str, user_email: str, contact_ids: List[int], search: str):
+        self.token = token
+        self.user_email = user_email
+        self.contact_ids = contact_ids
+        self.search = search
+        self.new_run()
+
+    def new_run(self) -> None:
+        """Новий префікс для email/username, щоб повторні прогони не конфліктували"""
+        self.run_id = uuid.uuid4().hex[:8]
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+def _request(method: str, url: str, json: Optional[dict] = None, headers: Optional[dict] = None) -> RequestSpec:
+    return {"method": method, "url": url, "json": json, "headers": headers or {}}
+
+
+def _register(i: int, ctx: BenchContext) -> RequestSpec:
+    name = f"reg{ctx.run_id}{i}"
+    return _request("POST", "/api/v1/auth/register", {
+        "username": name,
+        "email": f"{name}@bench.example.com",
+        "password": BENCH_PASSWORD,
+    })
+
+
+def _login(i: int, ctx: BenchContext) -> RequestSpec:
+    return _request("POST", "/api/v1/auth/login", {"email": ctx.user_email, "password": BENCH_PASSWORD})
+
+
+def _list(i: int, ctx: BenchContext) -> RequestSpec:
+    return _request("GET", f"/api/v1/contacts/?skip={(i * 100) % 1000}&limit=100", headers=ctx.headers)
+
+
+def _search(i: int, ctx: BenchContext) -> RequestSpec:
+    return _request("GET", f"/api/v1/contacts/?search={ctx.search}&limit=50", headers=ctx.headers)
+
+
+def _autocomplete(i: int, ctx: BenchContext) -> RequestSpec:
+    # Як у полі вводу: префікс довжиною від 1 до повного слова
+    prefix = ctx.search[: 1 + i % len(ctx.search)]
+    return _request("GET", f"/api/v1/contacts/autocomplete?q={prefix}&limit=10", headers=ctx.headers)
+
+
+def _birthdays(i: int, ctx: BenchContext) -> RequestSpec:
+    return _request("GET", "/api/v1/contacts/birthdays", headers=ctx.headers)
+
+
+def _create(i: int, ctx: BenchContext) -> RequestSpec:
+    return _request("POST", "/api/v1/contacts/", {
+        "first_name": "Бенч",
+        "last_name": "Тестовий",
+        "email": f"new{ctx.run_id}{i}@bench.example.com",
+        "phone": "+380501234567",
+        "birthday": "1990-01-01",
+    }, ctx.headers)
+
+
+def _update(i: int, ctx: BenchContext) -> RequestSpec:
+    contact_id = ctx.contact_ids[i % len(ctx.contact_ids)]
+    return _request("PUT", f"/api/v1/contacts/{contact_id}", {"additional_info": f"update {ctx.run_id} {i}"}, ctx.headers)
+
+
+SCENARIOS = [
+    Scenario("register", 0.1, _register),
+    Scenario("login", 0.1, _login),
+    Scenario("list", 1.0, _list),
+    Scenario("search", 1.0, _search),
+    Scenario("autocomplete", 1.0, _autocomplete),
+    Scenario("birthdays", 1.0, _birthdays),
+    Scenario("create", 0.5, _create),
+    Scenario("update", 0.5, _update),
+]
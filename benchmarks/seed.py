@@ -0,0 +1,29 @@
+"""
+Наповнення бази для бенчмарків генератором з scripts/seed_data.py.
+"""
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from app.database import Base
+from app.models import Contact
+from scripts.seed_data import DEFAULT_PASSWORD, seed_database
+
+BENCH_PASSWORD = DEFAULT_PASSWORD
+
+
+def users_for(contacts: int) -> int:
+    """Кількість користувачів для заданої кількості контактів"""
+    return max(10, contacts // 200)
+
+
+def seeded_contacts(engine: Engine) -> int:
+    """Скільки контактів вже є в базі (0, якщо схеми ще немає)"""
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(Contact)).scalar_one()
+
+
+def seed(engine: Engine, contacts: int) -> None:
+    """Перестворити схему та згенерувати користувачів і контакти з перекосом"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    seed_database(engine, users_for(contacts), contacts, prefix="bench")
@@ -0,0 +1,102 @@
+"""
+Бенчмарк реєстрації: пропускна здатність, p50/p99 та кількість SQL-запитів
+на одну реєстрацію при паралельних клієнтах.
+
+Запити йдуть через ASGI-транспорт в одному event loop, тож блокування loop
+(наприклад, bcrypt поза threadpool) одразу видно як падіння пропускної
+здатності зі зростанням --concurrency.
+
+    python -m benchmarks.signup --requests 200 --concurrency 16
+    python -m benchmarks.signup --bcrypt-rounds 4   # без домінування bcrypt: видно шлях до БД
+    python -m benchmarks.signup --db postgres
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from .run import database_url, make_engine, summarize
+from .seed import BENCH_PASSWORD
+
+
+async def _signups(app, total: int, concurrency: int) -> dict:
+    import httpx
+
+    run_id = uuid.uuid4().hex[:8]
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                name = f"signup{run_id}{i}"
+                started = time.perf_counter()
+                response = await client.post("/api/v1/auth/register", json={
+                    "username": name, "email": f"{name}@bench.example.com", "password": BENCH_PASSWORD,
+                })
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 201
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def run(url: str, total: int, concurrency: int, bcrypt_rounds: Optional[int] = None) -> dict:
+    from app import auth
+    from app.database import Base, get_session
+    from app.main import app
+
+    if bcrypt_rounds is not None:
+        auth.BCRYPT_ROUNDS = bcrypt_rounds
+        auth.get_pwd_context.cache_clear()
+
+    engine = make_engine(url)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    statements = {"count": 0}
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements["count"] += 1
+
+    def override_get_session():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_session] = override_get_session
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        result = asyncio.run(_signups(app, total, concurrency))
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+        app.dependency_overrides.pop(get_session, None)
+        engine.dispose()
+    result["statements_per_signup"] = round(statements["count"] / total, 2) if total else 0.0
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк реєстрації користувачів")
+    parser.add_argument("--db", choices=["sqlite", "postgres"], default="sqlite")
+    parser.add_argument("--requests", type=int, default=100, help="Кількість реєстрацій")
+    parser.add_argument("--concurrency", type=int, default=8, help="Паралельних клієнтів")
+    parser.add_argument("--bcrypt-rounds", type=int, help="Вартість bcrypt (за замовчуванням BCRYPT_ROUNDS)")
+    args = parser.parse_args(argv)
+
+    result = run(database_url(args.db, "signup"), args.requests, args.concurrency, args.bcrypt_rounds)
+    print(json.dumps({"register": result}, indent=2))
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
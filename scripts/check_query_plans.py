@@ -0,0 +1,303 @@
+"""
+Перевірка планів виконання запитів, які генерують функції crud.
+
+Скрипт мігрує та наповнює базу (за замовчуванням тимчасову SQLite), викликає
+кожну функцію crud в транзакції, що потім відкочується, перехоплює
+згенеровані SQL-запити та виконує для них EXPLAIN (SQLite `EXPLAIN QUERY
+PLAN`, PostgreSQL `EXPLAIN (FORMAT JSON)` з вимкненим seq scan). Якщо
+будь-який запит повністю сканує `contacts` або `users`, скрипт завершується
+з кодом 1 і пропонує індекси; з `--write-migration` створює міграцію Alembic.
+
+    python scripts/check_query_plans.py
+    python scripts/check_query_plans.py --database-url postgresql://... --write-migration
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Додаємо app директорію до Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine, event, func, inspect, select  # noqa: E402
+from sqlalchemy.engine import Connection, Engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import crud, models, schemas  # noqa: E402
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+WATCHED_TABLES = ("contacts", "users")
+SEED_USERS = 50
+SEED_CONTACTS = 5_000
+
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+class CapturedQuery(NamedTuple):
+    function: str
+    statement: str
+    parameters: object
+
+
+class PlanIssue(NamedTuple):
+    function: str
+    table: str
+    statement: str
+    plan: str
+
+
+def make_engine(url: str) -> Engine:
+    """Engine, в якому транзакції та SAVEPOINT працюють і для SQLite"""
+    engine = create_engine(url)
+    if engine.dialect.name == "sqlite":
+        # pysqlite сам керує транзакціями і ламає SAVEPOINT; передаємо керування SQLAlchemy
+        @event.listens_for(engine, "connect")
+        def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def _begin(connection):
+            connection.exec_driver_sql("BEGIN")
+    return engine
+
+
+def migrate(engine: Engine) -> None:
+    """Застосувати міграції Alembic до цієї бази"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(PROJECT_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(PROJECT_ROOT / "alembic"))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
+
+def seed_if_empty(engine: Engine) -> None:
+    from scripts.seed_data import seed_database
+
+    with engine.connect() as connection:
+        contacts = connection.execute(select(func.count()).select_from(models.Contact)).scalar_one()
+    if not contacts:
+        seed_database(engine, SEED_USERS, SEED_CONTACTS, workers=1, prefix="plan")
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+
+
+def crud_calls(db: Session) -> Iterator[Tuple[str, Callable[[], object]]]:
+    """Виклики всіх функцій crud з реалістичними аргументами"""
+    user = db.scalars(select(models.User).order_by(models.User.id).limit(1)).one()
+    contact = db.scalars(select(models.Contact).where(models.Contact.owner_id == user.id).limit(1)).one()
+    suffix = uuid.uuid4().hex[:8]
+    new_user = schemas.UserCreate(username=f"plan{suffix}", email=f"plan{suffix}@example.com", password="password123")
+    new_contact = schemas.ContactCreate(
+        first_name="План", last_name="Перевірка", email=f"plan{suffix}@example.com",
+        phone="+380501234567", birthday="1990-01-01",
+    )
+    holder = {}
+
+    def register_user():
+        db_user, token = crud.register_user(db, new_user, "plan-hash")
+        # register_user повертає від'єднаного користувача; наступні виклики змінюють його в сесії
+        holder.update(user=db.merge(db_user, load=False), token=token)
+
+    yield "get_user_by_email", lambda: crud.get_user_by_email(db, user.email)
+    yield "get_user_by_username", lambda: crud.get_user_by_username(db, user.username)
+    yield "authenticate_user", lambda: crud.authenticate_user(db, user.email, "password123")
+    yield "register_user", register_user
+    yield "update_user", lambda: crud.update_user(db, holder["user"], schemas.UserUpdate(first_name="План"))
+    yield "set_user_avatar", lambda: crud.set_user_avatar(db, holder["user"], "http://avatar", "0" * 64, {})
+    yield "add_avatar_variants", lambda: crud.add_avatar_variants(db, holder["user"].id, "0" * 64, {"64": "http://a"})
+    yield "create_verification_token", lambda: holder.setdefault("token", crud.create_verification_token(db, holder["user"].id))
+    yield "verify_email_token", lambda: crud.verify_email_token(db, holder["token"])
+    yield "get_user_contacts", lambda: crud.get_user_contacts(db, user.id, limit=20)
+    yield "get_user_contacts(search)", lambda: crud.get_user_contacts(db, user.id, search=contact.last_name[:3])
+    yield "autocomplete_user_contacts", lambda: crud.autocomplete_user_contacts(db, user.id, contact.last_name[:2])
+    yield "get_user_contacts_by_phone", lambda: crud.get_user_contacts_by_phone(db, user.id, contact.phone_e164)
+    yield "get_user_contacts_by_ids", lambda: crud.get_user_contacts_by_ids(db, user.id, [contact.id, contact.id + 1])
+    yield "get_user_contact", lambda: crud.get_user_contact(db, user.id, contact.id)
+    yield "create_user_contact", lambda: crud.create_user_contact(db, new_contact, user.id)
+    yield "get_user_upcoming_birthdays", lambda: crud.get_user_upcoming_birthdays(db, user.id)
+
+
+def capture_crud_queries(connection: Connection) -> List[CapturedQuery]:
+    """Виконати функції crud і зібрати всі SELECT/UPDATE/DELETE, які вони згенерували"""
+    captured: List[CapturedQuery] = []
+    current = {"function": None}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current["function"] and statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE"):
+            if executemany:
+                parameters = parameters[0]
+            captured.append(CapturedQuery(current["function"], statement, parameters))
+
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        for name, call in crud_calls(db):
+            current["function"] = name
+            call()
+            current["function"] = None
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+        db.close()
+    return captured
+
+
+def _postgres_scans(node: dict) -> Iterator[str]:
+    if node.get("Node Type") == "Seq Scan":
+        yield node.get("Relation Name")
+    for child in node.get("Plans", []):
+        yield from _postgres_scans(child)
+
+
+def explain(connection: Connection, query: CapturedQuery) -> Tuple[List[str], str]:
+    """Таблиці, які запит сканує повністю, та текст плану"""
+    if connection.dialect.name == "postgresql":
+        rows = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {query.statement}", query.parameters).all()
+        plan = rows[0][0]
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        return list(_postgres_scans(plan[0]["Plan"])), json.dumps(plan[0]["Plan"], indent=1)
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {query.statement}", query.parameters).all()
+    details = [row[-1] for row in rows]
+    scans = []
+    for detail in details:
+        match = _SQLITE_SCAN.match(detail)
+        # "SCAN t USING COVERING INDEX" теж читає весь індекс, тож це повне сканування
+        if match:
+            scans.append(match.group(1))
+    return scans, "\n".join(details)
+
+
+def check_plans(engine: Engine) -> List[PlanIssue]:
+    """Зібрати запити crud і повернути ті, що повністю сканують великі таблиці"""
+    issues = []
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            if connection.dialect.name == "postgresql":
+                # На малих таблицях планувальник обирає seq scan навіть за наявності індексу
+                connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            for query in capture_crud_queries(connection):
+                scans, plan = explain(connection, query)
+                for table in scans:
+                    if table in WATCHED_TABLES:
+                        issues.append(PlanIssue(query.function, table, query.statement, plan))
+        finally:
+            transaction.rollback()
+    return issues
+
+
+def suggest_indexes(engine: Engine, issues: List[PlanIssue]) -> List[Tuple[str, str]]:
+    """Пари (таблиця, колонка) для індексів за умовами WHERE проблемних запитів"""
+    inspector = inspect(engine)
+    suggestions = []
+    for issue in issues:
+        indexed = {index["column_names"][0] for index in inspector.get_indexes(issue.table)}
+        indexed.update(inspector.get_pk_constraint(issue.table)["constrained_columns"])
+        where = issue.statement.split("WHERE", 1)[-1] if "WHERE" in issue.statement else ""
+        for column in re.findall(rf"\b{issue.table}\.(\w+)\s*(?:=|IN\b)", where):
+            if column not in indexed and (issue.table, column) not in suggestions:
+                suggestions.append((issue.table, column))
+                break
+    return suggestions
+
+
+MIGRATION_TEMPLATE = '''"""{message}
+
+Revision ID: {revision}
+Revises: {down_revision}
+Create Date: {created}
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '{revision}'
+down_revision = {down_revision!r}
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+{upgrade}
+
+
+def downgrade() -> None:
+{downgrade}
+'''
+
+
+def write_migration(indexes: List[Tuple[str, str]], versions_dir: Optional[Path] = None) -> Path:
+    """Створити міграцію Alembic з індексами для запропонованих колонок"""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(str(PROJECT_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(PROJECT_ROOT / "alembic"))
+    head = ScriptDirectory.from_config(config).get_current_head()
+    revision = uuid.uuid4().hex[:12]
+    message = "add indexes for " + ", ".join(f"{table}.{column}" for table, column in indexes)
+    upgrade = "\n".join(
+        f"    op.create_index(op.f('ix_{table}_{column}'), '{table}', ['{column}'], unique=False)"
+        for table, column in indexes
+    )
+    downgrade = "\n".join(
+        f"    op.drop_index(op.f('ix_{table}_{column}'), table_name='{table}')" for table, column in reversed(indexes)
+    )
+    slug = re.sub(r"\W+", "_", message)[:40].strip("_")
+    path = (versions_dir or PROJECT_ROOT / "alembic" / "versions") / f"{revision}_{slug}.py"
+    path.write_text(MIGRATION_TEMPLATE.format(
+        message=message, revision=revision, down_revision=head,
+        created=datetime.now().isoformat(sep=" "), upgrade=upgrade, downgrade=downgrade,
+    ))
+    return path
+
+
+def prepare_database(url: Optional[str]) -> Engine:
+    """Engine для перевірки; без URL - тимчасова SQLite з міграціями та даними"""
+    if url is None:
+        url = f"sqlite:///{Path(tempfile.mkdtemp()) / 'query_plans.db'}"
+    engine = make_engine(url)
+    migrate(engine)
+    seed_if_empty(engine)
+    return engine
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Перевірка планів запитів crud на повні сканування")
+    parser.add_argument("--database-url", default=None, help="База для перевірки (за замовчуванням тимчасова SQLite)")
+    parser.add_argument("--write-migration", action="store_true", help="Створити міграцію з відсутніми індексами")
+    parser.add_argument("--verbose", action="store_true", help="Показати плани проблемних запитів")
+    args = parser.parse_args()
+
+    engine = prepare_database(args.database_url)
+    issues = check_plans(engine)
+    if not issues:
+        print(f"✅ Жоден запит crud не сканує повністю {', '.join(WATCHED_TABLES)} ({engine.dialect.name})")
+        return 0
+
+    print(f"❌ Повні сканування таблиць ({engine.dialect.name}):")
+    for issue in issues:
+        print(f"  {issue.function}: {issue.table}")
+        if args.verbose:
+            print(f"    {issue.statement}\n    {issue.plan}")
+    suggestions = suggest_indexes(engine, issues)
+    for table, column in suggestions:
+        print(f"  Пропонований індекс: {table}({column})")
+    if args.write_migration and suggestions:
+        print(f"📝 Міграцію створено: {write_migration(suggestions)}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
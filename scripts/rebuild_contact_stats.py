@@ -0,0 +1,60 @@
+"""
+Перерахунок таблиці contact_stats з нуля та перевірка її узгодженості.
+
+Спочатку порівнює збережені лічильники з порахованими з таблиці contacts і
+виводить розбіжності; без `--verify-only` перераховує таблицю та перевіряє
+ще раз. Код виходу 1, якщо після виконання лишилися розбіжності (або, з
+`--verify-only`, якщо вони знайдені).
+
+    python scripts/rebuild_contact_stats.py
+    python scripts/rebuild_contact_stats.py --verify-only
+"""
+import argparse
+import os
+import sys
+
+# Додаємо app директорію до Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine  # noqa: E402
+
+from app.contact_stats import rebuild_contact_stats, verify_contact_stats  # noqa: E402
+from app.database import DATABASE_URL  # noqa: E402
+
+
+def report(mismatches: dict, limit: int = 20) -> None:
+    for (owner_id, dimension, key), (stored, actual) in sorted(mismatches.items())[:limit]:
+        print(f"  user {owner_id} {dimension}={key!r}: збережено {stored}, фактично {actual}")
+    if len(mismatches) > limit:
+        print(f"  ... та ще {len(mismatches) - limit}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Перерахунок та перевірка статистики контактів")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--verify-only", action="store_true", help="Лише перевірити, нічого не змінюючи")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    with engine.begin() as connection:
+        mismatches = verify_contact_stats(connection)
+        if mismatches:
+            print(f"⚠️ Розбіжностей у contact_stats: {len(mismatches)}")
+            report(mismatches)
+        else:
+            print("✅ contact_stats відповідає таблиці contacts")
+        if args.verify_only:
+            return 1 if mismatches else 0
+
+        rows = rebuild_contact_stats(connection)
+        mismatches = verify_contact_stats(connection)
+    if mismatches:
+        print(f"❌ Після перерахунку лишилися розбіжності: {len(mismatches)}")
+        report(mismatches)
+        return 1
+    print(f"✅ contact_stats перераховано: {rows} лічильників")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
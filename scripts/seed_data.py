@@ -1,69 +1,293 @@
 """
 Скрипт для створення тестових даних з використанням Faker
+
+Створює M користувачів та в середньому N контактів на користувача з
+реалістичним перекосом (у небагатьох користувачів дуже багато контактів).
+Рядки генеруються паралельно в пулі процесів і записуються частинами:
+у PostgreSQL - через COPY безпосередньо з воркерів, в інших СУБД - через
+Core `insert()` з основного процесу. Усі користувачі отримують один пароль,
+тому bcrypt виконується лише один раз.
+
+    python scripts/seed_data.py --users 10000 --contacts-per-user 1000 --reset
 """
-import sys
+import argparse
+import csv
+import io
 import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import date, timedelta
-from faker import Faker
-from sqlalchemy.orm import Session
+from typing import Iterator, List, Optional, Sequence, Tuple
 
 # Додаємо app директорію до Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from app.database import SessionLocal, engine, Base
-from app.models import Contact
+from sqlalchemy import create_engine, delete, func, insert, select  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+from app.auth import get_password_hash  # noqa: E402
+from app.contact_stats import rebuild_contact_stats  # noqa: E402
+from app.database import DATABASE_URL  # noqa: E402
+from app.models import Contact, ContactStat, EmailVerification, RevokedToken, User  # noqa: E402
+
+DEFAULT_PASSWORD = "password123"
+CHUNK_SIZE = 20_000
+# Скільки контактів генерує один таск пулу процесів
+TASK_SIZE = 200_000
+POOL_SIZE = 2_000
+# Обмеження перекосу: не більше ніж у стільки разів від середнього на користувача
+MAX_SKEW_RATIO = 100
 
-# Створюємо таблиці якщо вони не існують
-Base.metadata.create_all(bind=engine)
+CONTACT_COLUMNS = (
+    "first_name", "last_name", "email", "phone", "phone_e164", "birthday", "additional_info",
+    "first_name_lower", "last_name_lower", "email_lower", "owner_id",
+)
+PHONE_PREFIXES = ("50", "63", "66", "67", "68", "73", "93", "95", "96", "97", "98", "99")
 
-def create_test_contacts(count: int = 20):
+ContactRow = Tuple[str, str, str, str, str, date, Optional[str], str, str, str, int]
+
+
+def contact_counts(users: int, total: int, skew: float, seed: int) -> List[int]:
     """
-    Створити тестові контакти з використанням Faker
+    Розподілити `total` контактів між користувачами за розподілом Парето.
+
+    Менший `skew` - сильніший перекос; сума завжди дорівнює `total`.
     """
-    fake = Faker('uk_UA')  # Український локаль
-    db = SessionLocal()
-    
-    try:
-        # Очищуємо існуючі контакти
-        db.query(Contact).delete()
-        db.commit()
-        
-        contacts = []
-        for i in range(count):
-            # Генеруємо дату народження (від 18 до 80 років)
-            birthday = fake.date_of_birth(minimum_age=18, maximum_age=80)
-            
-            # Деякі контакти матимуть дні народження на найближчі 7 днів
-            if i < 3:  # Перші 3 контакти
-                today = date.today()
-                birthday = today + timedelta(days=fake.random_int(min=1, max=7))
-                birthday = birthday.replace(year=birthday.year - fake.random_int(min=20, max=50))
-            
-            contact = Contact(
-                first_name=fake.first_name(),
-                last_name=fake.last_name(),
-                email=fake.unique.email(),
-                phone=fake.phone_number(),
-                birthday=birthday,
-                additional_info=fake.text(max_nb_chars=200) if fake.boolean(chance_of_getting_true=60) else None
+    rng = random.Random(seed)
+    weights = [min(rng.paretovariate(skew), MAX_SKEW_RATIO) for _ in range(users)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    remainders = sorted(range(users), key=lambda i: weights[i] * scale - counts[i], reverse=True)
+    for i in remainders[: total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+class _Pools:
+    """Заздалегідь згенеровані Faker значення, які комбінуються випадково"""
+
+    def __init__(self, seed: int):
+        from faker import Faker
+
+        fake_uk, fake_en = Faker("uk_UA"), Faker("en_US")
+        fake_uk.seed_instance(seed)
+        fake_en.seed_instance(seed)
+        self.first_names = [fake_uk.first_name() for _ in range(POOL_SIZE)]
+        self.last_names = [fake_uk.last_name() for _ in range(POOL_SIZE)]
+        self.logins = [fake_en.user_name() for _ in range(POOL_SIZE)]
+        self.domains = [fake_en.free_email_domain() for _ in range(50)]
+        self.notes = [fake_uk.text(max_nb_chars=200) for _ in range(POOL_SIZE // 4)]
+
+
+def generate_contacts(owners: Sequence[Tuple[int, int]], first_index: int, seed: int) -> Iterator[ContactRow]:
+    """Рядки контактів для пар (owner_id, кількість); email унікальні за індексом"""
+    rng = random.Random(seed)
+    pools = _Pools(seed)
+    today = date.today()
+    index = first_index
+    for owner_id, count in owners:
+        for _ in range(count):
+            # ~2% контактів мають день народження на найближчому тижні
+            if rng.random() < 0.02:
+                upcoming = today + timedelta(days=rng.randint(1, 7))
+                birthday = upcoming.replace(year=upcoming.year - rng.randint(20, 60))
+            else:
+                birthday = today - timedelta(days=rng.randint(18 * 365, 80 * 365))
+            # Згенеровані номери вже у форматі E.164, тож phone_e164 збігається з phone
+            phone = f"+380{rng.choice(PHONE_PREFIXES)}{rng.randrange(10_000_000):07d}"
+            first_name, last_name = rng.choice(pools.first_names), rng.choice(pools.last_names)
+            email = f"{rng.choice(pools.logins)}.{index}@{rng.choice(pools.domains)}"
+            yield (
+                first_name,
+                last_name,
+                email,
+                phone,
+                phone,
+                birthday,
+                rng.choice(pools.notes) if rng.random() < 0.6 else None,
+                first_name.lower(),
+                last_name.lower(),
+                email.lower(),
+                owner_id,
             )
-            contacts.append(contact)
-        
-        # Додаємо всі контакти в базу
-        db.add_all(contacts)
-        db.commit()
-        
-        print(f"✅ Створено {count} тестових контактів")
-        
-        # Виводимо статистику
-        total_contacts = db.query(Contact).count()
-        print(f"📊 Загальна кількість контактів в базі: {total_contacts}")
-        
-    except Exception as e:
-        print(f"❌ Помилка при створенні тестових даних: {e}")
-        db.rollback()
+            index += 1
+
+
+def _copy_chunk(raw_connection, rows: List[ContactRow]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["\\N" if value is None else value for value in row])
+    buffer.seek(0)
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY contacts ({', '.join(CONTACT_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+        )
+    raw_connection.commit()
+
+
+def _chunks(rows: Iterator[ContactRow], size: int) -> Iterator[List[ContactRow]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _task(database_url: Optional[str], owners, first_index: int, seed: int, chunk_size: int):
+    """
+    Таск пулу: згенерувати контакти і записати через COPY (якщо передано
+    database_url PostgreSQL) або повернути рядки основному процесу
+    """
+    rows = generate_contacts(owners, first_index, seed)
+    if database_url is None:
+        return list(rows)
+    engine = create_engine(database_url, poolclass=NullPool)
+    raw_connection = engine.raw_connection()
+    written = 0
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            _copy_chunk(raw_connection, chunk)
+            written += len(chunk)
     finally:
-        db.close()
+        raw_connection.close()
+        engine.dispose()
+    return written
+
+
+def _insert_contacts(engine: Engine, rows: List[ContactRow], chunk_size: int) -> None:
+    for chunk in _chunks(iter(rows), chunk_size):
+        with engine.begin() as connection:
+            connection.execute(insert(Contact), [dict(zip(CONTACT_COLUMNS, row)) for row in chunk])
+
+
+def create_users(engine: Engine, count: int, prefix: str, password: str = DEFAULT_PASSWORD) -> List[int]:
+    """Створити користувачів одним bulk insert; повертає їхні id"""
+    hashed_password = get_password_hash(password)
+    rows = [
+        {
+            "username": f"{prefix}{i}",
+            "email": f"{prefix}{i}@example.com",
+            "hashed_password": hashed_password,
+            "first_name": "Seed",
+            "last_name": f"User{i}",
+            "is_active": True,
+            "is_verified": True,
+        }
+        for i in range(1, count + 1)
+    ]
+    with engine.begin() as connection:
+        last_id = connection.execute(select(func.max(User.id))).scalar() or 0
+        for chunk in _chunks(iter(rows), CHUNK_SIZE):
+            connection.execute(insert(User), chunk)
+        return connection.execute(
+            select(User.id).where(User.id > last_id, User.username.like(f"{prefix}%")).order_by(User.id)
+        ).scalars().all()
+
+
+def reset_data(engine: Engine) -> None:
+    """Видалити всі контакти, токени верифікації, відкликані токени та користувачів"""
+    with engine.begin() as connection:
+        connection.execute(delete(Contact))
+        connection.execute(delete(ContactStat))
+        connection.execute(delete(EmailVerification))
+        connection.execute(delete(RevokedToken))
+        connection.execute(delete(User))
+
+
+def seed_database(
+    engine: Engine,
+    users: int,
+    total_contacts: int,
+    skew: float = 1.5,
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    seed: int = 42,
+    prefix: str = "seed",
+) -> Tuple[List[int], List[int]]:
+    """
+    Створити користувачів та контакти; повертає (id користувачів, кількість контактів кожного)
+    """
+    user_ids = create_users(engine, users, prefix)
+    counts = contact_counts(len(user_ids), total_contacts, skew, seed)
+    owners = list(zip(user_ids, counts))
+
+    tasks, batch, batch_size, first_index = [], [], 0, 0
+    for owner_id, count in owners:
+        batch.append((owner_id, count))
+        batch_size += count
+        if batch_size >= TASK_SIZE:
+            tasks.append((batch, first_index))
+            first_index += batch_size
+            batch, batch_size = [], 0
+    if batch:
+        tasks.append((batch, first_index))
+
+    copy_url = engine.url.render_as_string(hide_password=False) if engine.dialect.name == "postgresql" else None
+    workers = workers or os.cpu_count() or 1
+
+    def store(finished) -> None:
+        for future in finished:
+            result = future.result()
+            if copy_url is None:
+                _insert_contacts(engine, result, chunk_size)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Обмежене вікно задач: без PostgreSQL результати - це рядки контактів, тож
+        # у пам'яті тримаються лише ті, що ще не записані
+        in_flight = set()
+        for number, (task_owners, task_first) in enumerate(tasks):
+            if len(in_flight) >= 2 * workers:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                store(finished)
+            in_flight.add(pool.submit(_task, copy_url, task_owners, task_first, seed + number, chunk_size))
+        while in_flight:
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            store(finished)
+    # COPY та Core insert минають слухачі сесії, тому статистику рахуємо окремо
+    with engine.begin() as connection:
+        for start in range(0, len(user_ids), 1_000):
+            rebuild_contact_stats(connection, user_ids[start:start + 1_000])
+    return user_ids, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерація тестових користувачів та контактів")
+    parser.add_argument("--users", type=int, default=10, help="Кількість користувачів")
+    parser.add_argument("--contacts-per-user", type=int, default=20, help="Середня кількість контактів на користувача")
+    parser.add_argument("--skew", type=float, default=1.5, help="Параметр Парето: менше значення - більший перекос")
+    parser.add_argument("--workers", type=int, default=None, help="Процесів генерації (за замовчуванням - ядра)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Рядків в одному insert/COPY")
+    parser.add_argument("--seed", type=int, default=42, help="Seed генератора випадкових чисел")
+    parser.add_argument("--prefix", default="seed", help="Префікс username/email користувачів")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--reset", action="store_true", help="Видалити наявні дані перед генерацією")
+    args = parser.parse_args()
+    if args.users < 1:
+        parser.error("--users має бути не менше 1")
+
+    engine = create_engine(args.database_url)
+    if args.reset:
+        reset_data(engine)
+
+    total = args.users * args.contacts_per_user
+    started = time.perf_counter()
+    user_ids, counts = seed_database(
+        engine, args.users, total, args.skew, args.workers, args.chunk_size, args.seed, args.prefix
+    )
+    elapsed = time.perf_counter() - started
+    print(f"✅ Створено {len(user_ids)} користувачів та {total} контактів за {elapsed:.1f} с "
+          f"({total / max(elapsed, 1e-9):,.0f} рядків/с)")
+    ordered = sorted(counts, reverse=True)
+    print(f"📊 Контактів на користувача: макс {ordered[0]}, медіана {ordered[len(ordered) // 2]}, "
+          f"мін {ordered[-1]}; пароль усіх користувачів: {DEFAULT_PASSWORD}")
+
 
 if __name__ == "__main__":
-    create_test_contacts()
\ No newline at end of file
+    main()
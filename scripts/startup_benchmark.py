@@ -0,0 +1,98 @@
+"""
+Бенчмарк часу старту воркера: імпорт app.main та виконання lifespan.
+
+Кожен замір виконується в окремому процесі (холодний імпорт). Додатково
+один запуск з `-X importtime` дає розбивку часу імпорту за пакетами.
+
+    python scripts/startup_benchmark.py --runs 5 --top 15
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+PROJECT_ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def run_lifespan():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(run_lifespan())
+print(json.dumps({"import_ms": (imported - started) * 1000, "lifespan_ms": (ready - imported) * 1000}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure_once() -> dict:
+    """Один холодний старт в окремому процесі"""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_breakdown(top: int) -> dict:
+    """Розбивка часу імпорту за пакетами верхнього рівня та модулями app.*"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    by_package = defaultdict(int)
+    app_modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, module = match.groups()
+        by_package[module.split(".")[0]] += int(self_us)
+        if module == "app" or module.startswith("app."):
+            app_modules[module] = int(cumulative_us)
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "packages_ms": {name: us / 1000 for name, us in packages},
+        "app_modules_cumulative_ms": {name: us / 1000 for name, us in sorted(app_modules.items(), key=lambda i: -i[1])},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк часу старту додатку")
+    parser.add_argument("--runs", type=int, default=5, help="Кількість холодних стартів")
+    parser.add_argument("--top", type=int, default=15, help="Скільки пакетів показати в розбивці")
+    parser.add_argument("--json", action="store_true", help="Вивести результат у JSON")
+    args = parser.parse_args()
+
+    samples = [measure_once() for _ in range(args.runs)]
+    result = {
+        "runs": args.runs,
+        "import_ms_median": statistics.median(s["import_ms"] for s in samples),
+        "lifespan_ms_median": statistics.median(s["lifespan_ms"] for s in samples),
+        **import_breakdown(args.top),
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"Холодних стартів: {args.runs}")
+    print(f"Імпорт app.main (медіана): {result['import_ms_median']:.1f} ms")
+    print(f"Lifespan startup (медіана): {result['lifespan_ms_median']:.1f} ms")
+    print("\nЧас імпорту за пакетами (self time):")
+    for name, ms in result["packages_ms"].items():
+        print(f"  {name:<30} {ms:8.1f} ms")
+    print("\nМодулі app (cumulative):")
+    for name, ms in result["app_modules_cumulative_ms"].items():
+        print(f"  {name:<30} {ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
-from app.database import get_db, Base
+from app.database import get_session, Base, instrument_engine
 from app.auth import create_access_token
 
 # Створення тестової бази даних в пам'яті
@@ -19,10 +19,11 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+instrument_engine(engine)
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def override_get_db():
+def override_get_session():
     """
     Перевизначення залежності бази даних для тестів
     """
@@ -41,7 +42,7 @@ def client():
     Base.metadata.create_all(bind=engine)
     
     # Перевизначення залежності
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session] = override_get_session
     
     with TestClient(app) as c:
         yield c
@@ -87,3 +88,13 @@ def sample_contact():
         "birthday": "1990-01-01",
         "additional_info": "Тестовий контакт"
     }
+
+
+@pytest.fixture
+def make_contact(sample_contact):
+    """
+    Фабрика даних контакту: sample_contact з перевизначеними полями
+    """
+    def make(**fields):
+        return {**sample_contact, **fields}
+    return make
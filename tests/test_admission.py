@@ -0,0 +1,67 @@
+"""
+Тести для adaptive admission control
+"""
+import asyncio
+import pytest
+from app.admission import AIMDLimit, Overloaded, RouteClass, classify_request
+
+
+def test_aimd_limit_adapts_to_latency():
+    """Тест зменшення ліміту при повільних запитах та повільного зростання при швидких"""
+    limit = AIMDLimit(initial=10, min_limit=2, max_limit=20, target_latency=0.1)
+    limit.on_sample(0.5, now=100.0)
+    assert limit.value == 9
+    limit.on_sample(0.5, now=100.01)
+    assert limit.value == 9
+    for _ in range(100):
+        limit.on_sample(0.01, now=200.0)
+    assert limit.value > 9
+
+
+def test_classify_request():
+    """Тест розподілу маршрутів за класами"""
+    assert classify_request({"path": "/api/v1/auth/login", "method": "POST"}) == "auth"
+    assert classify_request({"path": "/api/v1/contacts/", "method": "GET"}) == "contacts_read"
+    assert classify_request({"path": "/api/v1/contacts/1", "method": "DELETE"}) == "contacts_write"
+    assert classify_request({"path": "/health", "method": "GET"}) is None
+
+
+@pytest.mark.asyncio
+async def test_route_class_queues_and_sheds():
+    """Тест черги з дедлайном та відхилення при переповненні"""
+    route_class = RouteClass(
+        "test",
+        AIMDLimit(initial=1, min_limit=1, max_limit=1, target_latency=0.01),
+        max_queue=1,
+        queue_timeout=0.05,
+    )
+    await route_class.acquire()
+    queued = asyncio.create_task(route_class.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(Overloaded):
+        await route_class.acquire()
+    route_class.release(0.01)
+    await queued
+    assert route_class.in_flight == 1
+    with pytest.raises(Overloaded):
+        await route_class.acquire()
+    assert route_class.shed == 2
+
+
+def test_health_bypasses_admission_control(client):
+    """Тест: /health обслуговується навіть коли всі слоти зайняті"""
+    from app.main import app
+
+    middleware = app.middleware_stack
+    while not hasattr(middleware, "route_classes"):
+        middleware = middleware.app
+    for route_class in middleware.route_classes.values():
+        route_class.in_flight += 10_000
+    try:
+        assert client.get("/health").status_code == 200
+        response = client.get("/api/v1/contacts/")
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+    finally:
+        for route_class in middleware.route_classes.values():
+            route_class.in_flight -= 10_000
@@ -2,7 +2,8 @@
 Тести для аутентифікації та авторизації
 """
 import pytest
-from tests.conftest import TestingSessionLocal
+from sqlalchemy import event
+from tests.conftest import TestingSessionLocal, engine
 
 
 def test_user_registration(client, test_user):
@@ -21,6 +22,35 @@ def test_user_registration_duplicate_email(client, test_user):
     client.post("/api/v1/auth/register", json=test_user)
     response = client.post("/api/v1/auth/register", json=test_user)
     assert response.status_code == 409
+    assert response.json()["detail"] == "Користувач з таким email вже існує"
+
+
+def test_user_registration_duplicate_username(client, test_user):
+    """Тест реєстрації з дублікатом username"""
+    client.post("/api/v1/auth/register", json=test_user)
+    response = client.post("/api/v1/auth/register", json=dict(test_user, email="other@example.com"))
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Користувач з таким username вже існує"
+
+
+def test_user_registration_single_transaction(client, test_user):
+    """Тест: реєстрація - два INSERT з RETURNING в одній транзакції, без SELECT"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split(None, 1)[0].upper())
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.post("/api/v1/auth/register", json=test_user)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 201
+    assert statements == ["INSERT", "INSERT"]
+    db = TestingSessionLocal()
+    from app.models import EmailVerification
+    assert db.query(EmailVerification).filter(EmailVerification.user_id == response.json()["id"]).count() == 1
+    db.close()
 
 
 def test_user_login_success(client, test_user):
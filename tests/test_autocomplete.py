@@ -0,0 +1,38 @@
+"""
+Тести для автодоповнення контактів за префіксом
+"""
+
+
+def test_autocomplete_matches_prefixes(authenticated_client, make_contact):
+    """Тест: підказки за префіксом імені, прізвища або email без урахування регістру"""
+    def create(first_name, last_name, email):
+        contact = make_contact(first_name=first_name, last_name=last_name, email=email)
+        return authenticated_client.post("/api/v1/contacts/", json=contact).json()
+
+    olena = create("Олена", "Коваленко", "olena@gmail.com")
+    oleh = create("Олег", "Петренко", "oleh@ukr.net")
+    create("Ірина", "Олійник", "iryna@ukr.net")
+
+    response = authenticated_client.get("/api/v1/contacts/autocomplete", params={"q": "ОЛЕ"})
+    assert response.status_code == 200
+    suggestions = response.json()
+    assert [s["id"] for s in suggestions] == [oleh["id"], olena["id"]]
+    assert suggestions[1] == {"id": olena["id"], "display_name": "Олена Коваленко", "email": "olena@gmail.com"}
+
+    assert [s["display_name"] for s in authenticated_client.get(
+        "/api/v1/contacts/autocomplete", params={"q": "ол"}).json()] == ["Олег Петренко", "Олена Коваленко", "Ірина Олійник"]
+    assert [s["id"] for s in authenticated_client.get(
+        "/api/v1/contacts/autocomplete", params={"q": "олена ков"}).json()] == [olena["id"]]
+    assert [s["id"] for s in authenticated_client.get(
+        "/api/v1/contacts/autocomplete", params={"q": "OLEH@"}).json()] == [oleh["id"]]
+    assert authenticated_client.get("/api/v1/contacts/autocomplete", params={"q": "ол", "limit": 1}).json()[0]["id"] == oleh["id"]
+
+
+def test_autocomplete_follows_updates(authenticated_client, make_contact):
+    """Тест: після зміни імені підказки використовують нове значення"""
+    olena = make_contact(first_name="Олена", last_name="Коваленко", email="olena@gmail.com")
+    contact = authenticated_client.post("/api/v1/contacts/", json=olena).json()
+    authenticated_client.put(f"/api/v1/contacts/{contact['id']}", json={"first_name": "Марія"})
+    assert authenticated_client.get("/api/v1/contacts/autocomplete", params={"q": "олен"}).json() == []
+    assert [s["id"] for s in authenticated_client.get(
+        "/api/v1/contacts/autocomplete", params={"q": "мар"}).json()] == [contact["id"]]
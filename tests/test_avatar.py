@@ -0,0 +1,148 @@
+"""
+Тести для завантаження аватарів
+"""
+import io
+import pytest
+from PIL import Image
+from app.storage import LocalStorage, set_storage
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+    """Фікстура з локальним сховищем аватарів"""
+    storage = LocalStorage(root=str(tmp_path), base_url="/media/avatars")
+    set_storage(storage)
+    yield storage
+    set_storage(None)
+
+
+def make_image(width=1200, height=800, fmt="PNG"):
+    """Згенерувати тестове зображення"""
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def test_upload_avatar_resizes_locally(authenticated_client, local_storage, tmp_path):
+    """Тест локального ресайзу аватара до 300x300 JPEG"""
+    original = make_image()
+    response = authenticated_client.post(
+        "/api/v1/auth/me/avatar",
+        files={"file": ("avatar.png", original, "image/png")},
+    )
+    assert response.status_code == 200
+    avatar_url = response.json()["avatar_url"]
+    assert avatar_url.startswith("/media/avatars/")
+    stored = tmp_path / avatar_url.removeprefix("/media/avatars/")
+    with Image.open(stored) as img:
+        assert img.format == "JPEG"
+        assert img.size == (300, 300)
+    assert stored.stat().st_size < len(original)
+
+
+def test_upload_avatar_generates_variants(authenticated_client, local_storage, tmp_path):
+    """Тест генерації мініатюр аватара у фоновій задачі"""
+    authenticated_client.post(
+        "/api/v1/auth/me/avatar",
+        files={"file": ("avatar.png", make_image(), "image/png")},
+    )
+    variants = authenticated_client.get("/api/v1/auth/me").json()["avatar_variants"]
+    assert set(variants) == {"64", "128", "300"}
+    for size, url in variants.items():
+        with Image.open(tmp_path / url.removeprefix("/media/avatars/")) as img:
+            assert img.size == (int(size), int(size))
+
+
+def test_upload_same_avatar_is_noop(authenticated_client, local_storage, tmp_path):
+    """Тест повторного завантаження того самого зображення"""
+    original = make_image()
+    first = authenticated_client.post("/api/v1/auth/me/avatar", files={"file": ("a.png", original, "image/png")})
+    stored = tmp_path / first.json()["avatar_url"].removeprefix("/media/avatars/")
+    mtime = stored.stat().st_mtime_ns
+    second = authenticated_client.post("/api/v1/auth/me/avatar", files={"file": ("b.png", original, "image/png")})
+    assert second.status_code == 200
+    assert second.json()["avatar_url"] == first.json()["avatar_url"]
+    assert stored.stat().st_mtime_ns == mtime
+
+
+def test_upload_new_avatar_removes_old_variants(authenticated_client, local_storage, tmp_path):
+    """Тест видалення старих варіантів після заміни аватара"""
+    first = authenticated_client.post("/api/v1/auth/me/avatar", files={"file": ("a.png", make_image(), "image/png")})
+    old_urls = authenticated_client.get("/api/v1/auth/me").json()["avatar_variants"].values()
+    second = authenticated_client.post(
+        "/api/v1/auth/me/avatar",
+        files={"file": ("b.png", make_image(640, 480), "image/png")},
+    )
+    assert second.json()["avatar_url"] != first.json()["avatar_url"]
+    for url in old_urls:
+        assert not (tmp_path / url.removeprefix("/media/avatars/")).exists()
+
+
+def test_upload_avatar_rejects_non_image(authenticated_client, local_storage):
+    """Тест завантаження файлу, що не є зображенням"""
+    response = authenticated_client.post(
+        "/api/v1/auth/me/avatar",
+        files={"file": ("notes.txt", b"hello", "text/plain")},
+    )
+    assert response.status_code == 400
+
+
+def test_upload_avatar_rejects_broken_image(authenticated_client, local_storage):
+    """Тест завантаження пошкодженого зображення"""
+    response = authenticated_client.post(
+        "/api/v1/auth/me/avatar",
+        files={"file": ("avatar.png", b"not really a png", "image/png")},
+    )
+    assert response.status_code == 400
+
+
+def test_upload_avatar_ignores_declared_content_type(authenticated_client, local_storage):
+    """Тест відхилення файлу з підробленим Content-Type"""
+    response = authenticated_client.post(
+        "/api/v1/auth/me/avatar",
+        files={"file": ("avatar.png", b"<html>definitely not a picture</html>", "image/png")},
+    )
+    assert response.status_code == 400
+    assert "зображенням" in response.json()["detail"]
+
+
+def test_upload_avatar_rejects_oversized_file(authenticated_client, local_storage):
+    """Тест відхилення файлу понад 5MB"""
+    payload = b"\x89PNG\r\n\x1a\n" + b"\0" * (5 * 1024 * 1024)
+    response = authenticated_client.post(
+        "/api/v1/auth/me/avatar",
+        files={"file": ("avatar.png", payload, "image/png")},
+    )
+    assert response.status_code == 400
+    assert "великий" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_read_image_upload_stops_at_first_chunk():
+    """Тест припинення читання тіла після перевірки сигнатури"""
+    from fastapi import HTTPException
+    from starlette.requests import Request
+    from app.uploads import read_image_upload
+
+    boundary = "testboundary"
+    head = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="a.png"\r\n'
+        "Content-Type: image/png\r\n\r\n"
+    ).encode() + b"MZ-not-an-image"
+    chunks = [head] + [b"\0" * 65536] * 50
+    consumed = []
+
+    async def receive():
+        consumed.append(True)
+        return {"type": "http.request", "body": chunks[len(consumed) - 1], "more_body": len(consumed) < len(chunks)}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "headers": [(b"content-type", f"multipart/form-data; boundary={boundary}".encode())],
+    }
+    with pytest.raises(HTTPException) as exc_info:
+        await read_image_upload(Request(scope, receive), "file", 5 * 1024 * 1024, "5MB")
+    assert exc_info.value.status_code == 400
+    assert len(consumed) == 1
@@ -0,0 +1,92 @@
+"""
+Тести для пакетного виконання запитів
+"""
+from sqlalchemy import event
+
+import app.auth
+from tests.conftest import engine
+
+
+def test_batch_runs_sub_requests_with_one_auth(authenticated_client, make_contact, monkeypatch):
+    """Тест: підзапити виконуються по черзі, а токен декодується один раз"""
+    calls = []
+    verify_token = app.auth.verify_token
+    monkeypatch.setattr(app.auth, "verify_token", lambda token: calls.append(token) or verify_token(token))
+
+    response = authenticated_client.post("/api/v1/batch", json={"requests": [
+        {"method": "POST", "url": "/api/v1/contacts/", "body": make_contact(email="one@example.com")},
+        {"method": "GET", "url": "/api/v1/auth/me"},
+        {"method": "GET", "url": "/api/v1/contacts/?search=one"},
+        {"method": "DELETE", "url": "/api/v1/contacts/9999"},
+        {"method": "POST", "url": "/api/v1/contacts/", "body": {"first_name": "Без email"}},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["committed"] is True
+    assert [r["status"] for r in data["results"]] == [201, 200, 200, 404, 422]
+    assert data["results"][1]["body"]["email"] == "test@example.com"
+    assert [c["email"] for c in data["results"][2]["body"]] == ["one@example.com"]
+    assert len(calls) == 1
+    assert len(authenticated_client.get("/api/v1/contacts/").json()) == 1
+
+
+def test_atomic_batch_rolls_back_on_error(authenticated_client, make_contact):
+    """Тест: в атомарному режимі помилка скасовує всі зміни пакета"""
+    response = authenticated_client.post("/api/v1/batch", json={"atomic": True, "requests": [
+        {"method": "POST", "url": "/api/v1/contacts/", "body": make_contact(email="one@example.com")},
+        {"method": "PUT", "url": "/api/v1/contacts/9999", "body": {"first_name": "Ні"}},
+        {"method": "POST", "url": "/api/v1/contacts/", "body": make_contact(email="two@example.com")},
+    ]})
+    data = response.json()
+    assert data["committed"] is False
+    assert [r["status"] for r in data["results"]] == [201, 404, 424]
+    assert authenticated_client.get("/api/v1/contacts/").json() == []
+    assert authenticated_client.get("/api/v1/contacts/stats").json()["total"] == 0
+
+
+def test_atomic_batch_commits_together(authenticated_client, make_contact):
+    """Тест: атомарний пакет без помилок фіксує всі зміни"""
+    created = authenticated_client.post("/api/v1/contacts/", json=make_contact(email="old@example.com")).json()
+    response = authenticated_client.post("/api/v1/batch", json={"atomic": True, "requests": [
+        {"method": "POST", "url": "/api/v1/contacts/", "body": make_contact(email="new@example.com")},
+        {"method": "PUT", "url": f"/api/v1/contacts/{created['id']}", "body": {"first_name": "Оновлений"}},
+        {"method": "GET", "url": f"/api/v1/contacts/{created['id']}"},
+    ]})
+    data = response.json()
+    assert data["committed"] is True
+    assert data["results"][2]["body"]["first_name"] == "Оновлений"
+    assert len(authenticated_client.get("/api/v1/contacts/").json()) == 2
+
+
+def test_batch_rejects_foreign_and_nested_urls(authenticated_client):
+    """Тест: підзапити лише до /api/v1/, без вкладених пакетів, SSE та multipart"""
+    response = authenticated_client.post("/api/v1/batch", json={"requests": [
+        {"method": "GET", "url": "/metrics"},
+        {"method": "POST", "url": "/api/v1/batch", "body": {"requests": []}},
+        {"method": "GET", "url": "/api/v1/contacts/events"},
+        {"method": "POST", "url": "/api/v1/auth/me/avatar"},
+    ]})
+    assert response.json()["committed"] is True
+    assert [r["status"] for r in response.json()["results"]] == [400, 400, 400, 400]
+    assert authenticated_client.post("/api/v1/batch", json={"requests": [
+        {"method": "GET", "url": "/api/v1/auth/me"}]}, headers={"Authorization": "Bearer bad"}).status_code == 401
+
+
+def test_non_atomic_batch_loads_user_once(authenticated_client, make_contact):
+    """Тест: commit підзапиту не скидає користувача пакета - без повторних SELECT users"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = authenticated_client.post("/api/v1/batch", json={"requests": [
+            {"method": "POST", "url": "/api/v1/contacts/", "body": make_contact(email=f"c{i}@example.com")}
+            for i in range(3)
+        ] + [{"method": "GET", "url": "/api/v1/auth/me"}]})
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert [r["status"] for r in response.json()["results"]] == [201, 201, 201, 200]
+    # Лише автентифікація батьківського запиту
+    assert sum("FROM users" in statement for statement in statements) == 1
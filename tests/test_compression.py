@@ -0,0 +1,106 @@
+"""
+Тести для стиснення відповідей
+"""
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressedCache, CompressionMiddleware, available_codecs, negotiate
+
+
+def _app(cache=None):
+    app = FastAPI()
+
+    @app.get("/big")
+    def big():
+        return {"items": ["контакт"] * 500}
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"line {i}\n" * 50 for i in range(5)), media_type="text/plain")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["data: x\n\n" * 200]), media_type="text/event-stream")
+
+    @app.get("/encoded")
+    def encoded():
+        return PlainTextResponse(gzip.compress(b"x" * 5000), headers={"Content-Encoding": "gzip"})
+
+    app.add_middleware(CompressionMiddleware, codecs=available_codecs(), cache=cache or CompressedCache())
+    return TestClient(app)
+
+
+def test_negotiate_respects_q_values():
+    """Тест: обирається кодування з найбільшим q, q=0 забороняє кодування"""
+    codecs = available_codecs()
+    assert negotiate("gzip", codecs).name == "gzip"
+    assert negotiate("gzip;q=0, identity", codecs) is None
+    assert negotiate("identity", codecs) is None
+    assert negotiate("", codecs) is None
+    assert negotiate("*", codecs).name == codecs[0].name
+    assert negotiate("br;q=0.5, gzip;q=0.9", codecs).name == "gzip"
+
+
+def test_large_response_compressed_and_cached():
+    """Тест: велике тіло стискається, повторна відповідь береться з кешу"""
+    cache = CompressedCache()
+    client = _app(cache)
+
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < 1000
+    assert response.json()["items"][0] == "контакт"
+    cached_size = cache.size
+    assert cached_size > 0
+
+    again = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert again.content == response.content
+    assert cache.size == cached_size
+
+
+def test_small_and_unsupported_responses_not_compressed():
+    """Тест: малі тіла, SSE та вже стиснені відповіді передаються як є"""
+    client = _app()
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.headers["vary"] == "Accept-Encoding"
+
+    events = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in events.headers
+    assert events.text.startswith("data: x")
+
+    identity = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+
+    encoded = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert encoded.content == b"x" * 5000
+
+
+def test_streaming_response_compressed():
+    """Тест: потокова відповідь стискається частинами без Content-Length"""
+    client = _app()
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == "".join(f"line {i}\n" * 50 for i in range(5))
+
+
+def test_cache_evicts_least_recently_used():
+    """Тест: кеш тримає сумарний розмір у межах ліміту"""
+    cache = CompressedCache(max_bytes=10)
+    cache.put(("gzip", b"a"), b"12345")
+    cache.put(("gzip", b"b"), b"12345")
+    cache.get(("gzip", b"a"))
+    cache.put(("gzip", b"c"), b"12345")
+    assert cache.get(("gzip", b"b")) is None
+    assert cache.get(("gzip", b"a")) == b"12345"
+    assert cache.size == 10
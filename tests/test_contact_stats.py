@@ -0,0 +1,70 @@
+"""
+Тести для інкрементальної статистики контактів
+"""
+from datetime import date
+
+from sqlalchemy import delete, insert, text, update
+
+from app.contact_stats import rebuild_contact_stats, verify_contact_stats
+from app.models import Contact, User
+from tests.conftest import TestingSessionLocal, engine
+
+
+def _assert_consistent():
+    with engine.connect() as connection:
+        assert verify_contact_stats(connection) == {}
+
+
+def test_stats_follow_api_changes(authenticated_client, make_contact):
+    """Тест: створення, оновлення та видалення через API змінюють статистику"""
+    contacts = [
+        make_contact(email="contact1@gmail.com", birthday="1990-03-01", additional_info="нотатка"),
+        make_contact(email="contact2@Gmail.com", birthday="1985-03-20", additional_info=None),
+        make_contact(email="contact3@ukr.net", birthday="2000-12-31", additional_info=None),
+    ]
+    ids = [authenticated_client.post("/api/v1/contacts/", json=contact).json()["id"] for contact in contacts]
+    stats = authenticated_client.get("/api/v1/contacts/stats").json()
+    assert stats["total"] == 3
+    assert stats["by_birth_month"]["3"] == 2 and stats["by_birth_month"]["12"] == 1
+    assert stats["by_email_domain"] == {"gmail.com": 2, "ukr.net": 1}
+    assert (stats["with_additional_info"], stats["without_additional_info"]) == (1, 2)
+
+    authenticated_client.put(f"/api/v1/contacts/{ids[1]}", json={"birthday": "1985-07-20", "additional_info": "так"})
+    authenticated_client.delete(f"/api/v1/contacts/{ids[2]}")
+    stats = authenticated_client.get("/api/v1/contacts/stats").json()
+    assert stats["total"] == 2
+    assert stats["by_birth_month"]["3"] == 1 and stats["by_birth_month"]["7"] == 1
+    assert stats["by_birth_month"]["12"] == 0
+    assert stats["by_email_domain"] == {"gmail.com": 2}
+    assert (stats["with_additional_info"], stats["without_additional_info"]) == (2, 0)
+    _assert_consistent()
+
+
+def test_stats_follow_bulk_statements(authenticated_client, make_contact):
+    """Тест: bulk insert/update/delete через сесію теж оновлюють статистику"""
+    db = TestingSessionLocal()
+    owner_id = db.query(User.id).scalar()
+    db.execute(insert(Contact), [
+        make_contact(last_name=f"Контакт{i}", email=f"contact{i}@example.com", birthday=date(1990, 1, 15), owner_id=owner_id)
+        for i in range(5)
+    ])
+    db.execute(update(Contact).where(Contact.last_name.in_(["Контакт0", "Контакт1"])).values(email="x@other.org"))
+    db.execute(delete(Contact).where(Contact.last_name == "Контакт4"))
+    db.commit()
+    db.close()
+
+    stats = authenticated_client.get("/api/v1/contacts/stats").json()
+    assert stats["total"] == 4
+    assert stats["by_email_domain"] == {"example.com": 2, "other.org": 2}
+    _assert_consistent()
+
+
+def test_rebuild_repairs_drift(authenticated_client, sample_contact):
+    """Тест: перерахунок виправляє розбіжності, внесені в обхід сесії"""
+    authenticated_client.post("/api/v1/contacts/", json=sample_contact)
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE contact_stats SET count = count + 5 WHERE dimension = 'total'"))
+        assert verify_contact_stats(connection)
+        rebuild_contact_stats(connection)
+        assert verify_contact_stats(connection) == {}
+    assert authenticated_client.get("/api/v1/contacts/stats").json()["total"] == 1
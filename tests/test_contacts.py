@@ -222,3 +222,22 @@ def test_root_endpoint(client):
     assert response.status_code == 200
     assert "працює успішно" in response.json()["message"]
 
+
+def test_batch_contacts(authenticated_client, sample_contact):
+    """Тест отримання контактів за списком ID у порядку запиту"""
+    ids = []
+    for i in range(3):
+        response = authenticated_client.post("/api/v1/contacts/", json={**sample_contact, "email": f"batch{i}@example.com"})
+        ids.append(response.json()["id"])
+
+    response = authenticated_client.get("/api/v1/contacts/batch", params={"ids": f"{ids[2]},9999,{ids[0]},{ids[2]}"})
+    assert response.status_code == 200
+    data = response.json()
+    assert [c["id"] for c in data["contacts"]] == [ids[2], ids[0]]
+    assert data["missing"] == [9999]
+
+    response = authenticated_client.post("/api/v1/contacts/batch", json={"ids": [ids[1], ids[0]]})
+    assert [c["id"] for c in response.json()["contacts"]] == [ids[1], ids[0]]
+
+    assert authenticated_client.get("/api/v1/contacts/batch", params={"ids": "1,abc"}).status_code == 422
+    assert authenticated_client.get("/api/v1/contacts/batch", params={"ids": ",".join(map(str, range(101)))}).status_code == 422
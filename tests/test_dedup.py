@@ -0,0 +1,151 @@
+"""
+Тести для пошуку та об'єднання дублікатів контактів
+"""
+import asyncio
+from datetime import date
+
+import pytest
+
+from app.dedup import ContactRow, DuplicateCache, DuplicateGroup, duplicate_cache, find_duplicates
+from app.redis_client import RedisManager
+
+
+OLENA = {"first_name": "Олена", "last_name": "Коваленко"}
+PETRO = {"first_name": "Петро", "last_name": "Шевченко", "phone": "+380671112233", "birthday": "1985-05-05"}
+
+
+@pytest.fixture(autouse=True)
+def clear_duplicate_cache():
+    duplicate_cache.clear()
+    yield
+    duplicate_cache.clear()
+
+
+def test_find_duplicates_uses_normalized_keys():
+    """Тест: регістр email, формат телефону та порядок імені не заважають знайти дублікат"""
+    rows = [
+        ContactRow(1, "Олена", "Коваленко", "olena@gmail.com", "+380501234567", date(1990, 1, 1)),
+        ContactRow(2, "коваленко", "олена", "Olena@Gmail.com", "050 123 45 67", date(1990, 1, 1)),
+        ContactRow(3, "Петро", "Шевченко", "petro@ukr.net", "+380671112233", date(1985, 5, 5)),
+        ContactRow(4, "Петро", "Шевченко", "p.shevchenko@ukr.net", "+380931112233", date(1970, 2, 2)),
+    ]
+    groups = find_duplicates(rows, threshold=0.6)
+    assert [group.contact_ids for group in groups] == [[1, 2]]
+    assert set(groups[0].reasons) == {"email", "phone", "name", "birthday"}
+
+
+def test_find_duplicates_skips_oversized_blocks():
+    """Тест: блоки, більші за ліміт, не порівнюються попарно"""
+    rows = [ContactRow(i, "Іван", "Іваненко", f"ivan{i}@x.com", f"+3805000000{i:02d}", None) for i in range(10)]
+    assert find_duplicates(rows, threshold=0.3, max_block=20)
+    assert find_duplicates(rows, threshold=0.3, max_block=5) == []
+
+
+def test_duplicates_and_merge_endpoints(authenticated_client, make_contact):
+    """Тест: endpoint знаходить дублікати, а merge об'єднує їх і скидає кеш"""
+    first = authenticated_client.post(
+        "/api/v1/contacts/", json=make_contact(**OLENA, email="olena@gmail.com", additional_info="робота")
+    ).json()
+    second = authenticated_client.post(
+        "/api/v1/contacts/", json=make_contact(**OLENA, email="olena.k@gmail.com", phone="0501234567", additional_info="сусідка")
+    ).json()
+    authenticated_client.post("/api/v1/contacts/", json=make_contact(**PETRO, email="petro@ukr.net"))
+
+    response = authenticated_client.get("/api/v1/contacts/duplicates")
+    assert response.status_code == 200
+    report = response.json()
+    assert report["status"] == "ready"
+    assert [group["contact_ids"] for group in report["groups"]] == [[first["id"], second["id"]]]
+
+    response = authenticated_client.post(
+        "/api/v1/contacts/merge", json={"primary_id": first["id"], "duplicate_ids": [second["id"]]}
+    )
+    assert response.status_code == 200
+    assert response.json()["additional_info"] == "робота\nсусідка"
+    assert authenticated_client.get(f"/api/v1/contacts/{second['id']}").status_code == 404
+    assert authenticated_client.get("/api/v1/contacts/duplicates").json()["groups"] == []
+    assert authenticated_client.get("/api/v1/contacts/stats").json()["total"] == 2
+
+
+def test_merge_validates_ids(authenticated_client, make_contact):
+    """Тест: merge відхиляє чужі/відсутні контакти та основний серед дублікатів"""
+    contact = authenticated_client.post("/api/v1/contacts/", json=make_contact(**OLENA, email="olena@gmail.com")).json()
+    response = authenticated_client.post("/api/v1/contacts/merge", json={"primary_id": contact["id"], "duplicate_ids": [contact["id"]]})
+    assert response.status_code == 400
+    response = authenticated_client.post("/api/v1/contacts/merge", json={"primary_id": contact["id"], "duplicate_ids": [9999]})
+    assert response.status_code == 404
+
+
+def test_large_books_use_background_job(authenticated_client, make_contact, monkeypatch):
+    """Тест: для великої книги перший запит повертає 202, а результат з'являється у кеші"""
+    monkeypatch.setattr("app.routers.contacts.DEDUP_SYNC_LIMIT", 0)
+    authenticated_client.post("/api/v1/contacts/", json=make_contact(**OLENA, email="olena@gmail.com"))
+    authenticated_client.post("/api/v1/contacts/", json=make_contact(**OLENA, email="Olena@gmail.com"))
+
+    response = authenticated_client.get("/api/v1/contacts/duplicates")
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
+    report = authenticated_client.get("/api/v1/contacts/duplicates").json()
+    assert report["status"] == "ready" and report["total_groups"] == 1
+
+
+def test_contact_changes_invalidate_cached_report(authenticated_client, make_contact):
+    """Тест: створення, зміна та видалення контакту скидають кеш дублікатів власника"""
+    first = authenticated_client.post("/api/v1/contacts/", json=make_contact(**OLENA, email="olena@gmail.com")).json()
+    assert authenticated_client.get("/api/v1/contacts/duplicates").json()["total_groups"] == 0
+
+    second = authenticated_client.post("/api/v1/contacts/", json=make_contact(**OLENA, email="Olena@gmail.com")).json()
+    assert authenticated_client.get("/api/v1/contacts/duplicates").json()["total_groups"] == 1
+
+    authenticated_client.put(f"/api/v1/contacts/{second['id']}", json=make_contact(**PETRO, email="petro@ukr.net"))
+    assert authenticated_client.get("/api/v1/contacts/duplicates").json()["total_groups"] == 0
+
+    authenticated_client.post("/api/v1/contacts/", json=make_contact(**OLENA, email="olena.k@gmail.com"))
+    assert authenticated_client.get("/api/v1/contacts/duplicates").json()["total_groups"] == 1
+    authenticated_client.delete(f"/api/v1/contacts/{first['id']}")
+    assert authenticated_client.get("/api/v1/contacts/duplicates").json()["total_groups"] == 0
+
+
+class FakeRedis:
+    """Спільне сховище ключів Redis для кількох воркерів"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+
+@pytest.mark.asyncio
+async def test_report_shared_between_workers_through_redis():
+    """Тест: звіт, порахований одним воркером, бачать інші, а скидання діє на всіх"""
+    fake = FakeRedis()
+    workers = []
+    for _ in range(2):
+        manager = RedisManager(client_factory=lambda: fake)
+        manager.client = fake
+        cache = DuplicateCache(manager)
+        await cache.start()
+        workers.append(cache)
+    first, second = workers
+
+    assert await first.claim(7)
+    assert not await second.claim(7)
+    await first.store(7, [DuplicateGroup([1, 2], 0.9, ["email"])])
+    report = await second.get(7)
+    assert report.groups == [DuplicateGroup([1, 2], 0.9, ["email"])]
+    assert second.is_fresh(report)
+    assert await second.claim(7)
+
+    second.invalidate([7])
+    await asyncio.sleep(0.01)
+    assert await first.get(7) is None
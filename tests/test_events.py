@@ -0,0 +1,53 @@
+"""
+Тести для SSE-потоку змін контактів
+"""
+import asyncio
+import threading
+import time
+
+from app.events import Subscriber, broker, event_stream
+
+
+def test_slow_subscriber_gets_resync():
+    """Тест: переповнена черга замінюється однією подією resync"""
+    async def scenario():
+        subscriber = Subscriber(owner_id=1, maxsize=2)
+        for i in range(3):
+            subscriber.offer({"type": "created", "contact_id": i, "owner_id": 1})
+        assert subscriber.dropped
+        chunks = [chunk async for chunk in event_stream(subscriber)]
+        assert chunks[1].startswith("id: 1\nevent: resync\n")
+        assert len(chunks) == 2
+
+    asyncio.run(scenario())
+
+
+def test_events_stream_reports_committed_changes(authenticated_client, make_contact):
+    """Тест: потік отримує created/updated/deleted, а відкочені зміни не публікуються"""
+    result = {}
+    stream = threading.Thread(target=lambda: result.update(response=authenticated_client.get("/api/v1/contacts/events")))
+    stream.start()
+    deadline = time.monotonic() + 5
+    while not broker.subscribers and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert broker.subscribers
+
+    contact = authenticated_client.post("/api/v1/contacts/", json=make_contact(email="live@example.com")).json()
+    authenticated_client.put(f"/api/v1/contacts/{contact['id']}", json={"first_name": "Змінена"})
+    authenticated_client.post("/api/v1/batch", json={"atomic": True, "requests": [
+        {"method": "POST", "url": "/api/v1/contacts/", "body": make_contact(email="rolled-back@example.com")},
+        {"method": "DELETE", "url": "/api/v1/contacts/9999"},
+    ]})
+    authenticated_client.delete(f"/api/v1/contacts/{contact['id']}")
+
+    time.sleep(0.1)
+    broker._loop.call_soon_threadsafe(broker.disconnect_all)
+    stream.join(timeout=5)
+    response = result["response"]
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["created", "updated", "deleted"]
+    assert '"first_name": "Змінена"' in response.text
+    assert "rolled-back" not in response.text
+    assert not broker.subscribers
@@ -0,0 +1,116 @@
+"""
+Тести для Idempotency-Key
+"""
+import asyncio
+
+import httpx
+from fastapi import FastAPI, HTTPException, UploadFile
+
+from app import idempotency
+from app.idempotency import IdempotencyMiddleware, IdempotencyStore, idempotency_store
+
+
+def test_replayed_key_returns_stored_response(authenticated_client, sample_contact):
+    """Тест: повтор з тим самим ключем повертає першу відповідь без створення дубліката"""
+    idempotency_store.clear()
+    headers = {"Idempotency-Key": "create-contact-1"}
+    first = authenticated_client.post("/api/v1/contacts/", json=sample_contact, headers=headers)
+    assert first.status_code == 201
+
+    replay = authenticated_client.post("/api/v1/contacts/", json=sample_contact, headers=headers)
+    assert replay.status_code == 201
+    assert replay.json() == first.json()
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert len(authenticated_client.get("/api/v1/contacts/").json()) == 1
+
+    # Без ключа повтор виконується і натрапляє на дублікат email
+    assert authenticated_client.post("/api/v1/contacts/", json=sample_contact).status_code == 400
+
+
+def test_key_reused_with_different_body(authenticated_client, sample_contact):
+    """Тест: той самий ключ з іншим тілом відхиляється"""
+    idempotency_store.clear()
+    headers = {"Idempotency-Key": "create-contact-2"}
+    assert authenticated_client.post("/api/v1/contacts/", json=sample_contact, headers=headers).status_code == 201
+    other = dict(sample_contact, email="other@example.com")
+    response = authenticated_client.post("/api/v1/contacts/", json=other, headers=headers)
+    assert response.status_code == 422
+
+
+def _counting_app():
+    app = FastAPI()
+    calls = []
+
+    @app.post("/slow")
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return {"call": len(calls)}
+
+    @app.post("/flaky")
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise HTTPException(status_code=503, detail="unavailable")
+        return {"call": len(calls)}
+
+    @app.post("/upload")
+    async def upload(file: UploadFile):
+        calls.append(1)
+        return {"call": len(calls), "size": len(await file.read())}
+
+    app.add_middleware(IdempotencyMiddleware, store=IdempotencyStore())
+    return app, calls
+
+
+def test_concurrent_duplicates_wait_for_first_request():
+    """Тест: одночасні дублікати чекають на перший запит і не виконуються вдруге"""
+    app, calls = _counting_app()
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await asyncio.gather(
+                *(client.post("/slow", headers={"Idempotency-Key": "same"}) for _ in range(5))
+            )
+
+    responses = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert {response.status_code for response in responses} == {200}
+    assert all(response.json() == {"call": 1} for response in responses)
+    assert sum(response.headers.get("idempotent-replayed") == "true" for response in responses) == 4
+
+
+def test_server_errors_are_not_stored():
+    """Тест: відповідь 5xx не зберігається, повтор виконується знову"""
+    app, calls = _counting_app()
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.post("/flaky", headers={"Idempotency-Key": "retry"})
+            second = await client.post("/flaky", headers={"Idempotency-Key": "retry"})
+            return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.status_code == 503
+    assert second.status_code == 200
+    assert len(calls) == 2
+
+
+def test_multipart_body_streamed_past_buffer_limit(monkeypatch):
+    """Тест: multipart-тіло з ключем не буферизується і не впирається в IDEMPOTENCY_MAX_BODY"""
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_MAX_BODY", 1024)
+    app, calls = _counting_app()
+    files = {"file": ("avatar.png", b"x" * 4096, "image/png")}
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.post("/upload", files=files, headers={"Idempotency-Key": "avatar"})
+            second = await client.post("/upload", files=files, headers={"Idempotency-Key": "avatar"})
+            return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.status_code == 200
+    assert first.json() == {"call": 1, "size": 4096}
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert len(calls) == 1
@@ -0,0 +1,42 @@
+"""
+Тести для інструментування SQL та endpoint /metrics
+"""
+import logging
+from sqlalchemy import text
+from app import metrics
+from app.database import N_PLUS_ONE_THRESHOLD, db_n_plus_one_total, normalize_sql
+from tests.conftest import engine
+
+
+def test_normalize_sql():
+    """Тест нормалізації: параметри та літерали замінюються, списки IN згортаються"""
+    statement = "SELECT *\n  FROM contacts WHERE owner_id = ? AND id IN (?, ?, ?) AND email = 'a@b.c' LIMIT 10"
+    assert normalize_sql(statement) == "SELECT * FROM contacts WHERE owner_id = ? AND id IN (?...) AND email = ? LIMIT ?"
+
+
+def test_n_plus_one_warning(caplog):
+    """Тест попередження, коли одна форма запиту повторюється понад поріг"""
+    stats = metrics.RequestQueryStats({"method": "GET", "path": "/test"})
+    token = metrics._query_stats.set(stats)
+    before = db_n_plus_one_total.value(route="unmatched")
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.database"), engine.connect() as connection:
+            for i in range(N_PLUS_ONE_THRESHOLD + 2):
+                connection.execute(text("SELECT :value"), {"value": i})
+    finally:
+        metrics._query_stats.reset(token)
+    assert stats.statements == N_PLUS_ONE_THRESHOLD + 2
+    assert db_n_plus_one_total.value(route="unmatched") == before + 1
+    assert sum("Possible N+1" in record.message for record in caplog.records) == 1
+
+
+def test_metrics_endpoint(authenticated_client):
+    """Тест експорту метрик запитів та SQL у форматі Prometheus"""
+    authenticated_client.get("/api/v1/contacts/")
+    response = authenticated_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/api/v1/contacts/",status="200",worker=' in body
+    assert 'db_statements_per_request_bucket{route="/api/v1/contacts/"' in body
+    assert "db_statements_total" in body
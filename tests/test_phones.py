@@ -0,0 +1,37 @@
+"""
+Тести для нормалізації телефонів та пошуку контакту за номером
+"""
+import pytest
+
+from app.phones import to_e164
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("+380501234567", "+380501234567"),
+    ("+38 (050) 123-45-67", "+380501234567"),
+    ("050 123 45 67", "+380501234567"),
+    ("00380501234567", "+380501234567"),
+    ("380501234567", "+380501234567"),
+    ("+1 (415) 555-0100", "+14155550100"),
+    ("невідомо", None),
+    ("+12", None),
+    ("", None),
+])
+def test_to_e164(raw, expected):
+    """Тест: різні формати номера зводяться до E.164"""
+    assert to_e164(raw) == expected
+
+
+def test_lookup_contact_by_phone(authenticated_client, sample_contact):
+    """Тест: контакт знаходиться за номером у будь-якому форматі, також після зміни телефону"""
+    contact = authenticated_client.post("/api/v1/contacts/", json={**sample_contact, "phone": "050 123 45 67"}).json()
+    assert contact["phone_e164"] == "+380501234567"
+
+    response = authenticated_client.get("/api/v1/contacts/by-phone/+38(050)1234567")
+    assert response.status_code == 200
+    assert [c["id"] for c in response.json()] == [contact["id"]]
+
+    authenticated_client.put(f"/api/v1/contacts/{contact['id']}", json={"phone": "+380671112233"})
+    assert authenticated_client.get("/api/v1/contacts/by-phone/0501234567").json() == []
+    assert [c["id"] for c in authenticated_client.get("/api/v1/contacts/by-phone/0671112233").json()] == [contact["id"]]
+    assert authenticated_client.get("/api/v1/contacts/by-phone/abc").status_code == 422
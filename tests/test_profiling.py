@@ -0,0 +1,64 @@
+"""
+Тести для профілювання запитів на вимогу
+"""
+import json
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app import profiling
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    """Секрет профілювання та тимчасовий каталог звітів"""
+    monkeypatch.setattr(profiling, "PROFILE_SECRET", "s3cret")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def profiled_client(profile_dir):
+    """Окремий додаток з middleware профілювання та синхронним endpoint"""
+    app = FastAPI()
+    app.add_middleware(profiling.ProfilingMiddleware, directory=profile_dir)
+
+    @app.get("/slow")
+    def slow():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_request_without_secret_is_not_profiled(profiled_client, profile_dir):
+    """Тест: без секрету (або з невірним) звіт не створюється"""
+    assert "X-Profile-Id" not in profiled_client.get("/slow").headers
+    assert "X-Profile-Id" not in profiled_client.get("/slow", headers={"X-Profile": "wrong"}).headers
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_profiled_request_writes_speedscope_report(profiled_client, profile_dir):
+    """Тест: запит із секретом у параметрі зберігає speedscope звіт"""
+    response = profiled_client.get("/slow?__profile=s3cret")
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    report = json.loads((profile_dir / f"{profile_id}{profiling.PROFILE_SUFFIX}").read_text())
+    assert report["profiles"]
+    names = {report["shared"]["frames"][i]["name"] for profile in report["profiles"] for sample in profile["samples"] for i in sample}
+    assert "slow" in names
+
+
+def test_admin_profile_endpoints(client, profiled_client, profile_dir):
+    """Тест списку та завантаження звітів лише з секретом"""
+    profile_id = profiled_client.get("/slow", headers={"X-Profile": "s3cret"}).headers["X-Profile-Id"]
+    admin = {"X-Profile-Secret": "s3cret"}
+    assert client.get("/admin/profiles").status_code == 403
+    listed = client.get("/admin/profiles", headers=admin).json()
+    assert [item["id"] for item in listed] == [profile_id]
+    response = client.get(f"/admin/profiles/{profile_id}", headers=admin)
+    assert response.status_code == 200
+    assert "profiles" in response.json()
+    assert client.get("/admin/profiles/..", headers=admin).status_code == 404
@@ -0,0 +1,22 @@
+"""
+Тести для перевірки планів запитів crud
+"""
+from scripts.check_query_plans import CapturedQuery, capture_crud_queries, check_plans, explain, prepare_database
+
+
+def test_crud_queries_use_indexes(tmp_path):
+    """Тест: жоден запит crud не сканує повністю contacts або users"""
+    engine = prepare_database(f"sqlite:///{tmp_path / 'plans.db'}")
+    assert check_plans(engine) == []
+
+    with engine.connect() as connection:
+        scans, plan = explain(connection, CapturedQuery("test", "SELECT * FROM contacts WHERE phone = ?", ("+380",)))
+    assert scans == ["contacts"], plan
+
+
+def test_crud_calls_cover_authentication(tmp_path):
+    """Тест: перевірка планів включає запит аутентифікації за email"""
+    engine = prepare_database(f"sqlite:///{tmp_path / 'plans.db'}")
+    with engine.connect() as connection:
+        queries = [query for query in capture_crud_queries(connection) if query.function == "authenticate_user"]
+    assert queries and all("FROM users" in query.statement for query in queries)
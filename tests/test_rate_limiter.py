@@ -0,0 +1,98 @@
+"""
+Тести для двоярусного rate limiter
+"""
+import pytest
+from app.rate_limiter import Limiter, parse_rate
+
+
+class FakeCounterSync:
+    """Спільний для кількох воркерів лічильник замість Redis"""
+
+    def __init__(self):
+        self.counts = {}
+        self.calls = 0
+
+    async def push(self, deltas):
+        self.calls += 1
+        result = []
+        for key, delta, _ in deltas:
+            self.counts[key] = self.counts.get(key, 0) + delta
+            result.append(self.counts[key])
+        return result
+
+    async def close(self):
+        pass
+
+
+class FailingCounterSync(FakeCounterSync):
+    async def push(self, deltas):
+        raise ConnectionError("redis is down")
+
+
+def test_parse_rate():
+    """Тест розбору ліміту"""
+    assert parse_rate("10/minute") == (10, 60)
+    assert parse_rate("5/seconds") == (5, 1)
+    with pytest.raises(ValueError):
+        parse_rate("5/fortnight")
+
+
+def test_local_bucket_enforces_limit():
+    """Тест локального обмеження без Redis"""
+    limiter = Limiter()
+    now = 1_000_000.0
+    assert all(limiter.hit("scope", "ip", 3, 60, now) == 0 for _ in range(3))
+    assert limiter.hit("scope", "ip", 3, 60, now) > 0
+    assert limiter.hit("scope", "other-ip", 3, 60, now) == 0
+
+
+@pytest.mark.asyncio
+async def test_sync_makes_limit_global():
+    """Тест: після синхронізації воркер бачить запити інших воркерів"""
+    shared = FakeCounterSync()
+    worker_a, worker_b = Limiter(), Limiter()
+    worker_a.sync = worker_b.sync = shared
+    for _ in range(4):
+        assert worker_a.hit("scope", "ip", 5, 3600) == 0
+    await worker_a.sync_once()
+    assert worker_b.hit("scope", "ip", 5, 3600) == 0
+    await worker_b.sync_once()
+    await worker_a.sync_once()
+    assert worker_a.hit("scope", "ip", 5, 3600) > 0
+    assert worker_b.hit("scope", "ip", 5, 3600) > 0
+
+
+@pytest.mark.asyncio
+async def test_sync_batches_redis_calls():
+    """Тест: один виклик Redis на цикл синхронізації незалежно від кількості запитів"""
+    shared = FakeCounterSync()
+    limiter = Limiter()
+    limiter.sync = shared
+    for i in range(50):
+        limiter.hit("scope", f"ip-{i % 5}", 100, 60)
+    await limiter.sync_once()
+    assert shared.calls == 1
+    assert sum(shared.counts.values()) == 50
+
+
+@pytest.mark.asyncio
+async def test_sync_failure_keeps_local_counts():
+    """Тест: при недоступному Redis лічильники зберігаються локально"""
+    limiter = Limiter()
+    limiter.sync = FailingCounterSync()
+    for _ in range(2):
+        assert limiter.hit("scope", "ip", 2, 3600) == 0
+    await limiter.sync_once()
+    assert limiter.hit("scope", "ip", 2, 3600) > 0
+
+
+def test_rate_limited_endpoint_returns_429(authenticated_client):
+    """Тест відповіді 429 з Retry-After для /auth/me"""
+    from app.rate_limiter import limiter
+
+    limiter.reset()
+    responses = [authenticated_client.get("/api/v1/auth/me") for _ in range(11)]
+    limiter.reset()
+    assert [r.status_code for r in responses[:10]] == [200] * 10
+    assert responses[10].status_code == 429
+    assert int(responses[10].headers["Retry-After"]) >= 1
@@ -0,0 +1,75 @@
+"""
+Тести для circuit breaker клієнта Redis
+"""
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.redis_client import CircuitOpenError, CircuitState, RedisManager
+
+
+class FakeRedis:
+    """Клієнт Redis, доступність якого задається в тесті"""
+
+    def __init__(self):
+        self.up = False
+        self.calls = 0
+
+    async def ping(self):
+        self.calls += 1
+        if not self.up:
+            raise RedisConnectionError("connection refused")
+        return True
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def fake_manager():
+    """Менеджер з фейковим клієнтом та миттєвим відновленням"""
+    fake = FakeRedis()
+    manager = RedisManager(failure_threshold=2, recovery_timeout=0, client_factory=lambda: fake)
+    manager.client = fake
+    return manager, fake
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_failures(fake_manager):
+    """Тест розмикання breaker після кількох помилок поспіль"""
+    manager, fake = fake_manager
+    for _ in range(2):
+        with pytest.raises(RedisConnectionError):
+            await manager.execute(lambda client: client.ping())
+    assert manager.state == CircuitState.OPEN
+    calls = fake.calls
+    with pytest.raises(CircuitOpenError):
+        await manager.execute(lambda client: client.ping())
+    assert fake.calls == calls
+
+
+@pytest.mark.asyncio
+async def test_breaker_recovers_when_redis_returns(fake_manager):
+    """Тест автоматичного відновлення після повернення Redis"""
+    manager, fake = fake_manager
+    transitions = []
+    manager.listeners.append(lambda old, new: transitions.append((old, new)))
+    manager.record_failure(RedisConnectionError("down"))
+    manager.record_failure(RedisConnectionError("down"))
+    assert not await manager.probe()
+    assert manager.state == CircuitState.OPEN
+    fake.up = True
+    assert await manager.probe()
+    assert manager.state == CircuitState.CLOSED
+    assert await manager.execute(lambda client: client.ping())
+    assert transitions == [
+        (CircuitState.CLOSED, CircuitState.OPEN),
+        (CircuitState.OPEN, CircuitState.HALF_OPEN),
+        (CircuitState.HALF_OPEN, CircuitState.OPEN),
+        (CircuitState.OPEN, CircuitState.HALF_OPEN),
+        (CircuitState.HALF_OPEN, CircuitState.CLOSED),
+    ]
+
+
+def test_health_reports_redis_state(client):
+    """Тест відображення стану Redis у /health"""
+    data = client.get("/health").json()
+    assert data["redis"]["state"] in {state.value for state in CircuitState}
@@ -0,0 +1,94 @@
+"""
+Тести для відкликання JWT токенів
+"""
+from datetime import datetime, timedelta
+
+from app import auth
+from app.models import RevokedToken, User
+from app.revocation import BloomFilter, RevocationList, revocation_list
+from tests.conftest import TestingSessionLocal
+
+
+def _login(client, test_user):
+    response = client.post("/api/v1/auth/login", json={"email": test_user["email"], "password": test_user["password"]})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Тест: всі додані елементи знаходяться, частка хибнопозитивних мала"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"token-{i}")
+    assert all(f"token-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_logout_revokes_only_current_token(authenticated_client, test_user):
+    """Тест: після виходу токен відхиляється, інша сесія працює"""
+    revocation_list.clear()
+    other_session = _login(authenticated_client, test_user)
+
+    response = authenticated_client.post("/api/v1/auth/logout")
+    assert response.status_code == 200
+    response = authenticated_client.get("/api/v1/auth/me")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+    assert authenticated_client.get("/api/v1/auth/me", headers=other_session).status_code == 200
+
+
+def test_logout_decodes_token_once(authenticated_client, monkeypatch):
+    """Тест: вихід декодує JWT один раз для автентифікації та відкликання"""
+    calls = []
+    verify_token = auth.verify_token
+    monkeypatch.setattr(auth, "verify_token", lambda token: calls.append(token) or verify_token(token))
+
+    assert authenticated_client.post("/api/v1/auth/logout").status_code == 200
+    assert len(calls) == 1
+
+
+def test_revoked_token_picked_up_by_sync(authenticated_client, test_user):
+    """Тест: фільтр іншого воркера отримує відкликаний jti під час синхронізації"""
+    revocation_list.clear()
+    assert authenticated_client.get("/api/v1/auth/me").status_code == 200
+    assert authenticated_client.post("/api/v1/auth/logout").status_code == 200
+
+    # Імітуємо воркер, який ще не бачив відкликання
+    revocation_list.clear()
+    db = TestingSessionLocal()
+    try:
+        revocation_list.sync(db)
+    finally:
+        db.close()
+    assert authenticated_client.get("/api/v1/auth/me").status_code == 401
+
+
+def test_sync_picks_up_rows_committed_out_of_id_order(authenticated_client, test_user):
+    """Тест: запис з меншим id, закомічений після синхронізації, потрапляє у фільтр"""
+    db = TestingSessionLocal()
+    try:
+        user_id = db.query(User.id).filter(User.email == test_user["email"]).scalar()
+        expires_at = datetime.utcnow() + timedelta(minutes=30)
+        db.add(RevokedToken(id=100, jti="later-id", user_id=user_id, expires_at=expires_at))
+        db.commit()
+        revocations = RevocationList(sync_interval=0)
+        revocations.sync(db)
+
+        # Транзакція іншого воркера, що отримала менший id, комітиться пізніше
+        db.add(RevokedToken(id=50, jti="earlier-id", user_id=user_id, expires_at=expires_at))
+        db.commit()
+        revocations.sync(db)
+        assert "later-id" in revocations.filter
+        assert "earlier-id" in revocations.filter
+    finally:
+        db.close()
+
+
+def test_logout_all_revokes_every_session(authenticated_client, test_user):
+    """Тест: вихід з усіх сесій відкликає всі токени, новий вхід працює"""
+    other_session = _login(authenticated_client, test_user)
+
+    assert authenticated_client.post("/api/v1/auth/logout-all").status_code == 200
+    assert authenticated_client.get("/api/v1/auth/me").status_code == 401
+    assert authenticated_client.get("/api/v1/auth/me", headers=other_session).status_code == 401
+    assert authenticated_client.get("/api/v1/auth/me", headers=_login(authenticated_client, test_user)).status_code == 200
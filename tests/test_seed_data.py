@@ -0,0 +1,19 @@
+"""
+Тести для генератора тестових даних
+"""
+from scripts.seed_data import contact_counts, generate_contacts
+
+
+def test_contact_counts_are_skewed_and_exact():
+    """Тест: сума збігається із запитаною, а розподіл має перекос"""
+    counts = contact_counts(users=1000, total=100_000, skew=1.5, seed=1)
+    assert sum(counts) == 100_000
+    ordered = sorted(counts)
+    assert ordered[-1] > 10 * ordered[len(ordered) // 2]
+
+
+def test_generate_contacts_sets_owner():
+    """Тест: кожен контакт має власника та унікальний email"""
+    rows = list(generate_contacts([(1, 3), (2, 2)], first_index=0, seed=1))
+    assert [row[-1] for row in rows] == [1, 1, 1, 2, 2]
+    assert len({row[2] for row in rows}) == 5
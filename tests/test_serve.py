@@ -0,0 +1,48 @@
+"""
+Тести для production-запуску
+"""
+from app import serve
+
+
+def test_worker_count_from_env(monkeypatch):
+    """Тест розміру пулу воркерів: WEB_CONCURRENCY або за кількістю ядер"""
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert serve.worker_count() == 3
+    monkeypatch.delenv("WEB_CONCURRENCY")
+    monkeypatch.setattr(serve.os, "sched_getaffinity", lambda pid: {0, 1}, raising=False)
+    assert serve.worker_count() == 2
+
+
+def test_restarted_worker_reuses_free_slot():
+    """Тест: новий воркер отримує найменший вільний номер слоту, а не age"""
+    class Worker:
+        pass
+
+    class Server:
+        WORKERS = {}
+
+    server = Server()
+    for pid in (101, 102, 103):
+        worker = Worker()
+        serve._pre_fork(server, worker)
+        server.WORKERS[pid] = worker
+    assert [worker.slot for worker in server.WORKERS.values()] == [0, 1, 2]
+
+    del server.WORKERS[102]
+    replacement = Worker()
+    serve._pre_fork(server, replacement)
+    assert replacement.slot == 1
+
+
+def test_uvicorn_options_prefer_fast_implementations(monkeypatch):
+    """Тест вибору uvloop/httptools лише коли вони встановлені"""
+    monkeypatch.setattr(serve, "_available", lambda module: False)
+    options = serve.uvicorn_options()
+    assert (options["loop"], options["http"]) == ("asyncio", "h11")
+    assert options["timeout_keep_alive"] == serve.KEEP_ALIVE
+
+
+def test_health_reports_worker_id(client, monkeypatch):
+    """Тест ідентифікатора воркера у /health"""
+    monkeypatch.setenv("WORKER_ID", "7")
+    assert client.get("/health").json()["worker_id"] == "7"
@@ -0,0 +1,45 @@
+"""
+Тести для розбивки часу запиту (Server-Timing)
+"""
+import time
+import pytest
+from app.timing import RequestTimings, ServerTimingMiddleware, phase_seconds
+
+
+def test_nested_phases_are_exclusive():
+    """Тест: час вкладеної фази не враховується двічі"""
+    timings = RequestTimings()
+    timings.enter("auth")
+    timings.enter("db")
+    time.sleep(0.01)
+    timings.exit()
+    timings.exit()
+    durations = timings.finish()
+    assert durations["db"] >= 0.01
+    assert durations["auth"] < durations["db"]
+    assert sum(v for k, v in durations.items() if k != "total") == pytest.approx(durations["total"])
+
+
+@pytest.fixture
+def timed_client(authenticated_client):
+    """Клієнт, для якого розбивка збирається для кожного запиту"""
+    from app.main import app
+
+    middleware = app.middleware_stack
+    while not isinstance(middleware, ServerTimingMiddleware):
+        middleware = middleware.app
+    sample_rate, middleware.sample_rate = middleware.sample_rate, 1.0
+    yield authenticated_client
+    middleware.sample_rate = sample_rate
+
+
+def test_server_timing_header(timed_client, sample_contact):
+    """Тест заголовка Server-Timing з фазами auth, db, serialize та other"""
+    timed_client.post("/api/v1/contacts/", json=sample_contact)
+    count = phase_seconds.count(phase="total")
+    response = timed_client.get("/api/v1/contacts/")
+    assert response.status_code == 200
+    phases = dict(item.split(";dur=") for item in response.headers["Server-Timing"].split(", "))
+    assert {"auth", "db", "serialize", "other", "total"} <= set(phases)
+    assert sum(float(v) for k, v in phases.items() if k != "total") == pytest.approx(float(phases["total"]), abs=0.05)
+    assert phase_seconds.count(phase="total") == count + 1